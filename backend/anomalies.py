@@ -0,0 +1,191 @@
+"""
+Anomalies Module
+
+This module scans the parsed campaign tables for the signals behind the
+"Challenges & Opportunities" slide: bounce-rate spikes, campaigns that sent
+but delivered nothing, unsubscribe outliers and revenue concentration.
+Rates are recomputed per campaign from their counts and scored with robust
+z-scores (median and MAD), so a few extreme campaigns cannot mask each
+other. The findings are compact enough to hand to the prompt as is.
+"""
+
+import math
+import os
+from statistics import median
+
+from derived_metrics import DerivedMetric, DerivedMetricEngine, cached
+
+# Robust z-score above which a campaign's rate is flagged
+ANOMALY_Z_THRESHOLD = float(os.getenv("QBR_ANOMALY_Z_THRESHOLD", "3.5"))
+# Campaigns below this many sends are too small to score
+ANOMALY_MIN_SENDS = float(os.getenv("QBR_ANOMALY_MIN_SENDS", "1000"))
+# Revenue share of the single largest campaign that counts as concentrated
+CONCENTRATION_TOP_SHARE = float(os.getenv("QBR_CONCENTRATION_TOP_SHARE", "0.2"))
+# Revenue share of the top decile of campaigns that counts as concentrated
+CONCENTRATION_DECILE_SHARE = 0.5
+# Findings listed per kind
+ANOMALY_MAX_FINDINGS = int(os.getenv("QBR_ANOMALY_MAX_FINDINGS", "5"))
+
+# Scale factor making the MAD a consistent estimator of the standard deviation
+MAD_SCALE = 0.6745
+# Scale factor for the mean absolute deviation fallback when the MAD is zero
+MEAN_AD_SCALE = 0.7979
+
+RATE_ENGINE = DerivedMetricEngine([
+    DerivedMetric('bounce_rate', 'Bounces / Sends'),
+    DerivedMetric('unsubscribe_rate', 'Unsubscribes / Delivered'),
+])
+
+# (kind, rate, volume column, label) of the rates scored for outliers
+SCORED_RATES = [
+    ('bounce_spike', 'bounce_rate', 'Sends', 'bounce rate'),
+    ('unsubscribe_outlier', 'unsubscribe_rate', 'Delivered', 'unsubscribe rate'),
+]
+
+COLUMNS = ['Sends', 'Delivered', 'Bounces', 'Unsubscribes', 'Revenue']
+
+
+def robust_z_scores(values):
+    """
+    Scores values by their distance from the median in MAD units.
+
+    Falls back to the mean absolute deviation when more than half of the
+    values are identical; returns all zeros when there is no spread at all.
+    """
+    if not values:
+        return []
+    center = median(values)
+    deviations = [abs(value - center) for value in values]
+    spread = median(deviations)
+    if spread:
+        scale = MAD_SCALE / spread
+    else:
+        mean_deviation = math.fsum(deviations) / len(deviations)
+        if not mean_deviation:
+            return [0.0] * len(values)
+        scale = MEAN_AD_SCALE / mean_deviation
+    return [(value - center) * scale for value in values]
+
+
+def _campaign_columns(tables):
+    # Concatenates the columns the detectors read across all tables
+    columns = {name: [] for name in COLUMNS}
+    names = []
+    types = []
+    for table in tables:
+        if table is None or not len(table):
+            continue
+        for name in COLUMNS:
+            columns[name].extend(table.numeric[name] if name in table.numeric else [0.0] * len(table))
+        names.extend(table.column('Campaign') if 'Campaign' in table.text else [''] * len(table))
+        types.extend(table.column('Campaign Type') if 'Campaign Type' in table.text else [''] * len(table))
+    return columns, names, types
+
+
+def _finding(kind, severity, message, campaign="", campaign_type="", value=None, score=None):
+    return {
+        "kind": kind,
+        "severity": severity,
+        "campaign": campaign,
+        "campaign_type": campaign_type,
+        "value": value,
+        "score": score,
+        "message": message,
+    }
+
+
+def _undelivered(columns, names, types):
+    findings = []
+    for index in sorted(range(len(names)), key=columns['Sends'].__getitem__, reverse=True):
+        sends = columns['Sends'][index]
+        if sends > 0 and columns['Delivered'][index] == 0:
+            findings.append(_finding(
+                "zero_delivered", "high",
+                f"{names[index]} ({types[index]}) sent {sends:,.0f} messages but delivered none",
+                names[index], types[index], value=sends,
+            ))
+    return findings
+
+
+def _rate_outliers(columns, names, types, z_threshold, min_sends):
+    findings = []
+    rates = RATE_ENGINE.evaluate(columns)
+    for kind, rate_name, volume_column, label in SCORED_RATES:
+        volumes = columns[volume_column]
+        candidates = [index for index, volume in enumerate(volumes)
+                      if volume > 0 and columns['Sends'][index] >= min_sends]
+        values = [rates[rate_name][index] for index in candidates]
+        scores = robust_z_scores(values)
+        typical = median(values) if values else 0.0
+        flagged = sorted(
+            ((score, index, value) for score, index, value in zip(scores, candidates, values) if score >= z_threshold),
+            reverse=True,
+        )
+        for score, index, value in flagged:
+            findings.append(_finding(
+                kind, "high" if score >= 2 * z_threshold else "medium",
+                f"{names[index]} ({types[index]}) {label} {value:.2%} vs typical {typical:.2%} (robust z {score:.1f})",
+                names[index], types[index], value=value, score=score,
+            ))
+    return findings
+
+
+def _revenue_concentration(columns, names, types):
+    revenue = columns['Revenue']
+    total = math.fsum(revenue)
+    if total <= 0 or len(revenue) < 2:
+        return []
+    order = sorted(range(len(revenue)), key=revenue.__getitem__, reverse=True)
+    top = order[0]
+    top_share = revenue[top] / total
+    decile = max(1, len(order) // 10)
+    decile_share = math.fsum(revenue[index] for index in order[:decile]) / total
+    if top_share < CONCENTRATION_TOP_SHARE and decile_share < CONCENTRATION_DECILE_SHARE:
+        return []
+    return [_finding(
+        "revenue_concentration", "high" if decile_share >= CONCENTRATION_DECILE_SHARE else "medium",
+        f"{names[top]} ({types[top]}) drives {top_share:.1%} of revenue; "
+        f"the top {decile} of {len(order)} campaigns drive {decile_share:.1%}",
+        names[top], types[top], value=top_share,
+    )]
+
+
+def detect_anomalies(tables, z_threshold=ANOMALY_Z_THRESHOLD, min_sends=ANOMALY_MIN_SENDS, dataset=None):
+    """
+    Flags problem campaigns and revenue concentration across the tables.
+
+    Args:
+        tables: CampaignTables of the uploaded exports.
+        z_threshold: Robust z-score above which a rate is an outlier.
+        min_sends: Minimum sends for a campaign's rates to be scored.
+        dataset: Optional dataset key, to reuse a cached result.
+
+    Returns:
+        A list of finding dicts with "kind", "severity", "campaign",
+        "campaign_type", "value", "score" and "message", grouped by kind
+        and most severe first within each kind.
+    """
+    def compute():
+        columns, names, types = _campaign_columns(tables)
+        if not names:
+            return []
+        return (_undelivered(columns, names, types)
+                + _rate_outliers(columns, names, types, z_threshold, min_sends)
+                + _revenue_concentration(columns, names, types))
+
+    return cached(dataset, ("anomalies", z_threshold, min_sends), compute)
+
+
+def format_findings(findings, limit=ANOMALY_MAX_FINDINGS):
+    """Renders findings as prompt-ready lines, at most ``limit`` per kind."""
+    lines = []
+    listed = {}
+    for finding in findings:
+        kind = finding["kind"]
+        listed[kind] = listed.get(kind, 0) + 1
+        if listed[kind] <= limit:
+            lines.append(f"- [{finding['severity']}] {finding['message']}")
+    for kind, count in listed.items():
+        if count > limit:
+            lines.append(f"- ({count - limit} more {kind.replace('_', ' ')} findings)")
+    return lines
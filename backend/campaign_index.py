@@ -0,0 +1,149 @@
+"""
+Campaign Index Module
+
+This module indexes the parsed campaigns of one or more exports so the
+prompt builder and slide generators can ask ranking questions such as
+"top 10 by Revenue" or "bottom 5 by Unique Click % among Event Triggered"
+without sorting the whole table. Campaigns are keyed by Campaign UUID, with
+secondary indexes on Campaign Type and Campaign Segment, and rankings use
+heap-based selection.
+"""
+
+import heapq
+import math
+from array import array
+from bisect import bisect_right
+
+# Text columns with a secondary index
+INDEXED_COLUMNS = ['Campaign Type', 'Campaign Segment']
+
+
+class CampaignIndex:
+    """
+    Campaign lookups and rankings over CampaignTables.
+
+    Rows are addressed by a global row number across all indexed tables.
+
+    Args:
+        tables: CampaignTables, e.g. one per uploaded export.
+    """
+
+    def __init__(self, tables):
+        self.tables = [table for table in tables if table is not None and len(table)]
+        self._offsets = []
+        self.row_count = 0
+        for table in self.tables:
+            self._offsets.append(self.row_count)
+            self.row_count += len(table)
+        self.by_uuid = {}
+        self.secondary = {name: {} for name in INDEXED_COLUMNS}
+        for table, offset in zip(self.tables, self._offsets):
+            self._index_table(table, offset)
+
+    def _index_table(self, table, offset):
+        if 'Campaign UUID' in table.text:
+            codes, values = table.text['Campaign UUID']
+            for row_index, code in enumerate(codes):
+                self.by_uuid[values[code]] = offset + row_index
+        for name, index in self.secondary.items():
+            if name not in table.text:
+                continue
+            codes, values = table.text[name]
+            buckets = {}
+            for row_index, code in enumerate(codes):
+                bucket = buckets.get(code)
+                if bucket is None:
+                    bucket = buckets[code] = array('Q')
+                bucket.append(offset + row_index)
+            for code, rows in buckets.items():
+                index.setdefault(values[code], array('Q')).extend(rows)
+
+    def __len__(self):
+        return self.row_count
+
+    def row(self, global_row):
+        """Returns the CampaignRow for a global row number."""
+        table_number = bisect_right(self._offsets, global_row) - 1
+        return self.tables[table_number].row(global_row - self._offsets[table_number])
+
+    def get(self, campaign_uuid):
+        """Returns the campaign with the given Campaign UUID, or None."""
+        global_row = self.by_uuid.get(campaign_uuid)
+        return None if global_row is None else self.row(global_row)
+
+    def values(self, name):
+        """Returns the distinct values of an indexed column."""
+        return list(self.secondary[name])
+
+    def count(self, where=None):
+        """Returns the number of campaigns matching the filters."""
+        return len(self._candidates(where)) if where else self.row_count
+
+    def total(self, column, where=None):
+        """Sums a numeric column over the campaigns matching the filters."""
+        if where:
+            return math.fsum(self._value(column, row) for row in self._candidates(where))
+        return math.fsum(math.fsum(table.numeric[column]) for table in self.tables if column in table.numeric)
+
+    def _value(self, column, global_row):
+        table_number = bisect_right(self._offsets, global_row) - 1
+        values = self.tables[table_number].numeric.get(column)
+        return 0.0 if values is None else values[global_row - self._offsets[table_number]]
+
+    def _candidates(self, where):
+        # Intersects the secondary index postings for each filter, smallest first
+        postings = []
+        for name, value in where.items():
+            if name not in self.secondary:
+                raise KeyError(f"{name} is not an indexed column")
+            postings.append(self.secondary[name].get(value, ()))
+        postings.sort(key=len)
+        candidates = postings[0]
+        for other in postings[1:]:
+            other = set(other)
+            candidates = [row for row in candidates if row in other]
+        return candidates
+
+    def rank(self, column, n=10, where=None, predicate=None, largest=True):
+        """
+        Selects the top or bottom ``n`` campaigns by a numeric column.
+
+        Args:
+            column: Numeric column to rank by, e.g. 'Revenue'.
+            n: Number of campaigns to return.
+            where: Optional {indexed column: value} filters, e.g.
+                {'Campaign Type': 'Event Triggered'}.
+            predicate: Optional callable(row) -> bool applied to candidates.
+            largest: True for the top ``n``, False for the bottom ``n``.
+
+        Returns:
+            A list of CampaignRows ordered best first (or worst first).
+        """
+        select = heapq.nlargest if largest else heapq.nsmallest
+        if where:
+            candidates = self._candidates(where)
+            if predicate is not None:
+                candidates = [row for row in candidates if predicate(self.row(row))]
+            chosen = select(n, candidates, key=lambda row: self._value(column, row))
+            return [self.row(row) for row in chosen]
+
+        # Select within each table with C-level key lookups, then across tables
+        selected = []
+        for table, offset in zip(self.tables, self._offsets):
+            values = table.numeric.get(column)
+            if values is None:
+                continue
+            rows = range(len(table))
+            if predicate is not None:
+                rows = [row for row in rows if predicate(table.row(row))]
+            selected.extend((values[row], offset + row) for row in select(n, rows, key=values.__getitem__))
+        chosen = select(n, selected, key=lambda item: item[0])
+        return [self.row(row) for _, row in chosen]
+
+    def top(self, column, n=10, where=None, predicate=None):
+        """Returns the ``n`` campaigns with the largest ``column`` values."""
+        return self.rank(column, n, where, predicate, largest=True)
+
+    def bottom(self, column, n=10, where=None, predicate=None):
+        """Returns the ``n`` campaigns with the smallest ``column`` values."""
+        return self.rank(column, n, where, predicate, largest=False)
@@ -0,0 +1,190 @@
+"""
+Campaign Table Module
+
+This module holds the parsed campaigns of an export in a compact columnar
+table: numeric columns as typed arrays and text columns as integer codes
+into a dictionary of unique strings, so repeated values such as segment
+names are stored once. Rows are exposed through a ``__slots__`` view that
+behaves like the dicts ``csv.DictReader`` used to produce.
+"""
+
+import sys
+from array import array
+from itertools import chain
+
+from campaign_metrics import ColumnarAggregator, NUMERIC_COLUMNS
+from columnar_store import DICTIONARY_COLUMNS, DictionaryColumnAggregator
+from export_schema import REGISTRY, TEXT
+
+# Per-campaign rates and ratios kept alongside the additive counts
+TABLE_METRIC_COLUMNS = [
+    'Unique Open Rate',
+    'Unique Click %',
+    'CTOR',
+    'Click %',
+    'Bounce Rate',
+    'Unsubscribe Rate',
+    'Revenue per Delivered',
+    'Orders per Unique Click',
+]
+TABLE_DATE_COLUMNS = ['Campaign Start Date']
+TABLE_NUMERIC_COLUMNS = NUMERIC_COLUMNS + TABLE_METRIC_COLUMNS + TABLE_DATE_COLUMNS
+TABLE_TEXT_COLUMNS = DICTIONARY_COLUMNS
+
+
+class CampaignRow:
+    """A lightweight, dict-like view of one row of a CampaignTable."""
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, name):
+        return self._table.value(name, self._index)
+
+    def get(self, name, default=None):
+        try:
+            return self._table.value(name, self._index)
+        except KeyError:
+            return default
+
+    def __contains__(self, name):
+        return name in self._table.numeric or name in self._table.text
+
+    def keys(self):
+        return self._table.columns
+
+    def items(self):
+        return [(name, self[name]) for name in self._table.columns]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class CampaignTable:
+    """
+    Parsed campaigns stored column by column.
+
+    Args:
+        numeric: Mapping of column name to a float sequence (``array('d')``
+            or a memoryview from a ColumnarStore).
+        text: Mapping of column name to (codes, values), where values[code]
+            is the string for a row.
+        weight: Number of campaigns each row stands for; above 1 when the
+            table is a preview sample of a larger export.
+    """
+
+    def __init__(self, numeric=None, text=None, weight=1.0):
+        self.numeric = numeric or {}
+        self.text = text or {}
+        self.weight = weight
+        lengths = [len(values) for values in self.numeric.values()]
+        lengths += [len(codes) for codes, _ in self.text.values()]
+        self.row_count = max(lengths, default=0)
+
+    @classmethod
+    def from_aggregators(cls, columnar, dictionaries):
+        """Builds a table from finished Columnar and DictionaryColumn aggregators."""
+        return cls(dict(columnar.result()), dictionaries.result())
+
+    @classmethod
+    def from_store(cls, store):
+        """Builds a zero-copy table over a memory-mapped ColumnarStore."""
+        numeric = {name: store.numeric(name) for name in store.numeric_column_names}
+        text = {name: (store.codes(name), store.dictionary(name)) for name in store.dictionary_column_names}
+        return cls(numeric, text)
+
+    @classmethod
+    def from_rows(cls, rows, headers=None, registry=REGISTRY):
+        """
+        Builds a table holding every column of the given row dicts.
+
+        Text columns are dictionary-encoded; all others are converted to
+        floats with the schema registry's converters.
+        """
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return cls()
+        headers = list(headers or first.keys())
+        text_columns = [name for name in headers if registry.column_type(name) == TEXT]
+        numeric = ColumnarAggregator(
+            columns=[name for name in headers if name not in text_columns], registry=registry
+        )
+        dictionaries = DictionaryColumnAggregator(columns=text_columns)
+        for row in chain([first], rows):
+            numeric.update(row)
+            dictionaries.update(row)
+        return cls.from_aggregators(numeric, dictionaries)
+
+    @property
+    def columns(self):
+        return list(self.text) + list(self.numeric)
+
+    def value(self, name, index):
+        """Returns one cell; raises KeyError for unknown columns."""
+        if name in self.numeric:
+            return self.numeric[name][index]
+        codes, values = self.text[name]
+        return values[codes[index]]
+
+    def column(self, name):
+        """Returns a numeric column as a float sequence or a text column as a list."""
+        if name in self.numeric:
+            return self.numeric[name]
+        codes, values = self.text[name]
+        return [values[code] for code in codes]
+
+    @property
+    def nbytes(self):
+        """
+        Approximate bytes the table holds in process memory.
+
+        Memory-mapped columns of a store-backed table live in the page cache
+        and count as none.
+        """
+        total = 0
+        for values in self.numeric.values():
+            if isinstance(values, array):
+                total += len(values) * values.itemsize
+        for codes, values in self.text.values():
+            if isinstance(codes, array):
+                total += len(codes) * codes.itemsize
+            if isinstance(values, list):
+                total += sum(sys.getsizeof(value) for value in values)
+        return total
+
+    def row(self, index):
+        if not -self.row_count <= index < self.row_count:
+            raise IndexError(index)
+        return CampaignRow(self, index % self.row_count)
+
+    def __len__(self):
+        return self.row_count
+
+    def __iter__(self):
+        for index in range(self.row_count):
+            yield CampaignRow(self, index)
+
+    def __getitem__(self, index):
+        return self.row(index)
+
+    def __getstate__(self):
+        # Copy memoryview-backed columns so tables from a store can be pickled
+        return {
+            "numeric": {name: _as_array('d', values) for name, values in self.numeric.items()},
+            "text": {name: (_as_array('I', codes), list(values)) for name, (codes, values) in self.text.items()},
+            "weight": self.weight,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state["numeric"], state["text"], state.get("weight", 1.0))
+
+
+def _as_array(typecode, values):
+    return values if isinstance(values, array) else array(typecode, values)
@@ -0,0 +1,231 @@
+"""
+Columnar Store Module
+
+This module persists parsed campaign exports in a binary columnar format so
+later stages can re-read them without tokenizing the CSV again. Numeric
+columns are stored as fixed-width float64 arrays and text columns as uint32
+codes into a string dictionary. Stores are opened with mmap and columns are
+returned as zero-copy memoryviews, so the pages are shared by every process
+that opens the same file.
+
+File layout (native byte order, every section 8-byte aligned):
+    magic (8 bytes) | header length (uint64) | JSON header | column sections
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from result_cache import DiskCache, cache_directory
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"QBRCOL01"
+STORE_SUFFIX = ".qbrc"
+
+# Text columns kept in the store, dictionary-encoded
+DICTIONARY_COLUMNS = [
+    'Campaign',
+    'Campaign UUID',
+    'Campaign Type',
+    'Campaign Segment',
+    'Campaign Segment UUID',
+]
+
+STORE_DIR = cache_directory("columnar")
+STORE_MAX_BYTES = int(os.getenv("QBR_COLUMNAR_STORE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+_PREFIX = struct.Struct("=8sQ")
+
+
+class DictionaryColumnAggregator:
+    """Dictionary-encodes text columns into uint32 codes while streaming."""
+
+    def __init__(self, columns=None):
+        self.columns = list(columns or DICTIONARY_COLUMNS)
+        self.codes = {name: array('I') for name in self.columns}
+        self.dictionaries = {name: {} for name in self.columns}
+
+    def update(self, row):
+        for name in self.columns:
+            value = row.get(name) or ""
+            dictionary = self.dictionaries[name]
+            code = dictionary.get(value)
+            if code is None:
+                code = dictionary[value] = len(dictionary)
+            self.codes[name].append(code)
+
+    def result(self):
+        """Returns {name: (codes, values)} with values ordered by code."""
+        return {name: (self.codes[name], list(self.dictionaries[name])) for name in self.columns}
+
+
+def store_path(digest):
+    """Returns where the store for an upload's content hash lives."""
+    return os.path.join(STORE_DIR, f"{digest}{STORE_SUFFIX}")
+
+
+def _padding(offset):
+    return -offset % 8
+
+
+def write_store(path, numeric_columns, dictionary_columns):
+    """
+    Writes a columnar store atomically.
+
+    Args:
+        path: Destination file path.
+        numeric_columns: Mapping of column name to ``array('d')``.
+        dictionary_columns: Mapping of column name to (codes, values), where
+            codes is an ``array('I')`` and values the dictionary strings.
+    """
+    sections = []
+    columns = []
+    offset = 0
+
+    def add_section(data):
+        nonlocal offset
+        sections.append(data)
+        start = offset
+        offset += len(data) + _padding(len(data))
+        return [start, len(data)]
+
+    row_count = 0
+    for name, values in numeric_columns.items():
+        row_count = max(row_count, len(values))
+        columns.append({"name": name, "kind": "float64", "data": add_section(array('d', values).tobytes())})
+    for name, (codes, values) in dictionary_columns.items():
+        row_count = max(row_count, len(codes))
+        encoded = [value.encode('utf-8') for value in values]
+        string_offsets = array('Q', [0])
+        for value in encoded:
+            string_offsets.append(string_offsets[-1] + len(value))
+        columns.append({
+            "name": name,
+            "kind": "dictionary",
+            "data": add_section(array('I', codes).tobytes()),
+            "offsets": add_section(string_offsets.tobytes()),
+            "strings": add_section(b"".join(encoded)),
+        })
+
+    header = json.dumps({"byteorder": sys.byteorder, "row_count": row_count, "columns": columns}).encode('utf-8')
+    header += b" " * _padding(_PREFIX.size + len(header))
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(_PREFIX.pack(MAGIC, len(header)))
+            f.write(header)
+            for data in sections:
+                f.write(data)
+                f.write(b"\0" * _padding(len(data)))
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def evict_stores():
+    """Removes least recently used stores past QBR_COLUMNAR_STORE_MAX_BYTES."""
+    DiskCache(STORE_DIR, STORE_MAX_BYTES, suffix=STORE_SUFFIX).evict()
+
+
+class StringDictionary:
+    """Lazily decoded view over a store's string dictionary."""
+
+    def __init__(self, offsets, strings):
+        self._offsets = offsets
+        self._strings = strings
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, code):
+        return str(self._strings[self._offsets[code]:self._offsets[code + 1]], 'utf-8')
+
+
+class ColumnarStore:
+    """A memory-mapped, read-only columnar store."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, header_length = _PREFIX.unpack_from(self._view)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a columnar store")
+        header = json.loads(bytes(self._view[_PREFIX.size:_PREFIX.size + header_length]))
+        if header["byteorder"] != sys.byteorder:
+            self.close()
+            raise ValueError(f"{path} was written with {header['byteorder']}-endian byte order")
+        self._data_start = _PREFIX.size + header_length
+        self.row_count = header["row_count"]
+        self.columns = {column["name"]: column for column in header["columns"]}
+
+    def _section(self, location):
+        start, length = location
+        start += self._data_start
+        return self._view[start:start + length]
+
+    @property
+    def numeric_column_names(self):
+        return [name for name, column in self.columns.items() if column["kind"] == "float64"]
+
+    @property
+    def dictionary_column_names(self):
+        return [name for name, column in self.columns.items() if column["kind"] == "dictionary"]
+
+    def numeric(self, name):
+        """Returns a numeric column as a zero-copy float64 memoryview."""
+        return self._section(self.columns[name]["data"]).cast('d')
+
+    def codes(self, name):
+        """Returns a text column's dictionary codes as a zero-copy uint32 memoryview."""
+        return self._section(self.columns[name]["data"]).cast('I')
+
+    def dictionary(self, name):
+        """Returns a text column's string dictionary, decoded on access."""
+        column = self.columns[name]
+        return StringDictionary(self._section(column["offsets"]).cast('Q'), self._section(column["strings"]))
+
+    def strings(self, name):
+        """Yields a text column's values row by row."""
+        dictionary = self.dictionary(name)
+        decoded = {}
+        for code in self.codes(name):
+            value = decoded.get(code)
+            if value is None:
+                value = decoded[code] = dictionary[code]
+            yield value
+
+    def close(self):
+        """Releases the mapping; memoryviews handed out must be released first."""
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_store(digest):
+    """Opens the store for an upload's content hash, or returns None."""
+    path = store_path(digest)
+    if not os.path.exists(path):
+        return None
+    os.utime(path)
+    return ColumnarStore(path)
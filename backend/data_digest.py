@@ -0,0 +1,197 @@
+"""
+Data Digest Module
+
+This module condenses parsed exports into a dense, size-budgeted text digest
+for the LLM prompt: totals, weighted rates, anomaly findings, metric
+percentiles, breakdowns by campaign type and quarter, the best and worst
+campaigns, and whatever document text still fits. Sections are added in priority order until the character budget is spent.
+"""
+
+import math
+import os
+
+from anomalies import detect_anomalies, format_findings
+from export_schema import RATE, REGISTRY
+from group_by import group_by
+
+# Digest budget in characters (roughly four characters per token)
+DIGEST_MAX_CHARS = int(os.getenv("QBR_DIGEST_MAX_CHARS", "6000"))
+# Campaigns listed in each top/bottom ranking
+DIGEST_TOP_N = int(os.getenv("QBR_DIGEST_TOP_N", "5"))
+
+TOTAL_COLUMNS = ['Sends', 'Delivered', 'Unique Impressions', 'Unique Clicks', 'Revenue', 'Purchases', 'Unsubscribes']
+
+RATE_LABELS = {
+    'delivery_rate': 'Delivery',
+    'open_rate': 'Open',
+    'unique_click_rate': 'Click',
+    'click_to_open_rate': 'CTOR',
+    'conversion_rate': 'Conversion',
+    'bounce_rate': 'Bounce',
+    'unsubscribe_rate': 'Unsubscribe',
+}
+
+
+def _money(value):
+    return f"${value:,.2f}"
+
+
+def _count(value):
+    return f"{value:,.0f}"
+
+
+def _percent(value):
+    return f"{value:.2%}"
+
+
+def _decimal(value):
+    return f"{value:,.2f}"
+
+
+def _has_deliveries(row):
+    return row.get('Delivered', 0.0) > 0
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else 0
+
+
+def headline_section(total_revenue, total_purchases, average_order_value):
+    lines = [
+        "HEADLINE",
+        f"Revenue {_money(total_revenue)} | Purchases {_count(total_purchases)} | AOV {_money(average_order_value)}",
+    ]
+    if getattr(total_revenue, "standard_error", 0):
+        # Preview estimates carry their confidence intervals
+        lines.append(f"Preview estimate from a sample; revenue 95% CI {_money(total_revenue.low)} to "
+                     f"{_money(total_revenue.high)}, purchases {_count(total_purchases.low)} to "
+                     f"{_count(total_purchases.high)}")
+    return lines
+
+
+def totals_section(summary):
+    totals = summary["totals"]
+    lines = ["TOTALS", f"Campaigns {summary['row_count']:,}"]
+    parts = [f"{name} {_money(totals[name]) if name == 'Revenue' else _count(totals[name])}"
+             for name in TOTAL_COLUMNS if name in totals]
+    lines.append(" | ".join(parts))
+    return lines
+
+
+def rates_section(summary):
+    kpis = summary["kpis"]
+    parts = [f"{label} {kpis[name]:.2%}" for name, label in RATE_LABELS.items() if name in kpis]
+    if 'revenue_per_delivered' in kpis:
+        parts.append(f"Rev/Delivered {_money(kpis['revenue_per_delivered'])}")
+    return ["WEIGHTED RATES (from summed counts)", " | ".join(parts)]
+
+
+def distributions_section(summary):
+    lines = ["PER-CAMPAIGN DISTRIBUTIONS (campaigns with deliveries)"]
+    for name, distribution in summary.get("distributions", {}).items():
+        if not distribution["count"]:
+            continue
+        if REGISTRY.column_type(name) == RATE:
+            formatter = _percent
+        elif name.startswith('Revenue'):
+            formatter = _money
+        else:
+            formatter = _decimal
+        percentiles = [f"{key} {formatter(value)}" for key, value in distribution.items() if key != "count"]
+        lines.append(f"{name}: " + " | ".join(percentiles))
+    for name, estimate in summary.get("distinct", {}).items():
+        lines.append(f"Distinct {name}: ~{estimate:,}")
+    return lines
+
+
+def breakdown_section(title, grouped, total_revenue, limit=None):
+    lines = [f"{title} (campaigns | sends | delivered | click | revenue | share)"]
+    for row in grouped.rows()[:limit]:
+        revenue = row.get('Revenue', 0.0)
+        lines.append(
+            f"{row['label']}: {row['row_count']:,} | {_count(row.get('Sends', 0.0))} | {_count(row.get('Delivered', 0.0))} | "
+            f"{row.get('unique_click_rate', 0.0):.2%} | {_money(revenue)} | {_ratio(revenue, total_revenue):.1%}"
+        )
+    return lines
+
+
+def _campaign_line(row, column, formatter):
+    line = (f"- {row.get('Campaign', '')} [{row.get('Campaign Type', '')}]: {column} {formatter(row.get(column, 0.0))}, "
+            f"Delivered {_count(row.get('Delivered', 0.0))}")
+    if column != 'Revenue':
+        line += f", Revenue {_money(row.get('Revenue', 0.0))}"
+    return line
+
+
+def ranking_section(title, rows, column, formatter):
+    return [title] + [_campaign_line(row, column, formatter) for row in rows]
+
+
+def build_data_digest(total_revenue, total_purchases, average_order_value, summary=None, campaign_index=None,
+                      document_text="", max_chars=DIGEST_MAX_CHARS, top_n=DIGEST_TOP_N, dataset=None):
+    """
+    Builds the prompt's data digest within a character budget.
+
+    Args:
+        total_revenue: Headline revenue.
+        total_purchases: Headline purchase count.
+        average_order_value: Headline AOV.
+        summary: MetricAggregate.summary() of the merged exports, if any.
+        campaign_index: CampaignIndex over the parsed exports, if any.
+        document_text: Free text (e.g. from PDFs) to include as space allows.
+        max_chars: Character budget for the whole digest.
+        top_n: Campaigns per ranking.
+        dataset: Optional dataset key, to reuse cached groupings and findings.
+
+    Returns:
+        The digest text.
+    """
+    sections = [headline_section(total_revenue, total_purchases, average_order_value)]
+    if summary:
+        sections.append(totals_section(summary))
+        sections.append(rates_section(summary))
+        sections.append(distributions_section(summary))
+    if campaign_index:
+        findings = detect_anomalies(campaign_index.tables, dataset=dataset)
+        # Findings back the "Challenges & Opportunities" slide, so they rank right after the rates
+        sections.insert(3 if summary else 1, ["FINDINGS (challenges & opportunities signals)"] + format_findings(findings))
+        by_type = group_by(campaign_index.tables, 'Campaign Type', dataset=dataset).sorted_by('Revenue')
+        total_revenue_in_tables = math.fsum(by_type.sums.get('Revenue', []))
+        sections.append(breakdown_section("BY CAMPAIGN TYPE", by_type, total_revenue_in_tables))
+        sections.append(breakdown_section(
+            "BY QUARTER", group_by(campaign_index.tables, 'Campaign Start Date', period='quarter', dataset=dataset),
+            total_revenue_in_tables))
+        # Breakdowns are scaled up from preview samples; rankings can only list the sampled campaigns
+        sampled = " among sampled campaigns" if any(table.weight != 1 for table in campaign_index.tables) else ""
+        sections.append(ranking_section(
+            f"TOP {top_n} BY REVENUE{sampled}", campaign_index.top('Revenue', top_n), 'Revenue', _money))
+        sections.append(ranking_section(
+            f"TOP {top_n} BY UNIQUE CLICK RATE{sampled}",
+            campaign_index.top('Unique Click %', top_n, predicate=_has_deliveries), 'Unique Click %', _percent))
+        sections.append(ranking_section(
+            f"BOTTOM {top_n} BY UNIQUE CLICK RATE (delivered > 0){sampled}",
+            campaign_index.bottom('Unique Click %', top_n, predicate=_has_deliveries), 'Unique Click %', _percent))
+
+    lines = []
+    remaining = max_chars
+    for section in sections:
+        # A heading is only worth its space with at least one line under it
+        if len(section) < 2:
+            continue
+        if sum(len(line) + 1 for line in section[:2]) > remaining:
+            break
+        for line in section:
+            if len(line) + 1 > remaining:
+                break
+            lines.append(line)
+            remaining -= len(line) + 1
+        else:
+            continue
+        # Later sections never displace the unfinished one
+        break
+    document_text = " ".join(document_text.split())
+    if document_text and remaining > len("DOCUMENT EXCERPT") + 100:
+        remaining -= len("DOCUMENT EXCERPT") + 1
+        lines.append("DOCUMENT EXCERPT")
+        lines.append(document_text[:remaining - 1])
+    return "\n".join(lines)
@@ -0,0 +1,177 @@
+"""
+Derived Metrics Module
+
+This module defines the campaign KPIs declaratively, as ratios over base
+count columns, and evaluates them from summed counts. Per-campaign rate
+columns such as "Click %" or "CTOR" cannot be averaged across campaigns;
+the KPIs are recomputed from the summed numerators and denominators
+instead, so the same definitions hold for a single campaign, a group of
+campaigns or a whole export.
+
+Evaluations at a grouping level are cached per dataset, so the prompt and
+export stages share one computation.
+"""
+
+import hashlib
+import os
+
+from result_cache import LRUCache
+
+# Display units of a derived metric
+PERCENT = "percent"
+CURRENCY = "currency"
+RATIO = "ratio"
+
+# Cached grouping-level evaluations across datasets
+METRICS_CACHE_ENTRIES = int(os.getenv("QBR_METRICS_CACHE_ENTRIES", "64"))
+
+
+def _parse_side(expression):
+    expression = expression.strip()
+    if expression.startswith('(') and expression.endswith(')'):
+        expression = expression[1:-1]
+    return tuple(term.strip() for term in expression.split(' + '))
+
+
+class DerivedMetric:
+    """
+    A KPI defined as ``numerator / denominator`` over summed base columns.
+
+    Args:
+        name: Key of the KPI in summaries, e.g. 'click_to_open_rate'.
+        expression: Ratio of base columns; either side may be a
+            parenthesized sum, e.g. '(Bounces + Soft Bounces) / Sends'.
+        unit: PERCENT, CURRENCY or RATIO, for display.
+        export_column: The per-campaign export column this KPI reproduces,
+            if any.
+    """
+
+    def __init__(self, name, expression, unit=PERCENT, export_column=None):
+        self.name = name
+        self.expression = expression
+        self.unit = unit
+        self.export_column = export_column
+        numerator, separator, denominator = expression.partition(' / ')
+        if not separator:
+            raise ValueError(f"Derived metric {name} must be a ratio: {expression!r}")
+        self.numerator = _parse_side(numerator)
+        self.denominator = _parse_side(denominator)
+
+    @property
+    def columns(self):
+        return list(dict.fromkeys(self.numerator + self.denominator))
+
+    def __repr__(self):
+        return f"DerivedMetric({self.name!r}, {self.expression!r})"
+
+
+# KPI definitions; names are the keys of MetricAggregate.summary()["kpis"]. Denominators
+# follow the export's own columns, e.g. "Click %" is per send but "Unique Click %" per delivery.
+KPI_DEFINITIONS = [
+    DerivedMetric('delivery_rate', 'Delivered / Sends', PERCENT, 'Delivered %'),
+    DerivedMetric('bounce_rate', 'Bounces / Sends', PERCENT, 'Bounce Rate'),
+    DerivedMetric('open_rate', 'Unique Impressions / Delivered', PERCENT, 'Unique Open Rate'),
+    DerivedMetric('impressions_per_send', 'Impressions / Sends', PERCENT, 'Opens/Sends'),
+    DerivedMetric('click_rate', 'Clicks / Sends', PERCENT, 'Click %'),
+    DerivedMetric('unique_click_rate', 'Unique Clicks / Delivered', PERCENT, 'Unique Click %'),
+    DerivedMetric('click_to_open_rate', 'Unique Clicks / Unique Impressions', PERCENT, 'CTOR'),
+    DerivedMetric('clicks_per_unique_impression', 'Clicks / Unique Impressions', RATIO, 'Clicks per Unique Impression'),
+    DerivedMetric('conversion_rate', 'Purchases / Unique Clicks', PERCENT),
+    # The export states this one in percentage points despite its name
+    DerivedMetric('orders_per_unique_click', 'Orders / Unique Clicks', PERCENT, 'Orders per Unique Click'),
+    DerivedMetric('unsubscribe_rate', 'Unsubscribes / Delivered', PERCENT, 'Unsubscribe Rate'),
+    DerivedMetric('spam_rate', 'Spam Reports / Sends', PERCENT, 'Spam Report %'),
+    DerivedMetric('average_order_value', 'Revenue / Purchases', CURRENCY, 'Revenue per Purchase'),
+    DerivedMetric('revenue_per_send', 'Revenue / Sends', CURRENCY),
+    DerivedMetric('revenue_per_delivered', 'Revenue / Delivered', CURRENCY, 'Revenue per Delivered'),
+    DerivedMetric('revenue_per_unique_click', 'Revenue / Unique Clicks', CURRENCY, 'Revenue per Unique Click'),
+]
+
+
+def _divide(numerator, denominator):
+    return numerator / denominator if denominator else 0
+
+
+class DerivedMetricEngine:
+    """
+    Evaluates a set of DerivedMetrics from summed base columns.
+
+    Each distinct numerator and denominator is assembled once and shared by
+    every metric that uses it, and per-group inputs are divided with one
+    ``map`` per metric.
+    """
+
+    def __init__(self, definitions=None):
+        self.definitions = list(KPI_DEFINITIONS if definitions is None else definitions)
+        self.by_name = {metric.name: metric for metric in self.definitions}
+
+    @property
+    def base_columns(self):
+        """Returns every base column any definition reads."""
+        return list(dict.fromkeys(column for metric in self.definitions for column in metric.columns))
+
+    def evaluate(self, sums):
+        """
+        Evaluates every metric whose base columns are present.
+
+        Args:
+            sums: Mapping of base column to its sum, either a number (one
+                level, e.g. a whole export) or a list of per-group sums.
+
+        Returns:
+            A dict of metric name to value, or to a list of per-group values.
+        """
+        sides = {}
+
+        def side(columns):
+            if columns not in sides:
+                if len(columns) == 1:
+                    sides[columns] = sums[columns[0]]
+                elif isinstance(sums[columns[0]], (int, float)):
+                    sides[columns] = sum(sums[column] for column in columns)
+                else:
+                    sides[columns] = [sum(values) for values in zip(*(sums[column] for column in columns))]
+            return sides[columns]
+
+        results = {}
+        for metric in self.definitions:
+            if not all(column in sums for column in metric.columns):
+                continue
+            numerator = side(metric.numerator)
+            denominator = side(metric.denominator)
+            if isinstance(numerator, (int, float)):
+                results[metric.name] = _divide(numerator, denominator)
+            else:
+                results[metric.name] = list(map(_divide, numerator, denominator))
+        return results
+
+
+ENGINE = DerivedMetricEngine()
+
+METRICS_CACHE = LRUCache(METRICS_CACHE_ENTRIES)
+
+
+def dataset_key(digests):
+    """Builds a dataset identity from the content hashes of its uploads."""
+    if not digests or not all(digests):
+        return None
+    return hashlib.blake2b("|".join(sorted(digests)).encode(), digest_size=16).hexdigest()
+
+
+def cached(dataset, level, compute):
+    """
+    Returns ``compute()`` for one grouping level of a dataset, memoized.
+
+    Args:
+        dataset: Dataset key from dataset_key(), or None to skip the cache.
+        level: Hashable description of the grouping, e.g. ('Campaign Type', None).
+        compute: Zero-argument callable producing the result.
+    """
+    if dataset is None:
+        return compute()
+    key = (dataset, level)
+    result = METRICS_CACHE.get(key)
+    if result is None:
+        result = compute()
+        METRICS_CACHE.put(key, result)
+    return result
@@ -0,0 +1,217 @@
+"""
+Export Schema Module
+
+This module maps the headers of a Blueshift campaign export to column types
+and compiles one converter per type. Columns are converted in bulk; cells
+that cannot be parsed are zero-filled (NaN for dates) and recorded in a
+per-column mask instead of being logged row by row.
+
+Headers not in the registry are treated as counts, since every
+account-specific column in the export (custom events such as
+``april2025_15off_email``) is an event counter.
+"""
+
+import calendar
+import math
+import re
+from array import array
+from datetime import datetime
+
+COUNT = "count"
+FLOAT = "float"
+RATE = "rate"
+DATE = "date"
+TEXT = "text"
+
+# Known Blueshift export headers and their types
+EXPORT_SCHEMA = {
+    'Date': TEXT,
+    'Campaign': TEXT,
+    'Campaign UUID': TEXT,
+    'Campaign End Date': DATE,
+    'Campaign Link': TEXT,
+    'Campaign Segment': TEXT,
+    'Campaign Segment UUID': TEXT,
+    'Campaign Segment Link': TEXT,
+    'Campaign Start Date': DATE,
+    'Campaign Type': TEXT,
+    'Campaign Updated At': DATE,
+    'Sends': COUNT,
+    'Delivered': COUNT,
+    'Bounces': COUNT,
+    'Soft Bounces': COUNT,
+    'Impressions': COUNT,
+    'Unique Impressions': COUNT,
+    'Revenue per Purchase': FLOAT,
+    'Revenue': FLOAT,
+    'Purchases': COUNT,
+    'Unique Open Rate': RATE,
+    'Clicks': COUNT,
+    'Unique Clicks': COUNT,
+    'Unique Click %': RATE,
+    'CTOR': RATE,
+    'Unsubscribe Rate': RATE,
+    'Unsubscribes': COUNT,
+    'Spam Rate': RATE,
+    'Spam Reports': COUNT,
+    'Add to Cart': COUNT,
+    'Orders': COUNT,
+    'Activations': COUNT,
+    'BCC Sends': COUNT,
+    'Clicks (bot only)': COUNT,
+    'Clicks (user only)': COUNT,
+    'Device Bounces': COUNT,
+    'Device Sends': COUNT,
+    'Dismisses': COUNT,
+    'Drops': COUNT,
+    'Holdouts': COUNT,
+    'Impressions (pre-fetch only)': COUNT,
+    'Impressions (user only)': COUNT,
+    'Journey Actions': COUNT,
+    'Subscribes': COUNT,
+    'Subscription Cancels': COUNT,
+    'Subscription Downgrade': COUNT,
+    'Subscription Starts': COUNT,
+    'Subscription Upgrade': COUNT,
+    'Unique Clicks (bot only)': COUNT,
+    'Unique Clicks (user only)': COUNT,
+    'Unique Impressions (pre-fetch only)': COUNT,
+    'Unique Impressions (user only)': COUNT,
+    'Unique Soft Bounces': COUNT,
+    'Visits': COUNT,
+    'Bounce Rate': RATE,
+    'Click %': RATE,
+    'Clicks per Unique Impression': FLOAT,
+    'Delivered %': RATE,
+    'Opens/Sends': RATE,
+    'Orders per Unique Click': FLOAT,
+    'Revenue %': RATE,
+    'Revenue per Delivered': FLOAT,
+    'Revenue per Impression': FLOAT,
+    'Revenue per Order': FLOAT,
+    'Revenue per Unique Click': FLOAT,
+    'Spam Report %': RATE,
+    'Unique Clicks per Send': FLOAT,
+    'Unique Impressions (user only) %': RATE,
+    'Unique Soft Bounce %': RATE,
+}
+
+# Cell values that mean "no value" rather than a parse error
+NULL_TOKENS = frozenset(['', 'none', 'null', 'n/a', 'nan'])
+
+_US_DATE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{2}|\d{4})(?:\s+(\d{1,2}):(\d{2})(?::(\d{2}))?)?$')
+
+
+def normalize_header(header):
+    """Strips a UTF-8 BOM and surrounding whitespace from a header."""
+    return header.lstrip('\ufeff').strip()
+
+
+def _finite(number):
+    # float() accepts "inf" and "nan", which would poison every sum they reach
+    if not math.isfinite(number):
+        raise ValueError(f"{number} is not a finite number")
+    return number
+
+
+def _parse_count(value):
+    return _finite(float(value.replace(',', '')))
+
+
+def _parse_rate(value):
+    # Rates are exported in percentage points, e.g. "29.62" or "29.62%"
+    return _finite(float(value.rstrip('%'))) / 100
+
+
+def _parse_date(value):
+    # Dates are exported as "6/10/24 4:00"; returned as UTC epoch seconds
+    match = _US_DATE.match(value)
+    if match:
+        month, day, year, hour, minute, second = match.groups()
+        year = int(year)
+        if year < 100:
+            year += 2000
+        return float(calendar.timegm((year, int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))))
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        return float(calendar.timegm(parsed.timetuple()))
+    return parsed.timestamp()
+
+
+class ColumnConverter:
+    """A compiled converter for one column type."""
+
+    def __init__(self, column_type, parse, fast_parse, missing):
+        self.column_type = column_type
+        self.parse = parse
+        self.fast_parse = fast_parse
+        self.missing = missing
+
+    def convert(self, values):
+        """
+        Converts a list of raw cells in bulk.
+
+        Returns:
+            A tuple of (``array('d')``, mask) where mask is a bytearray with 1
+            for each cell that could not be parsed.
+        """
+        if self.fast_parse is not None:
+            try:
+                converted = array('d', map(self.fast_parse, values))
+            except (TypeError, ValueError):
+                converted = None
+            # Any NaN or infinity makes the sum non-finite; the slow path then nulls or flags it
+            if converted is not None and math.isfinite(sum(converted)):
+                return converted, bytearray(len(values))
+        converted = array('d')
+        mask = bytearray(len(values))
+        parse = self.parse
+        missing = self.missing
+        for index, value in enumerate(values):
+            if value is None or value.strip().lower() in NULL_TOKENS:
+                converted.append(missing)
+                continue
+            try:
+                converted.append(parse(value.strip()))
+            except (TypeError, ValueError, OverflowError):
+                converted.append(missing)
+                mask[index] = 1
+        return converted, mask
+
+
+# Converters are compiled once per type and shared by every column of that type
+CONVERTERS = {
+    COUNT: ColumnConverter(COUNT, _parse_count, float, 0.0),
+    FLOAT: ColumnConverter(FLOAT, _parse_count, float, 0.0),
+    RATE: ColumnConverter(RATE, _parse_rate, None, 0.0),
+    DATE: ColumnConverter(DATE, _parse_date, None, math.nan),
+}
+
+
+class SchemaRegistry:
+    """Resolves export headers to their type and compiled converter."""
+
+    def __init__(self, schema=None, default_type=COUNT):
+        self.schema = {normalize_header(name): column_type for name, column_type in (schema or EXPORT_SCHEMA).items()}
+        self.default_type = default_type
+
+    def column_type(self, header):
+        return self.schema.get(normalize_header(header), self.default_type)
+
+    def converter(self, header):
+        """Returns the compiled converter for a header, or None for text columns."""
+        return CONVERTERS.get(self.column_type(header))
+
+    def numeric_columns(self, headers):
+        """Returns the headers that convert to numbers (counts, floats and rates)."""
+        return [header for header in headers if self.column_type(header) in (COUNT, FLOAT, RATE)]
+
+    def convert(self, header, values):
+        """Converts a column's raw cells; see ColumnConverter.convert."""
+        converter = self.converter(header)
+        if converter is None:
+            raise ValueError(f"{header} is a text column")
+        return converter.convert(values)
+
+
+REGISTRY = SchemaRegistry()
@@ -0,0 +1,281 @@
+"""
+Group By Module
+
+This module breaks parsed campaigns down by Campaign Type, Campaign Segment
+or the month/quarter of Campaign Start Date. Rows are ordered by group once
+with a sort over integer group codes, every column is gathered into that
+order with a single C-level ``itemgetter`` call, and each group is then
+reduced from a contiguous slice.
+"""
+
+import math
+import time
+from bisect import bisect_right
+from itertools import repeat
+from operator import itemgetter
+
+from campaign_metrics import NUMERIC_COLUMNS
+from derived_metrics import ENGINE, cached
+
+# Calendar buckets for date columns
+PERIODS = ('month', 'quarter')
+# Label for rows whose date is missing
+UNKNOWN_PERIOD = 'Unknown'
+# Groups listed in the segment breakdown table
+BREAKDOWN_LIMIT = 10
+
+
+def _period_label(epoch_seconds, period):
+    moment = time.gmtime(epoch_seconds)
+    if period == 'month':
+        return f"{moment.tm_year}-{moment.tm_mon:02d}"
+    return f"{moment.tm_year}-Q{(moment.tm_mon - 1) // 3 + 1}"
+
+
+def group_codes(table, by, period=None):
+    """
+    Maps every row of a table to an integer group code.
+
+    Args:
+        table: A CampaignTable.
+        by: A dictionary-encoded text column, or a date column when
+            ``period`` is given.
+        period: 'month' or 'quarter' to bucket a date column.
+
+    Returns:
+        A tuple of (codes, labels) where labels[code] names the group.
+    """
+    if period is None:
+        return table.text[by]
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}; expected one of {PERIODS}")
+    dates = table.numeric[by]
+    labels = []
+    label_codes = {}
+    code_by_date = {}
+    # Distinct start dates are few, so each is converted once
+    for epoch_seconds in set(dates):
+        if math.isnan(epoch_seconds):
+            continue
+        label = _period_label(epoch_seconds, period)
+        if label not in label_codes:
+            label_codes[label] = len(labels)
+            labels.append(label)
+        code_by_date[epoch_seconds] = label_codes[label]
+    unknown = len(labels)
+    codes = list(map(code_by_date.get, dates, repeat(unknown)))
+    if unknown in codes:
+        labels.append(UNKNOWN_PERIOD)
+    return codes, labels
+
+
+class GroupedMetrics:
+    """
+    Per-group row counts, column sums and derived KPIs.
+
+    KPIs are recomputed from the per-group sums by the derived-metric
+    engine on first use, never averaged from per-campaign rates.
+
+    Args:
+        labels: Group labels, in output order.
+        row_counts: Rows per group.
+        sums: Mapping of column name to per-group sums.
+    """
+
+    def __init__(self, labels=None, row_counts=None, sums=None):
+        self.labels = list(labels or [])
+        self.row_counts = list(row_counts or [])
+        self.sums = sums or {}
+        self._kpis = None
+
+    def __len__(self):
+        return len(self.labels)
+
+    def merge(self, other):
+        """Returns groups combining this result with ``other``, matched by label."""
+        positions = {label: index for index, label in enumerate(self.labels)}
+        labels = list(self.labels)
+        row_counts = list(self.row_counts)
+        columns = list(dict.fromkeys(list(self.sums) + list(other.sums)))
+        sums = {name: list(self.sums.get(name, [0.0] * len(labels))) for name in columns}
+        for index, label in enumerate(other.labels):
+            position = positions.get(label)
+            if position is None:
+                position = positions[label] = len(labels)
+                labels.append(label)
+                row_counts.append(0)
+                for values in sums.values():
+                    values.append(0.0)
+            row_counts[position] += other.row_counts[index]
+            for name in other.sums:
+                sums[name][position] += other.sums[name][index]
+        return GroupedMetrics(labels, row_counts, sums)
+
+    __add__ = merge
+
+    @property
+    def kpis(self):
+        """Mapping of KPI name to per-group values."""
+        if self._kpis is None:
+            self._kpis = ENGINE.evaluate(self.sums)
+        return self._kpis
+
+    def rows(self):
+        """Returns one dict per group with "label", "row_count", the column sums and the KPIs."""
+        columns = dict(self.sums, **self.kpis)
+        return [
+            dict({"label": label, "row_count": self.row_counts[index]},
+                 **{name: values[index] for name, values in columns.items()})
+            for index, label in enumerate(self.labels)
+        ]
+
+    def sorted_by(self, column, reverse=True):
+        """Returns the groups reordered by a summed column or KPI (or "label" / "row_count")."""
+        if column == "label":
+            keys = self.labels
+        elif column == "row_count":
+            keys = self.row_counts
+        elif column in self.sums:
+            keys = self.sums[column]
+        else:
+            keys = self.kpis[column]
+        order = sorted(range(len(self.labels)), key=keys.__getitem__, reverse=reverse)
+        return GroupedMetrics(
+            [self.labels[index] for index in order],
+            [self.row_counts[index] for index in order],
+            {name: [values[index] for index in order] for name, values in self.sums.items()},
+        )
+
+    def to_table(self, title, columns, key_header="Group", limit=None):
+        """
+        Renders the groups as a slide table for the PDF and PPTX generators.
+
+        Args:
+            title: Table title.
+            columns: List of (header, value) pairs where value is a callable
+                taking a row dict from ``rows()`` and returning the cell text.
+            key_header: Header of the group label column.
+            limit: Optional maximum number of groups.
+
+        Returns:
+            A dict with "title", "headers" and "data".
+        """
+        rows = self.rows()[:limit]
+        return {
+            "title": title,
+            "headers": [key_header] + [header for header, _ in columns],
+            "data": [[row["label"]] + [value(row) for _, value in columns] for row in rows],
+        }
+
+
+def group_table(table, by, columns=None, period=None):
+    """
+    Groups one CampaignTable and sums its numeric columns per group.
+
+    Sums and row counts are multiplied by the table's weight, so a preview
+    sample's groups estimate those of the full export.
+
+    Args:
+        table: A CampaignTable.
+        by: Column to group by; see group_codes.
+        columns: Numeric columns to sum; defaults to the additive counts.
+        period: 'month' or 'quarter' to bucket a date column.
+
+    Returns:
+        A GroupedMetrics in order of first appearance of each group code.
+    """
+    columns = [name for name in (NUMERIC_COLUMNS if columns is None else columns) if name in table.numeric]
+    if not len(table) or (by not in table.text and by not in table.numeric):
+        return GroupedMetrics(sums={name: [] for name in columns})
+    codes, labels = group_codes(table, by, period)
+    # One sort over the codes gives the row order shared by every column
+    order = sorted(range(len(codes)), key=codes.__getitem__)
+    gather = itemgetter(*order) if len(order) > 1 else (lambda values: (values[order[0]],))
+    sorted_codes = gather(codes)
+    bounds = []
+    start = 0
+    while start < len(sorted_codes):
+        end = bisect_right(sorted_codes, sorted_codes[start], start)
+        bounds.append((sorted_codes[start], start, end))
+        start = end
+    weight = table.weight
+    sums = {}
+    for name in columns:
+        gathered = gather(table.numeric[name])
+        sums[name] = [math.fsum(gathered[start:end]) * weight for _, start, end in bounds]
+    return GroupedMetrics(
+        [labels[code] for code, _, _ in bounds],
+        [round((end - start) * weight) for _, start, end in bounds],
+        sums,
+    )
+
+
+def group_by(tables, by, columns=None, period=None, dataset=None):
+    """
+    Groups the campaigns of several tables and merges the groups by label.
+
+    With a dataset key the result, including its KPIs once computed, is
+    cached so later stages reuse it.
+
+    Args:
+        tables: CampaignTables, e.g. one per uploaded export.
+        by: 'Campaign Type', 'Campaign Segment', or a date column such as
+            'Campaign Start Date' together with ``period``.
+        columns: Numeric columns to sum; defaults to the additive counts.
+        period: 'month' or 'quarter' to bucket a date column.
+        dataset: Optional dataset key from derived_metrics.dataset_key().
+
+    Returns:
+        A GroupedMetrics; date groups are in calendar order, others in order
+        of first appearance.
+    """
+    def compute():
+        grouped = GroupedMetrics()
+        for table in tables:
+            if table is not None:
+                grouped = grouped + group_table(table, by, columns, period)
+        if period is not None:
+            return grouped.sorted_by("label", reverse=False)
+        return grouped
+
+    level = ("group_by", by, period, None if columns is None else tuple(columns))
+    return cached(dataset, level, compute)
+
+
+def _breakdown_columns(total_revenue):
+    return [
+        ("Campaigns", lambda row: f"{row['row_count']:,}"),
+        ("Sends", lambda row: f"{row.get('Sends', 0):,.0f}"),
+        ("Delivered", lambda row: f"{row.get('Delivered', 0):,.0f}"),
+        ("Open Rate", lambda row: f"{row.get('open_rate', 0):.2%}"),
+        ("Click Rate", lambda row: f"{row.get('unique_click_rate', 0):.2%}"),
+        ("Revenue", lambda row: f"${row.get('Revenue', 0):,.2f}"),
+        ("Revenue Share", lambda row: f"{row.get('Revenue', 0) / total_revenue if total_revenue else 0:.1%}"),
+    ]
+
+
+def breakdown_tables(tables, limit=BREAKDOWN_LIMIT, dataset=None):
+    """
+    Builds the data-driven breakdown tables for the campaign performance slide.
+
+    Args:
+        tables: CampaignTables of the uploaded exports.
+        limit: Maximum number of segments listed.
+        dataset: Optional dataset key, to reuse cached groupings.
+
+    Returns:
+        A list of {"title", "headers", "data"} dicts; empty without campaigns.
+    """
+    by_type = group_by(tables, 'Campaign Type', dataset=dataset)
+    if not len(by_type):
+        return []
+    total_revenue = math.fsum(by_type.sums.get('Revenue', []))
+    columns = _breakdown_columns(total_revenue)
+    breakdowns = [
+        by_type.sorted_by('Revenue').to_table("Performance by Campaign Type", columns, "Campaign Type"),
+        group_by(tables, 'Campaign Start Date', period='quarter', dataset=dataset).to_table(
+            "Performance by Quarter", columns, "Quarter"),
+        group_by(tables, 'Campaign Segment', dataset=dataset).sorted_by('Revenue').to_table(
+            f"Top {limit} Segments by Revenue", columns, "Campaign Segment", limit),
+    ]
+    return [table for table in breakdowns if table["data"]]
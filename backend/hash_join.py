@@ -0,0 +1,304 @@
+"""
+Hash Join Module
+
+This module combines exports that describe the same campaigns from
+different angles, such as a delivery-metrics export and a separate
+revenue/attribution export, by joining their CampaignTables on Campaign UUID
+(or Campaign Segment UUID when configured). The hash table is built over the
+smaller table's key codes and the larger table is streamed through it, so
+each table is read once and rows are matched by integer lookups rather than
+string comparisons.
+
+A key that repeats within a table, as a segment UUID shared by many
+campaigns does, would pair every row of one side with every row of the
+other and copy its counts onto each match. Such a table is first collapsed
+to one row per key by summing its counts.
+"""
+
+import math
+import os
+from array import array
+from bisect import bisect_right
+from operator import itemgetter
+
+from campaign_metrics import MetricAggregate, NUMERIC_COLUMNS
+from campaign_table import TABLE_DATE_COLUMNS, CampaignTable
+from export_schema import COUNT, DATE, REGISTRY
+from sketches import MetricSketches
+
+# Text column the exports are joined on
+JOIN_KEY = os.getenv("QBR_JOIN_KEY", "Campaign UUID")
+
+
+def _fill_value(name):
+    # Missing dates stay unknown rather than becoming the epoch
+    return math.nan if name in TABLE_DATE_COLUMNS else 0.0
+
+
+def has_repeated_keys(table, key):
+    """Returns whether a non-empty value of the key column occurs in more than one row."""
+    codes, values = table.text[key]
+    keyed = [code for code in codes if values[code]]
+    return len(set(keyed)) < len(keyed)
+
+
+def collapse_by_key(table, key, registry=REGISTRY):
+    """
+    Collapses the rows sharing a key value into one row per key.
+
+    Counts are summed and dates take their earliest value. Text columns keep
+    their value where every row of a key agrees on it, as the key's own
+    name and link do, and are left empty otherwise. Per-campaign rates and
+    ratios cannot be summed and are dropped; the KPIs are recomputed from
+    the summed counts downstream. Rows with an empty key are kept as they are.
+
+    Args:
+        table: A CampaignTable.
+        key: Text column to collapse on.
+        registry: Schema registry telling counts from rates.
+
+    Returns:
+        A CampaignTable with one row per distinct non-empty key, followed by
+        the rows with an empty key.
+    """
+    codes, values = table.text[key]
+    # Rows with an empty key get a group of their own
+    groups = []
+    group_by_code = {}
+    for code in codes:
+        if values[code]:
+            group = group_by_code.setdefault(code, len(group_by_code))
+        else:
+            group = -1
+        groups.append(group)
+    keyed = len(group_by_code)
+    loose = 0
+    for index, group in enumerate(groups):
+        if group == -1:
+            groups[index] = keyed + loose
+            loose += 1
+
+    # One sort gives the row order shared by every column, as in group_by
+    order = sorted(range(len(groups)), key=groups.__getitem__)
+    gather = itemgetter(*order) if len(order) > 1 else (lambda column: (column[order[0]],))
+    sorted_groups = gather(groups)
+    bounds = []
+    start = 0
+    while start < len(sorted_groups):
+        end = bisect_right(sorted_groups, sorted_groups[start], start)
+        bounds.append((start, end))
+        start = end
+
+    numeric = {}
+    for name, column in table.numeric.items():
+        column_type = registry.column_type(name)
+        if name in TABLE_DATE_COLUMNS or column_type == DATE:
+            gathered = gather(column)
+            numeric[name] = array('d', (
+                min((value for value in gathered[start:end] if not math.isnan(value)), default=math.nan)
+                for start, end in bounds
+            ))
+        elif name in NUMERIC_COLUMNS or column_type == COUNT:
+            gathered = gather(column)
+            numeric[name] = array('d', (math.fsum(gathered[start:end]) for start, end in bounds))
+    text = {}
+    for name, (column_codes, column_values) in table.text.items():
+        column_values = list(column_values)
+        if "" not in column_values:
+            column_values.append("")
+        empty = column_values.index("")
+        gathered = gather(column_codes)
+        collapsed = array('I')
+        for start, end in bounds:
+            distinct = set(gathered[start:end])
+            collapsed.append(distinct.pop() if len(distinct) == 1 else empty)
+        text[name] = (collapsed, column_values)
+    return CampaignTable(numeric, text)
+
+
+def match_rows(build_codes, build_values, probe_codes, probe_values):
+    """
+    Pairs the rows of two dictionary-encoded key columns with equal values.
+
+    Args:
+        build_codes, build_values: Key column of the table to hash.
+        probe_codes, probe_values: Key column of the table to stream.
+
+    Returns:
+        A tuple of (build_rows, probe_rows), equally long arrays of row
+        indices, one entry per output row: every probe row with each of its
+        matches (or ``len(build_codes)`` when it has none), then every
+        unmatched build row paired with ``len(probe_codes)``. Empty keys
+        never match.
+    """
+    rows_by_code = {}
+    for index, code in enumerate(build_codes):
+        rows_by_code.setdefault(code, []).append(index)
+    code_by_value = {value: code for code, value in enumerate(build_values) if value}
+    # The probe dictionary is translated once; each streamed row is then a list lookup
+    matches_by_code = [rows_by_code.get(code_by_value.get(value)) for value in probe_values]
+
+    build_missing = len(build_codes)
+    build_rows = array('q')
+    probe_rows = array('q')
+    matched = bytearray(len(build_codes))
+    for index, code in enumerate(probe_codes):
+        matches = matches_by_code[code]
+        if matches is None:
+            build_rows.append(build_missing)
+            probe_rows.append(index)
+            continue
+        for match in matches:
+            build_rows.append(match)
+            probe_rows.append(index)
+            matched[match] = 1
+    unmatched = [index for index, seen in enumerate(matched) if not seen]
+    build_rows.extend(unmatched)
+    probe_rows.extend([len(probe_codes)] * len(unmatched))
+    return build_rows, probe_rows
+
+
+def _gather(values, rows, fill):
+    # Row index len(values) marks a missing row
+    padded = list(values)
+    padded.append(fill)
+    return list(map(padded.__getitem__, rows))
+
+
+def _combine(left_values, right_values, left_rows, right_rows, left_missing, fill):
+    if right_values is None:
+        return _gather(left_values, left_rows, fill)
+    if left_values is None:
+        return _gather(right_values, right_rows, fill)
+    combined = _gather(left_values, left_rows, fill)
+    for position in left_missing:
+        combined[position] = right_values[right_rows[position]]
+    return combined
+
+
+def _merge_dictionaries(left_entry, right_entry):
+    # Re-encodes both sides against one dictionary, so equal strings share a code
+    values = list(left_entry[1]) if left_entry else []
+    positions = {value: code for code, value in enumerate(values)}
+
+    def encode(entry):
+        if entry is None:
+            return None
+        codes, entry_values = entry
+        remap = []
+        for value in entry_values:
+            code = positions.get(value)
+            if code is None:
+                code = positions[value] = len(values)
+                values.append(value)
+            remap.append(code)
+        return list(map(remap.__getitem__, codes))
+
+    left_codes = left_entry[0] if left_entry else None
+    right_codes = encode(right_entry)
+    empty = positions.get("")
+    if empty is None:
+        empty = positions[""] = len(values)
+        values.append("")
+    return left_codes, right_codes, values, empty
+
+
+def hash_join(left, right, key=JOIN_KEY):
+    """
+    Full outer join of two CampaignTables on a text key column.
+
+    The smaller table is hashed and the larger one streamed through it.
+    Where both tables have a column, ``left``'s value wins for matched rows;
+    cells of columns a row's source table lacks are zero-filled (dates NaN,
+    text empty). A table whose key repeats is collapsed with
+    collapse_by_key() first, so every key matches at most one row per side.
+
+    Args:
+        left: The table whose values take precedence.
+        right: The table to join onto it.
+        key: Text column to join on.
+
+    Raises:
+        ValueError: If either table lacks the key column.
+
+    Returns:
+        A CampaignTable with every column of both tables and one row per
+        matched pair or unmatched row.
+    """
+    if key not in left.text or key not in right.text:
+        raise ValueError(f"Both tables need the join key {key!r}")
+    if has_repeated_keys(left, key):
+        left = collapse_by_key(left, key)
+    if has_repeated_keys(right, key):
+        right = collapse_by_key(right, key)
+    if len(left) <= len(right):
+        left_rows, right_rows = match_rows(*left.text[key], *right.text[key])
+    else:
+        right_rows, left_rows = match_rows(*right.text[key], *left.text[key])
+    left_missing = [position for position, row in enumerate(left_rows) if row == len(left)]
+
+    numeric = {}
+    for name in dict.fromkeys(list(left.numeric) + list(right.numeric)):
+        numeric[name] = array('d', _combine(
+            left.numeric.get(name), right.numeric.get(name), left_rows, right_rows, left_missing, _fill_value(name)
+        ))
+    text = {}
+    for name in dict.fromkeys(list(left.text) + list(right.text)):
+        left_codes, right_codes, values, empty = _merge_dictionaries(left.text.get(name), right.text.get(name))
+        codes = _combine(left_codes, right_codes, left_rows, right_rows, left_missing, empty)
+        text[name] = (array('I', codes), values)
+    return CampaignTable(numeric, text)
+
+
+def join_tables(tables, key=JOIN_KEY):
+    """
+    Joins the uploaded tables that complement each other on ``key``.
+
+    A table is joined onto the first earlier result that shares the key
+    column and lacks some of its numeric columns, e.g. a revenue export onto
+    a delivery export. A table with no new columns is another slice of the
+    same kind of export and stays separate, to be summed as before.
+
+    Args:
+        tables: CampaignTables in upload order.
+        key: Text column to join on.
+
+    Returns:
+        A list of (table, members) where members are the indices of the
+        input tables combined into that table.
+    """
+    joined = []
+    for index, table in enumerate(tables):
+        for position, (target, members) in enumerate(joined):
+            if key in target.text and key in table.text and set(table.numeric) - set(target.numeric):
+                joined[position] = (hash_join(target, table, key), members + [index])
+                break
+        else:
+            joined.append((table, [index]))
+    return joined
+
+
+def joined_aggregate(table, aggregates):
+    """
+    Builds the MetricAggregate of a joined table.
+
+    Sums come from the joined columns, so a column both exports carry is
+    not counted twice. Sketches are taken from the member aggregates, the
+    first export that has a column supplying its sketch.
+
+    Args:
+        table: The joined CampaignTable.
+        aggregates: MetricAggregates of its members, in upload order.
+    """
+    aggregate = MetricAggregate.from_columns(table.numeric, names=NUMERIC_COLUMNS)
+    quantiles = {}
+    distinct = {}
+    for member in aggregates:
+        if member is not None and member.sketches is not None:
+            for name, sketch in member.sketches.quantiles.items():
+                quantiles.setdefault(name, sketch)
+            for name, counter in member.sketches.distinct.items():
+                distinct.setdefault(name, counter)
+    if quantiles or distinct:
+        aggregate.sketches = MetricSketches(quantiles, distinct)
+    return aggregate
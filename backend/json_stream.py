@@ -0,0 +1,184 @@
+"""
+JSON Stream Module
+
+This module parses a JSON object while it is still streaming in from the
+model, member by member. The scanner jumps between structural characters
+with a compiled regex and tracks nesting depth and string state across
+chunk boundaries, so each top-level member, such as a ``slideN`` object, is
+decoded as soon as its closing brace arrives. Any prose or markdown fence
+ahead of the object is skipped.
+
+For a complete response, extract_json_object() locates and decodes the
+object in one pass with the C decoder, which is string-aware, so braces
+inside slide text do not cut the payload short.
+"""
+
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Characters that change the parser state outside and inside strings
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+_DECODER = json.JSONDecoder()
+
+
+def extract_json_object(text):
+    """
+    Parses the JSON object in a model response.
+
+    The object may be wrapped in a markdown fence or surrounded by prose;
+    decoding starts at the first opening brace and stops at the brace that
+    closes it, ignoring whatever follows. A brace in leading prose that is
+    not followed by a key is skipped in favour of the next one.
+
+    Args:
+        text: The response text.
+
+    Raises:
+        json.JSONDecodeError: If the text holds no JSON object.
+
+    Returns:
+        The decoded object as a dict.
+    """
+    start = text.find('{')
+    while start != -1:
+        try:
+            value, _ = _DECODER.raw_decode(text, start)
+            return value
+        except json.JSONDecodeError as e:
+            # Past a key, the brace did open the payload and the payload is malformed
+            if text[start + 1:e.pos].strip():
+                raise
+            start = text.find('{', start + 1)
+    raise json.JSONDecodeError("No JSON object found", text, 0)
+
+
+class ObjectStreamParser:
+    """
+    Incrementally parses the top-level members of a streamed JSON object.
+
+    Feed text chunks as they arrive; ``feed`` returns the (key, value) pairs
+    completed by that chunk. Completed members are also collected in
+    ``members``, and ``done`` turns true once the object's closing brace has
+    been seen. As in extract_json_object(), a brace in leading prose that is
+    not followed by a key is skipped in favour of the next one.
+    """
+
+    def __init__(self):
+        self.members = {}
+        self.done = False
+        self._text = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = None
+        self._key = None
+        self._value_start = None
+        # Index of an opening brace not yet confirmed by a key
+        self._opened_at = None
+
+    def feed(self, chunk):
+        """
+        Consumes the next chunk of text.
+
+        Returns:
+            A list of (key, value) pairs for the members completed by it.
+        """
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        completed = []
+        text = self._text
+        position = self._position
+        while not self.done:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(text, position)
+                if match is None:
+                    position = len(text)
+                    break
+                index = match.start()
+                if match.group() == '\\':
+                    if index + 1 >= len(text):
+                        # The escaped character is still to come
+                        position = index
+                        break
+                    position = index + 2
+                    continue
+                self._in_string = False
+                position = index + 1
+                if self._depth == 1 and self._value_start is None:
+                    self._key = json.loads(text[self._string_start:position])
+                continue
+
+            match = _STRUCTURAL.search(text, position)
+            if match is None:
+                position = len(text)
+                break
+            index = match.start()
+            character = match.group()
+            position = index + 1
+            if self._depth == 0:
+                # Prose or fences before the object hold nothing but its opening brace
+                if character == '{':
+                    self._depth = 1
+                    self._opened_at = index
+                continue
+            if self._opened_at is not None:
+                opened_at = self._opened_at
+                self._opened_at = None
+                if text[opened_at + 1:index].strip() or character not in '"}':
+                    # Not the payload: an empty object or a key must follow its brace
+                    self._depth = 0
+                    position = opened_at + 1
+                    continue
+            if character == '"':
+                self._in_string = True
+                self._string_start = index
+            elif character == ':':
+                if self._depth == 1:
+                    self._value_start = position
+            elif character in '{[':
+                self._depth += 1
+            elif character in '}]':
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    self._complete(text[self._value_start:position], completed)
+                elif self._depth == 0:
+                    if self._value_start is not None:
+                        self._complete(text[self._value_start:index], completed)
+                    self.done = True
+            elif character == ',' and self._depth == 1 and self._value_start is not None:
+                self._complete(text[self._value_start:index], completed)
+
+        # Text before the member in progress is no longer needed
+        keep_from = min(
+            position,
+            self._value_start if self._value_start is not None else position,
+            self._string_start if self._in_string else position,
+            self._opened_at if self._opened_at is not None else position,
+        )
+        self._text = text[keep_from:]
+        self._position = position - keep_from
+        if self._value_start is not None:
+            self._value_start -= keep_from
+        if self._in_string:
+            self._string_start -= keep_from
+        if self._opened_at is not None:
+            self._opened_at -= keep_from
+        return completed
+
+    def _complete(self, value_text, completed):
+        key = self._key
+        self._key = None
+        self._value_start = None
+        try:
+            value = json.loads(value_text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping undecodable streamed member {key!r}: {e}")
+            return
+        self.members[key] = value
+        completed.append((key, value))
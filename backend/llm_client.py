@@ -0,0 +1,252 @@
+"""
+LLM Client Module
+
+This module wraps the Gemini model for the async endpoints. Calls use the
+SDK's native async method when the model has one and are otherwise offloaded
+to a worker thread, so a generation never blocks the event loop. A semaphore
+caps how many calls are in flight at once per process.
+
+Response texts are cached by a hash of the model name, generation config
+and normalized prompt, in memory and on disk, so regenerating from
+identical inputs skips the round trip. JSON_RESPONSE_CONFIG asks the model
+for a bare JSON payload where its JSON response mode is available.
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import time
+import weakref
+
+from result_cache import DiskCache, LRUCache, TieredCache, cache_directory
+
+logger = logging.getLogger(__name__)
+
+# Generations in flight at once per process
+LLM_CONCURRENCY = int(os.getenv("QBR_LLM_CONCURRENCY", "16"))
+# Queueing longer than this many seconds for a free slot is logged
+LLM_QUEUE_WARN_SECONDS = 0.5
+
+# Response cache; bump the version when prompts or parsing change in ways the key misses
+LLM_CACHE_VERSION = 1
+LLM_CACHE_ENTRIES = int(os.getenv("QBR_LLM_CACHE_ENTRIES", "256"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("QBR_LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("QBR_LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Ask for bare JSON through Gemini's JSON response mode; disable for models without it
+LLM_JSON_MODE = os.getenv("QBR_LLM_JSON_MODE", "true").lower() != "false"
+JSON_RESPONSE_CONFIG = {"response_mime_type": "application/json"} if LLM_JSON_MODE else None
+
+LLM_CACHE = TieredCache(
+    LRUCache(LLM_CACHE_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS),
+    DiskCache(cache_directory("llm"), LLM_CACHE_MAX_BYTES, ttl_seconds=LLM_CACHE_TTL_SECONDS)
+    if LLM_CACHE_MAX_BYTES else None,
+)
+
+
+def normalize_prompt(prompt):
+    """Trims the prompt and collapses whitespace within lines, so formatting-only changes share a key."""
+    return "\n".join(" ".join(line.split()) for line in prompt.strip().splitlines())
+
+
+def _config_dict(config):
+    if config is None:
+        return {}
+    if isinstance(config, dict):
+        return config
+    if dataclasses.is_dataclass(config):
+        return dataclasses.asdict(config)
+    attributes = getattr(config, "__dict__", None)
+    if attributes is None:
+        return {"config": str(config)}
+    return {name: value for name, value in attributes.items() if not name.startswith("_")}
+
+
+def response_cache_key(model_name, prompt, generation_config=None):
+    """
+    Builds the response cache key for one generation.
+
+    Args:
+        model_name: Name of the model, e.g. 'models/gemini-1.5-flash'.
+        prompt: The prompt text; it is normalized first.
+        generation_config: Optional dict or GenerationConfig of the call.
+
+    Returns:
+        A hex BLAKE2b digest.
+    """
+    config = json.dumps(_config_dict(generation_config), sort_keys=True, default=str)
+    payload = "\0".join([f"v{LLM_CACHE_VERSION}", model_name, config, normalize_prompt(prompt)])
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=32).hexdigest()
+
+
+class LLMClient:
+    """
+    Issues bounded, non-blocking generation calls to a GenerativeModel.
+
+    Args:
+        model: A google.generativeai GenerativeModel, or any object with
+            ``generate_content`` and optionally ``generate_content_async``.
+        concurrency: Maximum number of calls in flight at once.
+        cache: Cache of response texts, or None to disable caching.
+    """
+
+    def __init__(self, model, concurrency=LLM_CONCURRENCY, cache=LLM_CACHE):
+        self.model = model
+        self.concurrency = concurrency
+        self.cache = cache
+        # asyncio primitives belong to one event loop, so each loop gets its own semaphore
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def model_name(self):
+        return getattr(self.model, "model_name", type(self.model).__name__)
+
+    def _cache_key(self, prompt, generation_config):
+        # The model's own default config shapes the output as much as a per-call one
+        config = {
+            "model": _config_dict(getattr(self.model, "_generation_config", None)),
+            "call": _config_dict(generation_config),
+        }
+        return response_cache_key(self.model_name, prompt, config)
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    async def generate(self, prompt, **kwargs):
+        """
+        Generates content for a prompt without blocking the event loop.
+
+        Args:
+            prompt: The prompt text.
+            **kwargs: Passed through to the model, e.g. ``generation_config``.
+
+        Returns:
+            The SDK response object.
+        """
+        queued = time.perf_counter()
+        async with self._semaphore():
+            waited = time.perf_counter() - queued
+            if waited > LLM_QUEUE_WARN_SECONDS:
+                logger.info(f"LLM call waited {waited:.2f}s for one of {self.concurrency} slots")
+            generate_async = getattr(self.model, "generate_content_async", None)
+            if generate_async is not None:
+                return await generate_async(prompt, **kwargs)
+            return await asyncio.to_thread(self.model.generate_content, prompt, **kwargs)
+
+    async def generate_text(self, prompt, generation_config=None, use_cache=True, parse=None):
+        """
+        Returns the response text for a prompt, served from the cache when possible.
+
+        Args:
+            prompt: The prompt text.
+            generation_config: Optional generation config for this call.
+            use_cache: False to skip the cache lookup and force a fresh
+                generation; the fresh response still replaces the entry.
+            parse: Optional callable turning the text into the returned
+                value. A response is only cached once it parses, so a
+                truncated or malformed one is regenerated on the next call
+                instead of being served again; its error propagates.
+
+        Returns:
+            The response text, or ``parse(text)`` when parse is given.
+        """
+        key = self._cache_key(prompt, generation_config)
+        if self.cache is not None and use_cache:
+            text = self.cache.get(key)
+            if text is not None:
+                try:
+                    value = text if parse is None else parse(text)
+                except Exception as e:
+                    logger.warning(f"Regenerating unparseable cached LLM response {key[:16]}: {e}")
+                else:
+                    logger.info(f"LLM response cache hit {key[:16]}")
+                    return value
+        kwargs = {} if generation_config is None else {"generation_config": generation_config}
+        response = await self.generate(prompt, **kwargs)
+        text = response.text
+        value = text if parse is None else parse(text)
+        if self.cache is not None and text:
+            await asyncio.to_thread(self.cache.put, key, text)
+        return value
+
+    async def stream_text(self, prompt, generation_config=None, use_cache=True, parse=None):
+        """
+        Yields the response text for a prompt chunk by chunk as it is generated.
+
+        A cached response is yielded as a single chunk, and a completed
+        stream is cached like generate_text() would.
+
+        Args:
+            prompt: The prompt text.
+            generation_config: Optional generation config for this call.
+            use_cache: False to skip the cache lookup.
+            parse: Optional callable that must accept the completed text for
+                it to be cached, or a cached text for it to be served.
+        """
+        key = self._cache_key(prompt, generation_config)
+        if self.cache is not None and use_cache:
+            text = self.cache.get(key)
+            if text is not None and self._parses(key, text, parse):
+                logger.info(f"LLM response cache hit {key[:16]}")
+                yield text
+                return
+        kwargs = {} if generation_config is None else {"generation_config": generation_config}
+        chunks = []
+        async with self._semaphore():
+            async for text in self._stream(prompt, **kwargs):
+                chunks.append(text)
+                yield text
+        text = "".join(chunks)
+        if self.cache is not None and text and self._parses(key, text, parse):
+            await asyncio.to_thread(self.cache.put, key, text)
+
+    @staticmethod
+    def _parses(key, text, parse):
+        if parse is None:
+            return True
+        try:
+            parse(text)
+        except Exception as e:
+            logger.warning(f"Unparseable LLM response {key[:16]} is not cached: {e}")
+            return False
+        return True
+
+    async def _stream(self, prompt, **kwargs):
+        generate_async = getattr(self.model, "generate_content_async", None)
+        if generate_async is not None:
+            response = await generate_async(prompt, stream=True, **kwargs)
+            async for chunk in response:
+                yield chunk.text
+            return
+
+        # The synchronous stream is drained in a worker thread and handed over through a queue
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def produce():
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True, **kwargs):
+                    loop.call_soon_threadsafe(queue.put_nowait, (chunk.text, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (None, e))
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, (None, None))
+
+        producer = asyncio.ensure_future(asyncio.to_thread(produce))
+        try:
+            while True:
+                text, error = await queue.get()
+                if error is not None:
+                    raise error
+                if text is None:
+                    return
+                yield text
+        finally:
+            await producer
@@ -1,20 +1,38 @@
 # backend/main.py
-import csv
+import asyncio
+import copy
 import json
 import logging
 import os
+import shutil
+import tempfile
+import uuid
 from typing import List
 
 import google.generativeai as genai
-import PyPDF2
 import uvicorn
 from dotenv import load_dotenv
 from fastapi import FastAPI, File, Form, UploadFile, responses, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from prompt_generator import create_qbr_prompt
+from campaign_index import CampaignIndex
+from campaign_metrics import MetricAggregate, NUMERIC_COLUMNS
+from campaign_table import CampaignTable
+from csv_ingest import iter_csv_rows
+from data_digest import build_data_digest
+from derived_metrics import dataset_key
+from group_by import breakdown_tables
+from hash_join import JOIN_KEY, join_tables, joined_aggregate
+from json_stream import ObjectStreamParser, extract_json_object
+from llm_client import JSON_RESPONSE_CONFIG, LLMClient
+import parse_pool
+from pdf_extract import extract_pdf_text, log_extraction
+from result_cache import LRUCache
+from upload_spool import spool_upload
+from prompt_generator import create_qbr_prompt, create_slide_prompts
 from pdf_generator import generate_qbr_pdf, create_pdf_response
 from pptx_generator import generate_qbr_pptx, create_pptx_response
+from slide_generation import generate_slides
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -46,17 +64,32 @@ if not GOOGLE_API_KEY:
     raise ValueError("GOOGLE_API_KEY environment variable not set")
 genai.configure(api_key=GOOGLE_API_KEY)
 model = genai.GenerativeModel('gemini-1.5-flash')
+# Bounded, non-blocking access to the model from the async endpoints
+llm = LLMClient(model)
+
+# Stream CSV uploads through the aggregators instead of materializing every row
+CSV_STREAMING = os.getenv("QBR_CSV_STREAMING", "true").lower() != "false"
+
+# Slide that receives the data-driven breakdown tables ("Campaign Performance Analysis")
+BREAKDOWN_SLIDE = "slide4"
+
+# Generate the six slides as concurrent sub-prompts unless a request says otherwise
+SLIDE_FAN_OUT = os.getenv("QBR_SLIDE_FAN_OUT", "false").lower() == "true"
+
+# Finished and running exact passes behind preview responses, by job id
+PREVIEW_JOB_ENTRIES = int(os.getenv("QBR_PREVIEW_JOB_ENTRIES", "256"))
+PREVIEW_JOBS = LRUCache(PREVIEW_JOB_ENTRIES)
+# Keeps the background exact passes referenced until they finish
+_preview_tasks = set()
 
 
 def extract_text_from_pdf(pdf_file):
     text = ""
     try:
         logger.debug(f"Extracting text from PDF: {pdf_file.filename}")
-        pdf_reader = PyPDF2.PdfReader(pdf_file.file)
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            text += page.extract_text()
-        logger.debug(f"Extracted text from PDF: {text}")
+        extraction = extract_pdf_text(pdf_file.file)
+        log_extraction(pdf_file.filename, extraction)
+        text = extraction["text"]
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {e}")
     logger.debug(f"Extracted text: {text}")
@@ -64,47 +97,137 @@ def extract_text_from_pdf(pdf_file):
 
 
 def extract_data_from_csv(csv_file):
-    data = []
+    data = CampaignTable()
     try:
         logger.debug(f"Extracting data from CSV: {csv_file.filename}")
-        csv_reader = csv.DictReader(csv_file.file.read().decode('utf-8').splitlines())
-        for row in csv_reader:
-            data.append(row)
-        logger.debug(f"Extracted data from CSV: {data}")
-        logger.debug(f"Type of extracted data: {type(data)}")
+        data = CampaignTable.from_rows(iter_csv_rows(csv_file.file))
+        logger.debug(f"Extracted {len(data)} rows from CSV")
     except Exception as e:
         logger.error(f"Error extracting data from CSV: {e}")
-    logger.debug(f"Extracted data: {data}")
     return data
 
 
-def calculate_revenue_and_aov(data):
-    total_revenue = 0
-    total_purchases = 0
-    for row in data:
+def stream_data_from_csv(csv_file):
+    """
+    Aggregates a CSV upload in one streaming pass without keeping its rows.
+
+    Returns:
+        A tuple of (aggregate, table) where aggregate is a MetricAggregate
+        that can be merged with those of other files and table is the
+        file's CampaignTable.
+    """
+    logger.debug(f"Streaming data from CSV: {csv_file.filename}")
+    return parse_pool.parse_csv(csv_file.file, getattr(csv_file, "digest", None))
+
+
+async def parse_customer_data_files(customer_data_files):
+    """
+    Spools each upload to disk in one hashing pass, then parses them.
+
+    Returns:
+        One parse result per upload, in order, each carrying the upload's
+        content "digest"; failed files yield the exception instead of a
+        result.
+    """
+    with tempfile.TemporaryDirectory(prefix="qbr-upload-") as spool_dir:
+        spooled_uploads = await spool_customer_data_files(customer_data_files, spool_dir)
         try:
-            revenue = float(row.get('Revenue', 0))
-            purchases = int(row.get('Purchases', 0))
-            total_revenue += revenue
-            total_purchases += purchases
-        except ValueError as e:
-            logger.error(f"ValueError: {e}. Skipping row: {row}")
-            continue  # Skip this row and move to the next one
-        except TypeError as e:
-            logger.error(f"TypeError: {e}. Skipping row: {row}")
-            continue
-    
-    average_order_value = total_revenue / total_purchases if total_purchases else 0
-    return total_revenue, total_purchases, average_order_value
+            return await parse_spooled_files(spooled_uploads)
+        finally:
+            for spooled in spooled_uploads:
+                spooled.close()
+
+
+async def spool_customer_data_files(customer_data_files, spool_dir):
+    """Spools each upload into ``spool_dir``; the caller closes the returned uploads."""
+    spooled_uploads = []
+    try:
+        for file in customer_data_files:
+            logger.info(f"Processing file: {file.filename}")
+            logger.info(f"File content type: {file.content_type}")
+            spooled = await spool_upload(file, spool_dir)
+            spooled_uploads.append(spooled)
+            logger.info(f"File size: {spooled.size} bytes (blake2b {spooled.digest})")
+    except BaseException:
+        for spooled in spooled_uploads:
+            spooled.close()
+        raise
+    return spooled_uploads
+
+
+async def parse_spooled_files(spooled_uploads):
+    """
+    Parses spooled uploads, reusing cached results for content seen before.
+
+    Returns:
+        One parse result per upload, as for parse_customer_data_files().
+    """
+    # Repeat uploads of the same content skip parsing entirely
+    cache_variant = "" if CSV_STREAMING else "-full"
+    cache_keys = [parse_pool.parse_cache_key(spooled, cache_variant) for spooled in spooled_uploads]
+    # Disk-tier reads and writes unpickle whole tables, so keep them off the event loop
+    results = list(await asyncio.gather(
+        *(asyncio.to_thread(parse_pool.PARSE_CACHE.get, key) for key in cache_keys)
+    ))
+    pending = [index for index, result in enumerate(results) if result is None]
+    logger.info(f"Parse cache hits: {len(results) - len(pending)}/{len(results)}")
+
+    if pending:
+        parsed = await parse_spooled_uploads([spooled_uploads[index] for index in pending])
+        for index, result in zip(pending, parsed):
+            results[index] = result
+        await asyncio.gather(*(
+            asyncio.to_thread(parse_pool.PARSE_CACHE.put, cache_keys[index], results[index])
+            for index in pending if isinstance(results[index], dict)
+        ))
+    for spooled, result in zip(spooled_uploads, results):
+        if isinstance(result, dict):
+            # Identifies the dataset for the derived-metrics cache
+            result["digest"] = spooled.digest
+    return results
+
+
+async def parse_spooled_uploads(spooled_uploads):
+    """Parses spooled uploads in the pool, or inline when the pool is disabled."""
+    if parse_pool.PARSE_WORKERS:
+        # Parse every upload in its own worker process and gather the results
+        return await parse_pool.parse_uploads(spooled_uploads, CSV_STREAMING)
+
+    results = []
+    for spooled in spooled_uploads:
+        try:
+            results.append(parse_upload(spooled))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def parse_upload(file):
+    """
+    Parses one upload in-process; used when the parse pool is disabled.
+
+    Returns:
+        The same result shape as parse_pool.parse_file().
+    """
+    if file.filename.endswith(".pdf"):
+        return {"text": extract_text_from_pdf(file), "aggregate": None, "table": None}
+    # CSVs reach the prompt through the data digest, so they carry no text
+    if file.filename.endswith(".csv") and CSV_STREAMING:
+        aggregate, table = stream_data_from_csv(file)
+        return {"text": "", "aggregate": aggregate, "table": table, "table_store": getattr(file, "digest", None)}
+    if file.filename.endswith(".csv"):
+        csv_data = extract_data_from_csv(file)
+        aggregate = MetricAggregate.from_columns(csv_data.numeric, names=NUMERIC_COLUMNS)
+        return {"text": "", "aggregate": aggregate, "table": csv_data}
+    return None
 
-def format_numbers_in_qbr(qbr_content_json):
+def format_numbers_in_qbr(qbr_content):
     logger.info("Starting format_numbers_in_qbr")
-    logger.info(f"Input type: {type(qbr_content_json)}")
-    logger.info(f"Input preview: {str(qbr_content_json)[:200]}...")
+    logger.info(f"Input type: {type(qbr_content)}")
+    logger.info(f"Input preview: {str(qbr_content)[:200]}...")
     
     try:
-        qbr_content = json.loads(qbr_content_json)
-        logger.info(f"Successfully parsed JSON, structure: {list(qbr_content.keys()) if isinstance(qbr_content, dict) else 'Not a dict'}")
+        logger.info(f"Content structure: {list(qbr_content.keys()) if isinstance(qbr_content, dict) else 'Not a dict'}")
         
         # Format numbers in slide 2 (Key Metrics)
         if "slide2" in qbr_content and "content" in qbr_content["slide2"]:
@@ -151,70 +274,241 @@ def format_numbers_in_qbr(qbr_content_json):
                 formatted_content.append(item)
             qbr_content["slide2"]["content"] = formatted_content
 
-        return json.dumps(qbr_content)
-    except (json.JSONDecodeError, TypeError) as e:
+        return qbr_content
+    except TypeError as e:
         logger.error(f"Error formatting numbers in QBR content: {e}")
-        return qbr_content_json # Return original content if formatting fails
-
-def generate_qbr_content(client_name, client_website, industry, extracted_data, total_revenue, total_purchases, average_order_value):
-    # Create a summary of the data analysis for the prompt
-    data_summary = f"""
-Total Revenue: ${total_revenue:,.2f}
-Total Purchases: {total_purchases:,}
-Average Order Value: ${average_order_value:,.2f}
-Data Extract (first 1000 chars):
-{str(extracted_data[:1000])}...
-"""
+        return qbr_content # Return content unformatted if formatting fails
 
-    prompt = create_qbr_prompt(client_name, client_website, industry, data_summary)
+async def build_data_summary(total_revenue, total_purchases, average_order_value, campaign_metrics=None, campaign_index=None, extracted_data="", dataset=None):
+    # Condense the parsed data into a size-budgeted digest for the prompt, off the event loop
+    data_summary = await asyncio.to_thread(
+        build_data_digest,
+        total_revenue, total_purchases, average_order_value,
+        summary=campaign_metrics,
+        campaign_index=campaign_index,
+        document_text=extracted_data,
+        dataset=dataset,
+    )
+    logger.info(f"Data digest: {len(data_summary)} chars")
+    return data_summary
+
+
+async def build_qbr_prompt(client_name, client_website, industry, extracted_data, total_revenue, total_purchases, average_order_value, campaign_metrics=None, campaign_index=None, dataset=None):
+    data_summary = await build_data_summary(
+        total_revenue, total_purchases, average_order_value, campaign_metrics, campaign_index, extracted_data, dataset,
+    )
+    return create_qbr_prompt(client_name, client_website, industry, data_summary)
+
+
+async def generate_qbr_content(client_name, client_website, industry, extracted_data, total_revenue, total_purchases, average_order_value, campaign_metrics=None, campaign_index=None, dataset=None, use_cache=True, fan_out=False):
+    data_summary = await build_data_summary(
+        total_revenue, total_purchases, average_order_value, campaign_metrics, campaign_index, extracted_data, dataset,
+    )
 
+    if fan_out:
+        # One sub-prompt per slide, generated concurrently and merged
+        logger.info("Generating QBR content slide by slide")
+        prompts = create_slide_prompts(client_name, client_website, industry, data_summary)
+        return await generate_slides(
+            llm, prompts, extract_json_object, use_cache=use_cache, generation_config=JSON_RESPONSE_CONFIG
+        )
+
+    prompt = create_qbr_prompt(client_name, client_website, industry, data_summary)
     try:
         logger.info("Generating QBR content with enhanced prompt")
         logger.debug(f"Full prompt: {prompt}")
-        response = model.generate_content(prompt)
-        logger.info(f"Generated QBR content: {response.text}")
-
-        # Clean up the response to extract JSON from markdown code blocks
-        response_text = response.text.strip()
-        
-        # Find the JSON content between ```json and ```
-        if "```json" in response_text:
-            start_index = response_text.find("```json") + 7
-            end_index = response_text.find("```", start_index)
-            if end_index != -1:
-                response_text = response_text[start_index:end_index].strip()
-            else:
-                # If no closing ```, take everything after ```json
-                response_text = response_text[start_index:].strip()
-        
-        # Additional cleanup for any remaining markdown or extra text
-        if response_text.startswith("```"):
-            response_text = response_text[3:].strip()
-        if response_text.endswith("```"):
-            response_text = response_text[:-3].strip()
-            
-        # Find the actual JSON object (starts with { and ends with })
-        start_brace = response_text.find('{')
-        if start_brace != -1:
-            # Find the matching closing brace
-            brace_count = 0
-            end_brace = -1
-            for i in range(start_brace, len(response_text)):
-                if response_text[i] == '{':
-                    brace_count += 1
-                elif response_text[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_brace = i
-                        break
-            
-            if end_brace != -1:
-                response_text = response_text[start_brace:end_brace + 1]
-        
-        return response_text
+        # Parsed before caching, so a malformed response is never served from the cache
+        qbr_content = await llm.generate_text(
+            prompt, generation_config=JSON_RESPONSE_CONFIG, use_cache=use_cache, parse=extract_json_object
+        )
+        logger.info(f"Generated QBR content: {qbr_content}")
+        return qbr_content
+    except json.JSONDecodeError:
+        # An unparseable response surfaces as a JSONDecodeError to the endpoint
+        raise
     except Exception as e:
         logger.error(f"Error generating content with Gemini Pro: {e}")
-        return "{}"
+        return {}
+
+
+def collect_parse_results(filenames, results):
+    """
+    Folds per-file parse results into the inputs of QBR generation.
+
+    Args:
+        filenames: Upload filenames, in the order of ``results``.
+        results: Results of parse_customer_data_files() or
+            parse_pool.preview_uploads().
+
+    Returns:
+        A dict with "extracted_data", "total_revenue", "total_purchases",
+        "average_order_value", "campaign_metrics", "campaign_index",
+        "tables" and "dataset". Preview results also yield "estimates",
+        the confidence intervals of the sampled totals.
+    """
+    analysis = {
+        "extracted_data": "",
+        "total_revenue": 0,
+        "total_purchases": 0,
+        "average_order_value": 0,
+        "campaign_metrics": None,
+        "campaign_index": None,
+        "tables": [],
+        "dataset": None,
+    }
+    aggregates = []
+    estimators = []
+    for filename, result in zip(filenames, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error processing file {filename}: {result}")
+        elif result is None:
+            logger.warning(f"Unsupported file type: {filename}")
+        else:
+            if result["table"] is None:
+                # Tabular exports reach the prompt through the digest instead
+                analysis["extracted_data"] += result["text"]
+            if result["aggregate"] is not None:
+                aggregates.append(result["aggregate"])
+            if result["table"] is not None:
+                analysis["tables"].append(result["table"])
+            if result.get("estimator") is not None:
+                estimators.append(result["estimator"])
+
+    tables = analysis["tables"]
+    if len(tables) > 1 and len(aggregates) == len(tables) and not estimators:
+        # Complementary exports of the same campaigns are joined instead of summed side by side;
+        # samples are left alone, as their keys would rarely match
+        joined = join_tables(tables)
+        if len(joined) < len(tables):
+            logger.info(f"Joined {len(tables)} exports on {JOIN_KEY} into {len(joined)} tables")
+            analysis["tables"] = [table for table, _ in joined]
+            aggregates = [joined_aggregate(table, [aggregates[index] for index in members])
+                          for table, members in joined]
+
+    if aggregates:
+        # Fold the per-file partials; derived values come from the merged sums
+        merged = sum(aggregates, MetricAggregate())
+        analysis["total_revenue"], analysis["total_purchases"], analysis["average_order_value"] = merged.revenue_and_aov()
+        analysis["campaign_metrics"] = merged.summary()
+    if estimators:
+        # Sampled files are strata of one estimate; their headline totals replace the scaled sums
+        estimates = sum(estimators[1:], estimators[0]).revenue_and_aov()
+        analysis["total_revenue"], analysis["total_purchases"], analysis["average_order_value"] = estimates
+        analysis["estimates"] = {
+            name: estimate.to_dict()
+            for name, estimate in zip(("total_revenue", "total_purchases", "average_order_value"), estimates)
+        }
+    if analysis["tables"]:
+        analysis["campaign_index"] = CampaignIndex(analysis["tables"])
+        # Samples carry no digest, so previews never share cached groupings with exact results
+        analysis["dataset"] = dataset_key([result.get("digest") for result in results
+                                           if isinstance(result, dict) and result["table"] is not None])
+    return analysis
+
+
+async def generate_from_analysis(client_name, client_website, industry, analysis, use_cache=True, fan_out=False):
+    """Runs generate_qbr_content() on the output of collect_parse_results()."""
+    return await generate_qbr_content(
+        client_name, client_website, industry, analysis["extracted_data"],
+        analysis["total_revenue"], analysis["total_purchases"], analysis["average_order_value"],
+        analysis["campaign_metrics"], analysis["campaign_index"], analysis["dataset"],
+        use_cache=use_cache, fan_out=fan_out,
+    )
+
+
+def add_breakdown_tables(parsed_content, analysis):
+    """Puts the computed breakdown tables on the breakdown slide, if it is among the parsed slides."""
+    tables = analysis["tables"]
+    if tables and isinstance(parsed_content.get(BREAKDOWN_SLIDE), dict):
+        # Computed breakdowns go ahead of whatever tables the model produced
+        slide = parsed_content[BREAKDOWN_SLIDE]
+        slide["tables"] = breakdown_tables(tables, dataset=analysis["dataset"]) + list(slide.get("tables") or [])
+    return parsed_content
+
+
+def prepare_slide(name, slide, analysis):
+    """Applies the formatting of build_qbr_response() to a copy of a single streamed slide."""
+    # The stream parser keeps the original for the complete event, which formats it again
+    prepared = format_numbers_in_qbr({name: copy.deepcopy(slide)})
+    return add_breakdown_tables(prepared, analysis)[name]
+
+
+def build_qbr_response(qbr_content, analysis):
+    """
+    Formats generated QBR content and adds the computed breakdowns.
+
+    Args:
+        qbr_content: The parsed slides, as returned by generate_qbr_content().
+        analysis: The output of collect_parse_results().
+
+    Returns:
+        The response body of /api/generate.
+    """
+    # Format numbers in the QBR content before returning
+    parsed_content = format_numbers_in_qbr(qbr_content)
+    add_breakdown_tables(parsed_content, analysis)
+    logger.info(f"QBR content: {parsed_content}")
+    logger.debug(f"About to create response_data with qbr_content type: {type(parsed_content)}")
+    response_data = {
+        "qbr_content": json.dumps(parsed_content),
+        "total_revenue": analysis["total_revenue"],
+        "total_purchases": analysis["total_purchases"],
+        "average_order_value": analysis["average_order_value"]
+    }
+    if "estimates" in analysis:
+        response_data["preview"] = True
+        response_data["estimates"] = analysis["estimates"]
+    return response_data
+
+
+async def run_exact_job(job_id, client_name, client_website, industry, spooled_uploads, spool_dir, use_cache=True, fan_out=False):
+    """
+    Runs the exact parse and generation behind a preview response.
+
+    The result is stored in PREVIEW_JOBS under ``job_id``; the spooled
+    uploads and their directory are removed when done.
+    """
+    try:
+        results = await parse_spooled_files(spooled_uploads)
+        analysis = collect_parse_results([spooled.filename for spooled in spooled_uploads], results)
+        qbr_content = await generate_from_analysis(client_name, client_website, industry, analysis, use_cache, fan_out)
+        PREVIEW_JOBS.put(job_id, {"status": "complete", "result": build_qbr_response(qbr_content, analysis)})
+        logger.info(f"Exact pass for preview job {job_id} complete")
+    except Exception as e:
+        logger.error(f"Exact pass for preview job {job_id} failed: {e}")
+        logger.exception(e)
+        PREVIEW_JOBS.put(job_id, {"status": "failed", "error": str(e)})
+    finally:
+        discard_spooled_uploads(spooled_uploads, spool_dir)
+
+
+def discard_spooled_uploads(spooled_uploads, spool_dir):
+    """Closes spooled uploads and removes their spool directory."""
+    for spooled in spooled_uploads:
+        spooled.close()
+    shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+def start_exact_job(client_name, client_website, industry, spooled_uploads, spool_dir, use_cache=True, fan_out=False):
+    """Schedules run_exact_job() in the background and returns its job id."""
+    job_id = uuid.uuid4().hex
+    PREVIEW_JOBS.put(job_id, {"status": "running"})
+    task = asyncio.create_task(
+        run_exact_job(job_id, client_name, client_website, industry, spooled_uploads, spool_dir, use_cache, fan_out)
+    )
+    _preview_tasks.add(task)
+    task.add_done_callback(_preview_tasks.discard)
+    return job_id
+
+
+@app.on_event("startup")
+def start_parse_pool():
+    parse_pool.warm_up()
+
+
+@app.on_event("shutdown")
+def stop_parse_pool():
+    parse_pool.shutdown()
 
 
 @app.post("/api/generate")
@@ -223,11 +517,17 @@ async def generate_qbr(
     client_website: str = Form(...),
     industry: str = Form(...),
     customer_data_files: List[UploadFile] = File(default=[]),
+    preview: bool = Form(False),
+    use_cache: bool = Form(True),
+    fan_out: bool = Form(SLIDE_FAN_OUT),
 ):
     logger.info("Received request at /api/generate")
     logger.info(f"Client Name: {client_name}")
     logger.info(f"Client Website: {client_website}")
     logger.info(f"Industry: {industry}")
+    logger.info(f"Preview: {preview}")
+    logger.info(f"Use LLM response cache: {use_cache}")
+    logger.info(f"Per-slide generation: {fan_out}")
     
     # Log the types of the input variables
     logger.info(f"Type of client_name: {type(client_name)}")
@@ -235,62 +535,53 @@ async def generate_qbr(
     logger.info(f"Type of industry: {type(industry)}")
     logger.info(f"Type of customer_data_files: {type(customer_data_files)}")
     
-    extracted_data = ""
     # Initialize variables to avoid NameError
-    total_revenue = 0
-    total_purchases = 0
-    average_order_value = 0
+    analysis = collect_parse_results([], [])
+    job_id = None
+    qbr_content = {}
     
     try:
         if not customer_data_files:
             logger.warning("No files uploaded, proceeding with empty data")
-            extracted_data = "No customer data files provided"
+            analysis["extracted_data"] = "No customer data files provided"
+        elif preview:
+            # Answer from reservoir samples now; the exact pass runs in the background
+            spool_dir = tempfile.mkdtemp(prefix="qbr-preview-")
+            try:
+                spooled_uploads = await spool_customer_data_files(customer_data_files, spool_dir)
+            except BaseException:
+                shutil.rmtree(spool_dir, ignore_errors=True)
+                raise
+            try:
+                results = await parse_pool.preview_uploads(spooled_uploads)
+                analysis = collect_parse_results([file.filename for file in customer_data_files], results)
+            except BaseException:
+                discard_spooled_uploads(spooled_uploads, spool_dir)
+                raise
+            # The exact pass, with its LLM call, only follows a preview that succeeded
+            if any(isinstance(result, Exception) for result in results):
+                logger.warning("Preview failed for some files; no exact pass was scheduled")
+                discard_spooled_uploads(spooled_uploads, spool_dir)
+            else:
+                job_id = start_exact_job(
+                    client_name, client_website, industry, spooled_uploads, spool_dir, use_cache, fan_out
+                )
         else:
-            for file in customer_data_files:
-                logger.info(f"Processing file: {file.filename}")
-                logger.info(f"File content type: {file.content_type}")
-                logger.info(f"File size: {len(await file.read())} bytes")
-                await file.seek(0)  # Reset file pointer after reading
-                try:
-                    if file.filename.endswith(".pdf"):
-                        extracted_data += extract_text_from_pdf(file)
-                    elif file.filename.endswith(".csv"):
-                        csv_data = extract_data_from_csv(file)
-                        extracted_data += str(csv_data)
-                        total_revenue, total_purchases, average_order_value = calculate_revenue_and_aov(csv_data)
-                    else:
-                        logger.warning(f"Unsupported file type: {file.filename}")
-                except Exception as e:
-                    logger.error(f"Error processing file {file.filename}: {e}")
+            results = await parse_customer_data_files(customer_data_files)
+            analysis = collect_parse_results([file.filename for file in customer_data_files], results)
         
+        extracted_data = analysis["extracted_data"]
         logger.info(f"Extracted data before QBR generation: {extracted_data}")
         logger.info(f"Type of extracted_data: {type(extracted_data)}")
         logger.debug(f"Extracted data content: {extracted_data}")
         logger.info("Calling generate_qbr_content")
-        qbr_content = generate_qbr_content(client_name, client_website, industry, extracted_data, total_revenue, total_purchases, average_order_value)
+        qbr_content = await generate_from_analysis(client_name, client_website, industry, analysis, use_cache, fan_out)
         logger.info("generate_qbr_content returned")
         logger.debug(f"Raw QBR content from Gemini: {qbr_content}")
 
-        # Format numbers in the QBR content before returning
-        qbr_content = format_numbers_in_qbr(qbr_content)
-
-        # Parse the JSON string to ensure it's valid JSON
-        import json
-        logger.debug("Parsing JSON")
-        try:
-            parsed_content = json.loads(qbr_content)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSONDecodeError: {e}, content: {qbr_content}")
-            return {"error": "JSONDecodeError"}
-        logger.debug("JSON parsed")
-        logger.info(f"QBR content: {qbr_content}")
-        logger.debug(f"About to create response_data with qbr_content type: {type(parsed_content)}")
-        response_data = {
-            "qbr_content": json.dumps(parsed_content),
-            "total_revenue": total_revenue,
-            "total_purchases": total_purchases,
-            "average_order_value": average_order_value
-        }
+        response_data = build_qbr_response(qbr_content, analysis)
+        if job_id is not None:
+            response_data["job_id"] = job_id
         logger.debug(f"Response data keys: {list(response_data.keys())}")
         response = responses.JSONResponse(content=response_data)
         response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
@@ -300,9 +591,9 @@ async def generate_qbr(
         return {
             "error": "JSONDecodeError",
             "qbr_content": "{}",  # Provide empty QBR content
-            "total_revenue": total_revenue,
-            "total_purchases": total_purchases,
-            "average_order_value": average_order_value
+            "total_revenue": analysis["total_revenue"],
+            "total_purchases": analysis["total_purchases"],
+            "average_order_value": analysis["average_order_value"]
         }
     except Exception as e:
         logger.error(f"Error in generate_qbr_content: {e}")
@@ -310,14 +601,157 @@ async def generate_qbr(
         return {
             "error": "Internal Server Error",
             "qbr_content": "{}",  # Provide empty QBR content
-            "total_revenue": total_revenue,
-            "total_purchases": total_purchases,
-            "average_order_value": average_order_value
+            "total_revenue": analysis["total_revenue"],
+            "total_purchases": analysis["total_purchases"],
+            "average_order_value": analysis["average_order_value"]
         }
     finally:
         logger.info("Finished processing request at /api/generate")
 
 
+@app.get("/api/generate/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    """
+    Returns the exact pass behind a preview response.
+
+    The body has a "status" of "running", "complete" (with the exact
+    /api/generate body under "result") or "failed" (with an "error").
+    """
+    job = PREVIEW_JOBS.get(job_id)
+    if job is None:
+        return responses.JSONResponse(status_code=404, content={"error": "Unknown job id"})
+    response = responses.JSONResponse(content=job)
+    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+    return response
+
+
+def find_campaign_rows(spooled_uploads, campaign_uuid):
+    """
+    Finds a campaign's rows in spooled CSV uploads without parsing them.
+
+    Each CSV is memory-mapped and only its "Campaign UUID" field is decoded
+    row by row; the full row is decoded only for matches.
+
+    Returns:
+        A list of {"file", "row", "fields"} dicts, one per matching row.
+    """
+    matches = []
+    for spooled in spooled_uploads:
+        if not spooled.filename.endswith(".csv") or not spooled.size:
+            continue
+        with spooled.open_mapped() as mapped:
+            for index in mapped.find('Campaign UUID', campaign_uuid):
+                matches.append({"file": spooled.filename, "row": index, "fields": mapped[index].to_dict()})
+    return matches
+
+
+@app.post("/api/campaigns/lookup")
+async def lookup_campaign(
+    campaign_uuid: str = Form(...),
+    customer_data_files: List[UploadFile] = File(...),
+):
+    """
+    Returns the export rows of one campaign, looked up by its UUID.
+
+    Uploads are spooled and read through an offset-indexed memory map, so
+    a single campaign is found without materializing the rest of the export.
+    """
+    logger.info(f"Received request at /api/campaigns/lookup for {campaign_uuid}")
+    # The spool stays open for as long as the mapped files are read
+    with tempfile.TemporaryDirectory(prefix="qbr-lookup-") as spool_dir:
+        spooled_uploads = await spool_customer_data_files(customer_data_files, spool_dir)
+        try:
+            matches = await asyncio.to_thread(find_campaign_rows, spooled_uploads, campaign_uuid)
+        finally:
+            for spooled in spooled_uploads:
+                spooled.close()
+    if not matches:
+        return responses.JSONResponse(status_code=404, content={"error": "Unknown campaign UUID"})
+    return {"campaign_uuid": campaign_uuid, "rows": matches}
+
+
+def sse_event(event, data):
+    """Formats one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/generate/stream")
+async def generate_qbr_stream(
+    client_name: str = Form(...),
+    client_website: str = Form(...),
+    industry: str = Form(...),
+    customer_data_files: List[UploadFile] = File(default=[]),
+    use_cache: bool = Form(True),
+):
+    """
+    Streams a QBR as Server-Sent Events while the model generates it.
+
+    Events:
+        metrics: The headline totals of the parsed uploads.
+        slide: {"slide": "slideN", "content": {...}} as soon as each slide's
+            object is complete in the model output.
+        complete: The full /api/generate response body.
+        error: {"error": message} if generation fails.
+    """
+    logger.info("Received request at /api/generate/stream")
+    logger.info(f"Client Name: {client_name}")
+
+    # Uploads are read before the response starts; the form's files are closed once the endpoint returns
+    analysis = collect_parse_results([], [])
+    try:
+        if customer_data_files:
+            results = await parse_customer_data_files(customer_data_files)
+            analysis = collect_parse_results([file.filename for file in customer_data_files], results)
+        else:
+            logger.warning("No files uploaded, proceeding with empty data")
+            analysis["extracted_data"] = "No customer data files provided"
+    except Exception as e:
+        logger.error(f"Error parsing uploads for streaming: {e}")
+        logger.exception(e)
+        return responses.JSONResponse(status_code=500, content={"error": "Internal Server Error"})
+
+    async def events():
+        try:
+            yield sse_event("metrics", {
+                "total_revenue": analysis["total_revenue"],
+                "total_purchases": analysis["total_purchases"],
+                "average_order_value": analysis["average_order_value"],
+            })
+
+            prompt = await build_qbr_prompt(
+                client_name, client_website, industry, analysis["extracted_data"],
+                analysis["total_revenue"], analysis["total_purchases"], analysis["average_order_value"],
+                analysis["campaign_metrics"], analysis["campaign_index"], analysis["dataset"],
+            )
+            parser = ObjectStreamParser()
+            chunks = []
+            stream = llm.stream_text(
+                prompt, generation_config=JSON_RESPONSE_CONFIG, use_cache=use_cache, parse=extract_json_object
+            )
+            async for text in stream:
+                chunks.append(text)
+                for name, content in parser.feed(text):
+                    if isinstance(content, dict):
+                        content = prepare_slide(name, content, analysis)
+                    logger.info(f"Streaming {name}")
+                    yield sse_event("slide", {"slide": name, "content": content})
+            # The stream parser already holds the decoded slides once the object has closed
+            qbr_content = parser.members if parser.done else extract_json_object("".join(chunks))
+            yield sse_event("complete", build_qbr_response(qbr_content, analysis))
+        except Exception as e:
+            logger.error(f"Error streaming QBR content: {e}")
+            logger.exception(e)
+            yield sse_event("error", {"error": str(e)})
+        finally:
+            logger.info("Finished processing request at /api/generate/stream")
+
+    response = responses.StreamingResponse(events(), media_type="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Stops reverse proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 @app.post("/api/export-pdf")
 async def export_pdf(
     client_name: str = Form(...),
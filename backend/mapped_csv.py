@@ -0,0 +1,164 @@
+"""
+Mapped CSV Module
+
+This module provides a random-access reader over a spooled CSV upload. The
+file is memory-mapped and a row-offset index is built in one pass; fields
+are only located and decoded from ``memoryview`` slices when a column is
+accessed, so reading a handful of campaigns never materializes the rest.
+"""
+
+import csv
+import mmap
+from array import array
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+
+class MappedRow:
+    """A lazily decoded CSV row; behaves like a read-only dict of strings."""
+
+    __slots__ = ('_reader', '_start', '_end', '_bounds', '_fields')
+
+    def __init__(self, reader, start, end):
+        self._reader = reader
+        self._start = start
+        self._end = end
+        self._bounds = None
+        self._fields = None
+
+    def _field(self, index):
+        if self._fields is not None:
+            return self._fields[index] if index < len(self._fields) else None
+        reader = self._reader
+        if reader._mmap.find(b'"', self._start, self._end) != -1:
+            # Quoted fields need the csv module; decode this row once
+            line = str(reader._view[self._start:self._end], reader.encoding)
+            self._fields = next(csv.reader([line]), [])
+            return self._field(index)
+        if self._bounds is None:
+            self._bounds = [self._start]
+        bounds = self._bounds
+        # Locate commas only as far as the requested field
+        while len(bounds) <= index + 1:
+            if bounds[-1] > self._end:
+                return None
+            comma = reader._mmap.find(b',', bounds[-1], self._end)
+            bounds.append((self._end if comma == -1 else comma) + 1)
+        start, end = bounds[index], bounds[index + 1] - 1
+        if start > self._end:
+            return None
+        return str(reader._view[start:end], reader.encoding)
+
+    def __getitem__(self, name):
+        return self._field(self._reader.positions[name])
+
+    def get(self, name, default=None):
+        index = self._reader.positions.get(name)
+        if index is None:
+            return default
+        value = self._field(index)
+        return default if value is None else value
+
+    def __contains__(self, name):
+        return name in self._reader.positions
+
+    def keys(self):
+        return list(self._reader.header)
+
+    def items(self):
+        return [(name, self.get(name)) for name in self._reader.header]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class MappedCSV:
+    """
+    Memory-mapped CSV with an O(1) row index.
+
+    Args:
+        path: Path of the spooled CSV on disk.
+        encoding: Text encoding of the file; a UTF-8 BOM is skipped.
+    """
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        position = len(UTF8_BOM) if self._mmap[:len(UTF8_BOM)] == UTF8_BOM else 0
+        lines = self._line_bounds(position)
+        header_bounds = next(lines, None)
+        if header_bounds is None:
+            self.header = []
+        else:
+            header_line = str(self._view[header_bounds[0]:header_bounds[1]], encoding)
+            self.header = next(csv.reader([header_line]), [])
+        self.positions = {name: index for index, name in enumerate(self.header)}
+        self._starts = array('Q')
+        self._ends = array('Q')
+        for start, end in lines:
+            self._starts.append(start)
+            self._ends.append(end)
+
+    def _line_bounds(self, position):
+        # Yields (start, end) of each non-blank logical line, end excluding the line break
+        mapped = self._mmap
+        size = len(mapped)
+        while position < size:
+            end = mapped.find(b'\n', position)
+            if end == -1:
+                end = size
+            if mapped.find(b'"', position, end) != -1:
+                # A newline inside a quoted field does not end the row
+                while mapped[position:end].count(b'"') % 2 and end < size:
+                    next_end = mapped.find(b'\n', end + 1)
+                    end = size if next_end == -1 else next_end
+            line_end = end - 1 if end > position and mapped[end - 1] == 0x0D else end
+            if line_end > position:
+                yield position, line_end
+            position = end + 1
+
+    def __len__(self):
+        return len(self._starts)
+
+    def row(self, index):
+        """Returns the row at ``index`` without decoding any of its fields."""
+        return MappedRow(self, self._starts[index], self._ends[index])
+
+    def __getitem__(self, index):
+        return self.row(index)
+
+    def __iter__(self):
+        for start, end in zip(self._starts, self._ends):
+            yield MappedRow(self, start, end)
+
+    def column(self, name):
+        """Yields one column's values, decoding only that field of each row."""
+        index = self.positions[name]
+        for row in self:
+            yield row._field(index)
+
+    def find(self, name, value):
+        """
+        Returns the indexes of the rows whose ``name`` field equals ``value``.
+
+        Only that field of each row is located and decoded.
+        """
+        if name not in self.positions:
+            return []
+        return [index for index, field in enumerate(self.column(name)) if field == value]
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
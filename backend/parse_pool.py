@@ -0,0 +1,315 @@
+"""
+Parse Pool Module
+
+This module parses uploaded customer data files (PDF and CSV) in a pool of
+worker processes, so several large uploads are parsed in parallel instead of
+one after another on the event loop thread.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import columnar_store
+from campaign_metrics import ColumnarAggregator, MetricAggregate, NUMERIC_COLUMNS
+from campaign_table import TABLE_NUMERIC_COLUMNS, TABLE_TEXT_COLUMNS, CampaignTable
+from csv_ingest import PresentColumns, ingest_csv, iter_csv_rows
+from pdf_extract import extract_pdf_text, extract_pdf_text_parallel, log_extraction
+from preview import PREVIEW_SAMPLE_ROWS, PreviewEstimator, reservoir_sample_csv
+from result_cache import DiskCache, LRUCache, TieredCache, cache_directory
+from sketches import SketchAggregator
+
+logger = logging.getLogger(__name__)
+
+# Number of parser processes; 0 disables the pool and parses inline
+PARSE_WORKERS = int(os.getenv("QBR_PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+# Parse results keyed by upload content hash; bump the version when their shape changes
+PARSE_CACHE_VERSION = 5
+PARSE_CACHE_ENTRIES = int(os.getenv("QBR_PARSE_CACHE_ENTRIES", "64"))
+# Bound on the tables held by the in-memory tier; store-backed tables are mapped, not held
+PARSE_CACHE_MEMORY_BYTES = int(os.getenv("QBR_PARSE_CACHE_MEMORY_BYTES", str(512 * 1024 * 1024)))
+PARSE_CACHE_MAX_BYTES = int(os.getenv("QBR_PARSE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+class ParseResultDiskCache(DiskCache):
+    """
+    The parse cache's disk tier.
+
+    A streamed CSV result's campaign table is not pickled with it: the
+    columnar store written while parsing, named by the result's
+    "table_store", already holds the table on disk, and is memory-mapped
+    back in when the entry is read. An entry whose store has since been
+    evicted counts as a miss, so the upload is parsed again.
+    """
+
+    def get(self, key, default=None):
+        value = super().get(key)
+        # Only dict results are cached; None is a miss
+        if not isinstance(value, dict):
+            return default
+        digest = value.get("table_store")
+        if digest is None or value["table"] is not None:
+            return value
+        try:
+            store = columnar_store.open_store(digest)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not open columnar store for {key}: {e}")
+            store = None
+        if store is None:
+            self._remove(self._path(key))
+            return default
+        value["table"] = CampaignTable.from_store(store)
+        return value
+
+    def put(self, key, value):
+        digest = value.get("table_store") if isinstance(value, dict) else None
+        if digest is not None and os.path.exists(columnar_store.store_path(digest)):
+            value = {**value, "table": None}
+        super().put(key, value)
+
+
+def parse_result_nbytes(result):
+    """Approximates the memory a cached parse result holds, for the in-memory tier's bound."""
+    if not isinstance(result, dict):
+        return 0
+    table = result.get("table")
+    return len(result.get("text") or "") + (table.nbytes if table is not None else 0)
+
+
+PARSE_CACHE = TieredCache(
+    LRUCache(PARSE_CACHE_ENTRIES, max_bytes=PARSE_CACHE_MEMORY_BYTES, sizeof=parse_result_nbytes),
+    ParseResultDiskCache(cache_directory("parse"), PARSE_CACHE_MAX_BYTES) if PARSE_CACHE_MAX_BYTES else None,
+)
+
+_executor = None
+
+
+def parse_csv(binary_file, digest=None):
+    """
+    Aggregates a CSV export in one streaming pass without keeping its rows.
+
+    When the upload's content hash is given and no columnar store exists for
+    it yet, the parsed columns are also written to one for later stages.
+
+    Returns:
+        A tuple of (aggregate, table) where aggregate is a MetricAggregate,
+        with distribution sketches, that can be merged with those of other
+        files and table is the file's CampaignTable.
+    """
+    columnar = ColumnarAggregator(columns=TABLE_NUMERIC_COLUMNS)
+    dictionaries = columnar_store.DictionaryColumnAggregator(columns=TABLE_TEXT_COLUMNS)
+    sketches = SketchAggregator()
+    present = PresentColumns(TABLE_NUMERIC_COLUMNS + TABLE_TEXT_COLUMNS)
+    ingest_csv(binary_file, [columnar, dictionaries, sketches, present])
+    # Columns the export lacks are left out rather than zero-filled, so exports can be joined
+    present = set(present.result())
+    table = CampaignTable(
+        {name: values for name, values in columnar.result().items() if name in present},
+        {name: values for name, values in dictionaries.result().items() if name in present},
+    )
+    aggregate = MetricAggregate.from_columns(table.numeric, columnar.invalid_by_column, NUMERIC_COLUMNS)
+    aggregate.sketches = sketches.result()
+    path = columnar_store.store_path(digest) if digest else None
+    if path and not os.path.exists(path):
+        try:
+            columnar_store.write_store(path, table.numeric, table.text)
+            columnar_store.evict_stores()
+        except OSError as e:
+            logger.warning(f"Could not write columnar store {path}: {e}")
+    return aggregate, table
+
+
+def parse_file(path, filename, digest=None, streaming=True):
+    """
+    Parses one spooled upload. Runs inside a pool worker.
+
+    Args:
+        path: Path of the spooled upload.
+        filename: The upload's original file name.
+        digest: The upload's content hash; names the columnar store of a
+            streamed CSV.
+        streaming: Stream CSVs through the aggregators; when False every
+            column of every row is materialized instead (QBR_CSV_STREAMING).
+
+    Returns:
+        A dict with the prompt "text" (empty for CSVs) and, for CSVs, the
+        file's "aggregate" and campaign "table"; None for unsupported file
+        types. Streamed CSVs also name their columnar store in "table_store".
+    """
+    with open(path, 'rb') as binary_file:
+        if filename.endswith(".pdf"):
+            return {"text": extract_pdf_text(binary_file)["text"], "aggregate": None, "table": None}
+        # CSVs reach the prompt through the data digest, so they carry no text
+        if filename.endswith(".csv") and streaming:
+            aggregate, table = parse_csv(binary_file, digest)
+            return {"text": "", "aggregate": aggregate, "table": table, "table_store": digest}
+        if filename.endswith(".csv"):
+            table = CampaignTable.from_rows(iter_csv_rows(binary_file))
+            aggregate = MetricAggregate.from_columns(table.numeric, names=NUMERIC_COLUMNS)
+            return {"text": "", "aggregate": aggregate, "table": table}
+    return None
+
+
+def preview_csv(binary_file, sample_rows=PREVIEW_SAMPLE_ROWS):
+    """
+    Estimates a CSV export from a reservoir sample of its rows.
+
+    Returns:
+        A tuple of (aggregate, table, estimator) where aggregate is the
+        sample's MetricAggregate scaled up to the file's row count, table
+        holds the sampled campaigns weighted up to that row count and
+        estimator is a PreviewEstimator.
+    """
+    rows, population = reservoir_sample_csv(binary_file, sample_rows)
+    if not rows:
+        return MetricAggregate(), CampaignTable(), PreviewEstimator.from_columns({}, population)
+    headers = [name for name in rows[0] if name in TABLE_NUMERIC_COLUMNS or name in TABLE_TEXT_COLUMNS]
+    table = CampaignTable.from_rows(rows, headers)
+    # Group sums over the sample then estimate the whole export's
+    table.weight = population / len(rows)
+    sketches = SketchAggregator()
+    for row in rows:
+        sketches.update(row)
+    aggregate = MetricAggregate.from_columns(table.numeric, names=NUMERIC_COLUMNS)
+    aggregate.sketches = sketches.result()
+    return aggregate.scaled(population), table, PreviewEstimator.from_columns(table.numeric, population)
+
+
+def preview_file(path, filename, sample_rows=PREVIEW_SAMPLE_ROWS):
+    """
+    Parses one spooled upload for a preview. Runs inside a pool worker.
+
+    CSVs are sampled and their result carries an "estimator"; other files
+    are parsed exactly as by parse_file().
+    """
+    if not filename.endswith(".csv"):
+        return parse_file(path, filename)
+    with open(path, 'rb') as binary_file:
+        aggregate, table, estimator = preview_csv(binary_file, sample_rows)
+    return {"text": "", "aggregate": aggregate, "table": table, "estimator": estimator}
+
+
+def parse_cache_key(upload, variant=""):
+    """Builds the parse cache key for a SpooledUpload from its content hash."""
+    extension = os.path.splitext(upload.filename)[1].lower().lstrip(".")
+    return f"v{PARSE_CACHE_VERSION}-{extension}{variant}-{upload.digest}"
+
+
+def _warm_up_worker():
+    return os.getpid()
+
+
+def get_executor():
+    """Returns the shared process pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        logger.info(f"Starting parse pool with {PARSE_WORKERS} workers")
+        _executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    return _executor
+
+
+def warm_up():
+    """Starts every worker process ahead of the first request."""
+    if not PARSE_WORKERS:
+        return
+    executor = get_executor()
+    futures = [executor.submit(_warm_up_worker) for _ in range(PARSE_WORKERS)]
+    wait(futures)
+    logger.info(f"Parse pool warmed up: {sorted({f.result() for f in futures})}")
+
+
+def shutdown():
+    """Stops the worker processes."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def _discard_executor(executor):
+    # A pool whose worker died (e.g. OOM-killed) fails every later call, so it is replaced
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_in_pool(uploads, run):
+    """
+    Runs ``run(upload, executor)`` for every upload concurrently.
+
+    If a worker process dies, the broken pool is shut down and the uploads
+    it failed are retried once in a fresh pool; a pool broken again by the
+    retry is discarded too, so later requests start clean.
+
+    Returns:
+        One result per upload, in order; failed uploads yield the exception.
+    """
+    executor = get_executor() if PARSE_WORKERS else None
+    results = await asyncio.gather(*(run(upload, executor) for upload in uploads), return_exceptions=True)
+    broken = [index for index, result in enumerate(results) if isinstance(result, BrokenProcessPool)]
+    if not broken or executor is None:
+        return results
+    logger.warning(f"Parse pool broke while parsing {len(broken)} file(s); restarting it and retrying")
+    _discard_executor(executor)
+    executor = get_executor()
+    retried = await asyncio.gather(*(run(uploads[index], executor) for index in broken), return_exceptions=True)
+    for index, result in zip(broken, retried):
+        results[index] = result
+    if any(isinstance(result, BrokenProcessPool) for result in retried):
+        _discard_executor(executor)
+    return results
+
+
+async def _parse_pdf(path, filename, executor):
+    extraction = await extract_pdf_text_parallel(path, executor)
+    log_extraction(filename, extraction)
+    return {"text": extraction["text"], "aggregate": None, "table": None}
+
+
+async def _parse_upload(upload, executor, streaming=True):
+    if upload.filename.endswith(".pdf"):
+        return await _parse_pdf(upload.path, upload.filename, executor)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, parse_file, upload.path, upload.filename, upload.digest, streaming)
+
+
+async def _preview_upload(upload, executor, sample_rows=PREVIEW_SAMPLE_ROWS):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, preview_file, upload.path, upload.filename, sample_rows)
+
+
+async def parse_uploads(uploads, streaming=True):
+    """
+    Parses spooled uploads concurrently in the pool.
+
+    PDFs are additionally split into page ranges so a single large report
+    is spread across several workers.
+
+    Args:
+        uploads: List of SpooledUpload objects.
+        streaming: Passed on to parse_file() for CSVs.
+
+    Returns:
+        One parse_file() result per upload, in order; failed files yield the
+        exception instead of a result.
+    """
+    return await _run_in_pool(uploads, functools.partial(_parse_upload, streaming=streaming))
+
+
+async def preview_uploads(uploads, sample_rows=PREVIEW_SAMPLE_ROWS):
+    """
+    Samples spooled uploads concurrently for a preview.
+
+    Runs in the pool, or on the event loop's default thread pool when the
+    pool is disabled.
+
+    Returns:
+        One preview_file() result per upload, in order; failed files yield
+        the exception instead of a result.
+    """
+    return await _run_in_pool(uploads, functools.partial(_preview_upload, sample_rows=sample_rows))
@@ -0,0 +1,168 @@
+"""
+PDF Extraction Module
+
+This module extracts text from uploaded PDF reports. Pages are split into
+ranges that can be extracted by separate workers, page texts are joined once
+at the end, and configurable page and character budgets keep very large
+reports from stalling the server.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+# Extraction budgets; pages or characters beyond them are dropped
+PDF_MAX_PAGES = int(os.getenv("QBR_PDF_MAX_PAGES", "200"))
+PDF_MAX_CHARS = int(os.getenv("QBR_PDF_MAX_CHARS", "500000"))
+# Pages handed to a single worker task
+PDF_PAGES_PER_TASK = int(os.getenv("QBR_PDF_PAGES_PER_TASK", "16"))
+
+
+def count_pages(source):
+    """Returns the number of pages in a PDF path or binary file."""
+    return len(PyPDF2.PdfReader(source).pages)
+
+
+def page_ranges(page_count, max_pages=PDF_MAX_PAGES, pages_per_task=PDF_PAGES_PER_TASK):
+    """Splits the budgeted pages into (start, stop) ranges for workers."""
+    last_page = min(page_count, max_pages)
+    return [(start, min(start + pages_per_task, last_page)) for start in range(0, last_page, pages_per_task)]
+
+
+def extract_page_range(source, start, stop, max_chars=PDF_MAX_CHARS):
+    """
+    Extracts the text of pages [start, stop). Runs inside a pool worker.
+
+    Extraction stops early once the range alone exceeds the character budget,
+    since later pages could never make it into the final text.
+
+    Returns:
+        A list of (page_number, text, seconds) tuples.
+    """
+    return _extract_pages(PyPDF2.PdfReader(source), start, stop, max_chars)
+
+
+def _extract_pages(pdf_reader, start, stop, max_chars):
+    pages = []
+    extracted_chars = 0
+    for page_number in range(start, stop):
+        started = time.perf_counter()
+        text = pdf_reader.pages[page_number].extract_text() or ""
+        pages.append((page_number, text, time.perf_counter() - started))
+        extracted_chars += len(text)
+        if extracted_chars >= max_chars:
+            break
+    return pages
+
+
+def assemble_pages(page_count, chunks, max_chars=PDF_MAX_CHARS):
+    """
+    Joins extracted page ranges into the final text, enforcing the budgets.
+
+    Args:
+        page_count: Total number of pages in the document.
+        chunks: extract_page_range() results, in page order.
+        max_chars: Character budget for the joined text.
+
+    Returns:
+        A dict with "text", "page_count", "pages_extracted", "page_timings"
+        (list of (page_number, seconds)) and "truncated".
+    """
+    texts = []
+    page_timings = []
+    remaining = max_chars
+    truncated = False
+    for chunk in chunks:
+        for page_number, text, seconds in chunk:
+            page_timings.append((page_number, seconds))
+            if remaining <= 0:
+                truncated = True
+                continue
+            if len(text) > remaining:
+                text = text[:remaining]
+                truncated = True
+            texts.append(text)
+            remaining -= len(text)
+    pages_extracted = len(page_timings)
+    if pages_extracted < page_count:
+        truncated = True
+    return {
+        "text": "".join(texts),
+        "page_count": page_count,
+        "pages_extracted": pages_extracted,
+        "page_timings": page_timings,
+        "truncated": truncated,
+    }
+
+
+def log_extraction(filename, extraction):
+    """Logs the page timings of an extraction, slowest pages first."""
+    total_seconds = sum(seconds for _, seconds in extraction["page_timings"])
+    slowest = sorted(extraction["page_timings"], key=lambda timing: timing[1], reverse=True)[:5]
+    logger.info(
+        f"Extracted {extraction['pages_extracted']}/{extraction['page_count']} pages "
+        f"({len(extraction['text'])} chars) from {filename} in {total_seconds:.2f}s of page time; "
+        f"slowest pages: {', '.join(f'{page + 1} ({seconds:.2f}s)' for page, seconds in slowest)}"
+    )
+    if extraction["truncated"]:
+        logger.warning(f"PDF {filename} exceeded the page or character budget and was truncated")
+
+
+def extract_pdf_text(source, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+    """Extracts a PDF in the current process, within the page and character budgets."""
+    pdf_reader = PyPDF2.PdfReader(source)
+    page_count = len(pdf_reader.pages)
+    chunks = []
+    remaining = max_chars
+    for start, stop in page_ranges(page_count, max_pages):
+        if remaining <= 0:
+            break
+        chunk = _extract_pages(pdf_reader, start, stop, remaining)
+        chunks.append(chunk)
+        remaining -= sum(len(text) for _, text, _ in chunk)
+    return assemble_pages(page_count, chunks, max_chars)
+
+
+async def extract_pdf_text_parallel(path, executor, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+    """
+    Extracts a spooled PDF with its page ranges spread across pool workers.
+
+    Ranges are collected in page order; once the character budget is spent,
+    ranges that have not started yet are cancelled.
+
+    Args:
+        path: Path of the spooled PDF on disk.
+        executor: The process pool to run page ranges on.
+        max_pages: Page budget.
+        max_chars: Character budget.
+
+    Returns:
+        The assemble_pages() result.
+    """
+    loop = asyncio.get_running_loop()
+    page_count = await loop.run_in_executor(executor, count_pages, path)
+    futures = [
+        loop.run_in_executor(executor, extract_page_range, path, start, stop, max_chars)
+        for start, stop in page_ranges(page_count, max_pages)
+    ]
+    chunks = []
+    remaining = max_chars
+    try:
+        for future in futures:
+            if remaining <= 0:
+                break
+            chunk = await future
+            chunks.append(chunk)
+            remaining -= sum(len(text) for _, text, _ in chunk)
+    finally:
+        for future in futures:
+            future.cancel()
+            # Retrieve failures of ranges no longer awaited rather than rely on cancel() to silence them
+            if future.done() and not future.cancelled():
+                future.exception()
+    return assemble_pages(page_count, chunks, max_chars)
@@ -270,6 +270,56 @@ class BlueshiftPPTXGenerator:
                     
                     y_pos += 0.7
     
+    def _add_table_slide(self, title, table_data, slide_number, total_slides, client_name=""):
+        """Add a slide holding one structured data table"""
+        headers = table_data.get('headers', [])
+        rows = table_data.get('data', [])
+        if not rows:
+            return
+            
+        slide_layout = self.presentation.slide_layouts[self.slide_layouts['blank']]
+        slide = self.presentation.slides.add_slide(slide_layout)
+        
+        # Add header and footer
+        self._add_header_footer(slide, slide_number, total_slides, client_name)
+        
+        # Slide title
+        title_shape = slide.shapes.add_textbox(
+            Inches(0.5), Inches(1.0),
+            Inches(9), Inches(0.8)
+        )
+        title_p = title_shape.text_frame.paragraphs[0]
+        title_p.text = table_data.get('title') or title
+        title_p.font.name = 'Calibri'
+        title_p.font.size = Pt(24)
+        title_p.font.bold = True
+        title_p.font.color.rgb = BLUESHIFT_BLUE
+        
+        # Table body
+        num_cols = max(len(headers), max(len(row) for row in rows))
+        num_rows = len(rows) + (1 if headers else 0)
+        table = slide.shapes.add_table(
+            num_rows, num_cols,
+            Inches(0.5), Inches(1.9),
+            Inches(9), Inches(min(0.4 * num_rows, 5))
+        ).table
+        
+        all_rows = ([headers] if headers else []) + rows
+        for row_index, row in enumerate(all_rows):
+            for col_index in range(num_cols):
+                cell = table.cell(row_index, col_index)
+                cell.text = str(row[col_index]) if col_index < len(row) else ""
+                paragraph = cell.text_frame.paragraphs[0]
+                paragraph.font.name = 'Calibri'
+                paragraph.font.size = Pt(11)
+                if headers and row_index == 0:
+                    paragraph.font.bold = True
+                    cell.fill.solid()
+                    cell.fill.fore_color.rgb = BLUESHIFT_BLUE
+                    paragraph.font.color.rgb = RGBColor(255, 255, 255)
+                else:
+                    paragraph.font.color.rgb = DARK_GRAY
+    
     def generate_qbr_pptx(self, qbr_data, client_name="", client_website="", industry=""):
         """
         Generate a branded PowerPoint presentation from QBR data
@@ -301,12 +351,18 @@ class BlueshiftPPTXGenerator:
             # Process content slides
             slide_count = 0
             total_slides = len([k for k in qbr_content.keys() if k.startswith('slide')]) + 1  # +1 for title slide
+            # Each structured table gets a slide of its own
+            total_slides += sum(
+                1 for k, slide_data in qbr_content.items() if k.startswith('slide')
+                for table_data in slide_data.get('tables') or []
+                if isinstance(table_data, dict) and table_data.get('data')
+            )
             
             for slide_key in sorted(qbr_content.keys()):
                 if slide_key.startswith('slide'):
                     slide_count += 1
                     slide_data = qbr_content[slide_key]
-                    slide_number = slide_count + 1  # +1 because title slide is slide 1
+                    slide_number = len(self.presentation.slides) + 1
                     
                     title = slide_data.get('title', f'Slide {slide_count}')
                     content = slide_data.get('content', [])
@@ -316,6 +372,11 @@ class BlueshiftPPTXGenerator:
                         self._create_metrics_slide(slide_data, slide_number, total_slides, client_name)
                     else:
                         self._add_content_slide(title, content, slide_number, total_slides, client_name)
+                    
+                    for table_data in slide_data.get('tables') or []:
+                        if isinstance(table_data, dict):
+                            self._add_table_slide(title, table_data, len(self.presentation.slides) + 1, total_slides,
+                                                  client_name)
             
             # Save to BytesIO
             buffer = BytesIO()
@@ -325,7 +386,7 @@ class BlueshiftPPTXGenerator:
             pptx_bytes = buffer.getvalue()
             buffer.close()
             
-            logger.info(f"Successfully generated PowerPoint with {slide_count + 1} slides")
+            logger.info(f"Successfully generated PowerPoint with {len(self.presentation.slides)} slides")
             return pptx_bytes
             
         except Exception as e:
@@ -0,0 +1,189 @@
+"""
+Preview Module
+
+This module backs the fast-preview mode for very large exports. A CSV is
+reservoir-sampled in one pass that only splits lines, never parsing the
+rows it skips, and totals are estimated from the sample with confidence
+intervals. Estimates from several files combine as strata, so their
+variances add up correctly.
+"""
+
+import csv
+import io
+import math
+import os
+import random
+from itertools import islice
+
+from csv_ingest import logical_lines
+
+# Rows kept per file in preview mode
+PREVIEW_SAMPLE_ROWS = int(os.getenv("QBR_PREVIEW_SAMPLE_ROWS", "10000"))
+# Two-sided normal quantile of the reported intervals (95%)
+CONFIDENCE_Z = 1.96
+
+# Columns whose totals are estimated with error bounds
+ESTIMATED_COLUMNS = ('Revenue', 'Purchases')
+
+
+class Estimate(float):
+    """
+    A float carrying the confidence interval of a sample-based estimate.
+
+    It formats and serializes like the exact number it stands in for.
+    """
+
+    def __new__(cls, value, standard_error=0.0, z=CONFIDENCE_Z):
+        estimate = super().__new__(cls, value)
+        estimate.standard_error = standard_error
+        estimate.low = value - z * standard_error
+        estimate.high = value + z * standard_error
+        return estimate
+
+    def __reduce__(self):
+        return Estimate, (float(self), self.standard_error)
+
+    def to_dict(self):
+        return {
+            "value": float(self),
+            "low": self.low,
+            "high": self.high,
+            "standard_error": self.standard_error,
+        }
+
+
+def reservoir_sample_lines(lines, size, rng):
+    """
+    Keeps a uniform random sample of ``size`` lines (Li's Algorithm L).
+
+    Skipped runs are consumed with ``islice`` and counted without being kept.
+
+    Returns:
+        A tuple of (sampled lines, number of lines seen).
+    """
+    reservoir = list(islice(lines, size))
+    seen = len(reservoir)
+    if seen < size or not size:
+        return reservoir, seen
+    weight = math.exp(math.log(rng.random()) / size)
+    while True:
+        skip = int(math.log(rng.random()) / math.log(1 - weight)) if weight < 1 else 0
+        skipped = sum(1 for _ in islice(lines, skip))
+        seen += skipped
+        if skipped < skip:
+            return reservoir, seen
+        line = next(lines, None)
+        if line is None:
+            return reservoir, seen
+        seen += 1
+        reservoir[rng.randrange(size)] = line
+        weight *= math.exp(math.log(rng.random()) / size)
+
+
+def reservoir_sample_csv(binary_file, size=PREVIEW_SAMPLE_ROWS, seed=None, encoding="utf-8-sig"):
+    """
+    Samples rows of a CSV upload uniformly without parsing the rest.
+
+    Args:
+        binary_file: A readable binary file object positioned at the start.
+        size: Number of rows to keep.
+        seed: Optional seed for a reproducible sample.
+        encoding: Text encoding of the upload.
+
+    Returns:
+        A tuple of (rows, population) where rows are dicts keyed by header
+        and population is the number of data rows in the file.
+    """
+    text_file = io.TextIOWrapper(binary_file, encoding=encoding, newline="")
+    try:
+        lines = (line for line in logical_lines(text_file) if line.strip())
+        header = next(csv.reader([next(lines, "")]), [])
+        sampled, population = reservoir_sample_lines(lines, size, random.Random(seed))
+    finally:
+        text_file.detach()
+    rows = [dict(zip(header, fields)) for fields in csv.reader(sampled)]
+    return rows, population
+
+
+class PreviewEstimator:
+    """
+    Estimates population totals from per-file samples.
+
+    Each sampled file is a stratum holding its population size, sample size
+    and the sample sums, sums of squares and cross products of the
+    estimated columns. Estimators merge by concatenating strata.
+    """
+
+    def __init__(self, strata=None):
+        self.strata = strata or []
+
+    @classmethod
+    def from_columns(cls, columns, population, names=ESTIMATED_COLUMNS):
+        """Builds a single-stratum estimator from sampled numeric columns."""
+        names = [name for name in names if name in columns]
+        sample_size = max((len(columns[name]) for name in names), default=0)
+        stratum = {
+            "population": population,
+            "sample_size": sample_size,
+            "sums": {name: math.fsum(columns[name]) for name in names},
+            "products": {
+                (first, second): math.fsum(map(float.__mul__, columns[first], columns[second]))
+                for first in names for second in names
+            },
+        }
+        return cls([stratum])
+
+    def merge(self, other):
+        return PreviewEstimator(self.strata + other.strata)
+
+    __add__ = merge
+
+    @property
+    def population(self):
+        return sum(stratum["population"] for stratum in self.strata)
+
+    @property
+    def sample_size(self):
+        return sum(stratum["sample_size"] for stratum in self.strata)
+
+    def _covariance_of_totals(self, first, second):
+        covariance = 0.0
+        for stratum in self.strata:
+            population, size = stratum["population"], stratum["sample_size"]
+            if size < 2 or size >= population:
+                # A fully sampled stratum is exact
+                continue
+            sums = stratum["sums"]
+            if first not in sums or second not in sums:
+                # The file has no such column, so it adds nothing to the total
+                continue
+            sample_covariance = (
+                stratum["products"][(first, second)] - sums[first] * sums[second] / size
+            ) / (size - 1)
+            covariance += population * population * (1 - size / population) * sample_covariance / size
+        return covariance
+
+    def total(self, name):
+        """Returns the estimated population total of a column."""
+        value = 0.0
+        for stratum in self.strata:
+            if stratum["sample_size"]:
+                value += stratum["population"] * stratum["sums"].get(name, 0.0) / stratum["sample_size"]
+        return Estimate(value, math.sqrt(max(self._covariance_of_totals(name, name), 0.0)))
+
+    def ratio(self, numerator, denominator):
+        """Returns the ratio of two estimated totals, with a linearized interval."""
+        top, bottom = self.total(numerator), self.total(denominator)
+        if not bottom:
+            return Estimate(0.0)
+        value = top / bottom
+        variance = (
+            self._covariance_of_totals(numerator, numerator)
+            + value * value * self._covariance_of_totals(denominator, denominator)
+            - 2 * value * self._covariance_of_totals(numerator, denominator)
+        ) / (bottom * bottom)
+        return Estimate(value, math.sqrt(max(variance, 0.0)))
+
+    def revenue_and_aov(self):
+        """Returns (total_revenue, total_purchases, average_order_value) as Estimates."""
+        return self.total('Revenue'), self.total('Purchases'), self.ratio('Revenue', 'Purchases')
@@ -15,56 +15,19 @@ from blueshift_content_templates import (
     get_roi_projections
 )
 
-def create_qbr_prompt(client_name: str, client_website: str, industry: str, data_analysis: str) -> str:
-    """
-    Creates an enhanced, industry-aware prompt for QBR content generation.
-
-    Args:
-        client_name: The name of the client.
-        client_website: The website of the client.
-        industry: The client's industry.
-        data_analysis: A summary of the client's campaign performance data.
-
-    Returns:
-        A detailed, industry-specific prompt for the AI model.
-    """
-    industry_context = get_industry_context(industry)
-
-    if not industry_context:
-        # Fallback to a generic prompt if industry context is not found
-        return f"""
-Generate a 2nd Quarter Business Review (QBR) presentation content for {client_name} ({client_website}),
-an {industry} company.
-
-The QBR should be structured into 6 slides with a 'title' and 'content' (as a JSON array of strings).
-The slides are:
-1.  **Executive Summary**: High-level overview of the quarter.
-2.  **Performance Review**: Analysis of key metrics and campaign performance.
-3.  **Key Achievements**: Highlight successful campaigns and milestones.
-4.  **Challenges & Opportunities**: Identify areas for improvement and growth.
-5.  **Strategic Recommendations**: Propose actionable strategies for the next quarter.
-6.  **Q3 2025 Outlook**: Set goals and expectations for the upcoming quarter.
-
-Analyze the following data and incorporate it into the presentation:
-{data_analysis}
-"""
-
-    prompt = f"""
-Generate a comprehensive, visually-enhanced 2nd Quarter Business Review (QBR) presentation for {client_name} ({client_website}),
-a leading company in the {industry} sector, leveraging Blueshift's customer engagement platform.
-
-**INDUSTRY CONTEXT: {industry.upper()}**
-- **Key Challenges for this Industry**: {', '.join(industry_context.get('challenges', []))}
-- **Proven Strategies for Success**: {', '.join(industry_context.get('strategies', []))}
-- **Relevant Blueshift Capabilities**: {', '.join(industry_context.get('blueshift_capabilities', []))}
-- **Core KPIs to Focus On**: {', '.join(industry_context.get('kpis', []))}
-
-**PERFORMANCE DATA ANALYSIS:**
-Analyze the following campaign performance data summary. Identify trends, top-performing campaigns,
-and areas with potential for improvement, keeping the industry context in mind.
-{data_analysis}
-
-**BLUESHIFT PLATFORM FOCUS:**
+# Keys of the slides in the generated JSON, in deck order
+SLIDE_KEYS = [f"slide{number}" for number in range(1, 7)]
+
+SLIDE_TITLES = {
+    "slide1": "Executive Summary",
+    "slide2": "Financial Performance",
+    "slide3": "Customer Engagement & Growth",
+    "slide4": "Campaign Performance Analysis",
+    "slide5": "Challenges & Opportunities",
+    "slide6": "Strategic Recommendations",
+}
+
+PLATFORM_FOCUS = """**BLUESHIFT PLATFORM FOCUS:**
 This QBR must demonstrate the exceptional value and ROI of Blueshift's intelligent customer engagement platform.
 Highlight these key differentiators:
 - **AI-Powered Journey Optimization**: Showcase how Blueshift's machine learning automatically optimizes customer journeys
@@ -79,11 +42,9 @@ Highlight these key differentiators:
 - Highlight industry-leading performance benchmarks
 - Demonstrate cost savings through automation and efficiency gains
 - Project future growth potential with continued platform optimization
+"""
 
-**PRESENTATION REQUIREMENTS:**
-Generate the QBR content structured as a JSON object with 6 keys: "slide1", "slide2", ..., "slide6".
-Each slide should have:
-- "title": Clear, engaging slide title
+SLIDE_FORMAT = """- "title": Clear, engaging slide title
 - "content": Array of key narrative points (2-4 bullet points maximum)
 - "metrics": Array of key performance indicators with current/previous period comparisons (when applicable)
 - "summary": Array of key summary points for executive overview (when applicable)
@@ -95,51 +56,43 @@ Each slide should have:
 - Present data in customer-friendly language, avoiding technical jargon
 - Focus on business impact and outcomes rather than just raw metrics
 - Highlight success stories and improvement opportunities
+"""
 
-**SLIDE STRUCTURE:**
-1.  **Executive Summary**:
-    - Overview narrative with key highlights
+SLIDE_OUTLINES = {
+    "slide1": """    - Overview narrative with key highlights
     - Summary table of top 3-4 achievements with quantified impact
-    - Quarter-over-quarter comparison metrics table
-
-2.  **Financial Performance**:
-    - Revenue and profitability narrative
+    - Quarter-over-quarter comparison metrics table""",
+    "slide2": """    - Revenue and profitability narrative
     - Financial metrics comparison table (current vs previous period)
-    - Key financial KPIs with industry benchmark comparisons
-
-3.  **Customer Engagement & Growth**:
-    - Customer acquisition and retention narrative
+    - Key financial KPIs with industry benchmark comparisons""",
+    "slide3": """    - Customer acquisition and retention narrative
     - Customer metrics table showing growth trends
-    - Engagement performance indicators with percentage changes
-
-4.  **Campaign Performance Analysis**:
-    - Top performing campaigns overview
+    - Engagement performance indicators with percentage changes""",
+    "slide4": """    - Top performing campaigns overview
     - Campaign performance comparison table
-    - Channel effectiveness metrics with ROI data
-
-5.  **Challenges & Opportunities**:
+    - Channel effectiveness metrics with ROI data""",
+    "slide5": """    - Ground the challenges in the FINDINGS listed in the performance data (delivery failures, bounce and unsubscribe outliers, revenue concentration) when present
     - Current market challenges analysis with Blueshift's competitive advantages
     - Untapped growth opportunities with quantified revenue potential ($X.XM annually)
     - Platform capability gaps assessment and Blueshift solutions mapping
     - ROI optimization opportunities with specific improvement percentages
-    - Customer engagement evolution possibilities through AI-driven personalization
-
-6.  **Strategic Recommendations**:
-    - Priority initiatives leveraging Blueshift's AI and machine learning capabilities
+    - Customer engagement evolution possibilities through AI-driven personalization""",
+    "slide6": """    - Priority initiatives leveraging Blueshift's AI and machine learning capabilities
     - Personalization acceleration strategies with projected conversion improvements
     - Cross-channel integration roadmap for unified customer experiences
     - Investment priorities with specific ROI multiples (3x, 4x, 5x returns)
     - Implementation timeline with quick wins and long-term strategic gains
-    - Success metrics and KPIs for measuring Blueshift platform optimization
-
-**DATA FORMATTING GUIDELINES:**
-- For metrics arrays: {{"name": "Metric Name", "current": "Current Value", "previous": "Previous Value", "change": "+X%" or "-X%"}}
-- For summary arrays: {{"label": "Summary Point", "value": "Key Data/Outcome"}}
-- For tables arrays: {{"title": "Table Title", "headers": ["Col1", "Col2", ...], "data": [["Row1Data1", "Row1Data2"], ...]}}
+    - Success metrics and KPIs for measuring Blueshift platform optimization""",
+}
 
-**SPECIFIC CONTENT EXAMPLES FOR KEY SLIDES:**
+DATA_FORMATTING = """**DATA FORMATTING GUIDELINES:**
+- For metrics arrays: {"name": "Metric Name", "current": "Current Value", "previous": "Previous Value", "change": "+X%" or "-X%"}
+- For summary arrays: {"label": "Summary Point", "value": "Key Data/Outcome"}
+- For tables arrays: {"title": "Table Title", "headers": ["Col1", "Col2", ...], "data": [["Row1Data1", "Row1Data2"], ...]}
+"""
 
-**Slide 5 - Challenges & Opportunities Template:**
+SLIDE_EXAMPLES = {
+    "slide5": """**Slide 5 - Challenges & Opportunities Template:**
 Content should include:
 - "Market Challenges: Rising customer acquisition costs (+X% YoY) and increasing competition present opportunities for AI-driven personalization"
 - "Engagement Opportunity: X% of customers show higher lifetime value with personalized cross-channel journeys - Blueshift's AI unlocks this potential"
@@ -150,9 +103,8 @@ Metrics should include improvements like:
 - Customer Acquisition Cost trends with Blueshift optimization
 - Email engagement rate improvements (target: +25-40%)
 - Customer Lifetime Value increases (target: +20-45%)
-- Marketing automation coverage growth (target: +50-70%)
-
-**Slide 6 - Strategic Recommendations Template:**
+- Marketing automation coverage growth (target: +50-70%)""",
+    "slide6": """**Slide 6 - Strategic Recommendations Template:**
 Content should include:
 - "Immediate Priority: Deploy Blueshift's AI-powered journey orchestration to increase engagement by X% and reduce manual work by X%"
 - "Personalization Acceleration: Leverage Blueshift's real-time CDP for dynamic campaigns delivering 3x higher conversion rates"
@@ -163,8 +115,137 @@ ROI Projections should show:
 - AI Journey Orchestration: 340% ROI with 45% engagement increase
 - Real-Time Personalization: 280% ROI with 35% click rate improvement
 - Predictive Segmentation: 420% ROI with 50% relevance increase
-- Cross-Channel Optimization: 250% ROI with 25% channel synergy improvement
+- Cross-Channel Optimization: 250% ROI with 25% channel synergy improvement""",
+}
+
+
+def _slide_outline(key):
+    number = SLIDE_KEYS.index(key) + 1
+    return f"{number}.  **{SLIDE_TITLES[key]}**:\n{SLIDE_OUTLINES[key]}"
+
+
+def create_shared_context(client_name: str, client_website: str, industry: str, data_analysis: str) -> str:
+    """
+    Creates the part of the QBR prompt every slide shares: the client, the
+    industry context, the performance data and the platform focus.
+
+    Args:
+        client_name: The name of the client.
+        client_website: The website of the client.
+        industry: The client's industry.
+        data_analysis: A summary of the client's campaign performance data.
+
+    Returns:
+        The shared context text.
+    """
+    industry_context = get_industry_context(industry)
+    industry_section = ""
+    if industry_context:
+        industry_section = f"""
+**INDUSTRY CONTEXT: {industry.upper()}**
+- **Key Challenges for this Industry**: {', '.join(industry_context.get('challenges', []))}
+- **Proven Strategies for Success**: {', '.join(industry_context.get('strategies', []))}
+- **Relevant Blueshift Capabilities**: {', '.join(industry_context.get('blueshift_capabilities', []))}
+- **Core KPIs to Focus On**: {', '.join(industry_context.get('kpis', []))}
+"""
+    return f"""
+Generate a comprehensive, visually-enhanced 2nd Quarter Business Review (QBR) presentation for {client_name} ({client_website}),
+a leading company in the {industry} sector, leveraging Blueshift's customer engagement platform.
+{industry_section}
+**PERFORMANCE DATA ANALYSIS:**
+Analyze the following campaign performance data summary. Identify trends, top-performing campaigns,
+and areas with potential for improvement, keeping the industry context in mind.
+{data_analysis}
+
+{PLATFORM_FOCUS}"""
+
+
+def create_qbr_prompt(client_name: str, client_website: str, industry: str, data_analysis: str) -> str:
+    """
+    Creates an enhanced, industry-aware prompt for QBR content generation.
+
+    Args:
+        client_name: The name of the client.
+        client_website: The website of the client.
+        industry: The client's industry.
+        data_analysis: A summary of the client's campaign performance data.
+
+    Returns:
+        A detailed, industry-specific prompt for the AI model.
+    """
+    industry_context = get_industry_context(industry)
+
+    if not industry_context:
+        # Fallback to a generic prompt if industry context is not found
+        return f"""
+Generate a 2nd Quarter Business Review (QBR) presentation content for {client_name} ({client_website}),
+an {industry} company.
+
+The QBR should be structured into 6 slides with a 'title' and 'content' (as a JSON array of strings).
+The slides are:
+1.  **Executive Summary**: High-level overview of the quarter.
+2.  **Performance Review**: Analysis of key metrics and campaign performance.
+3.  **Key Achievements**: Highlight successful campaigns and milestones.
+4.  **Challenges & Opportunities**: Identify areas for improvement and growth.
+5.  **Strategic Recommendations**: Propose actionable strategies for the next quarter.
+6.  **Q3 2025 Outlook**: Set goals and expectations for the upcoming quarter.
+
+Analyze the following data and incorporate it into the presentation:
+{data_analysis}
+"""
+
+    outlines = "\n\n".join(_slide_outline(key) for key in SLIDE_KEYS)
+    examples = "\n\n".join(SLIDE_EXAMPLES.values())
+    return create_shared_context(client_name, client_website, industry, data_analysis) + f"""
+**PRESENTATION REQUIREMENTS:**
+Generate the QBR content structured as a JSON object with 6 keys: "slide1", "slide2", ..., "slide6".
+Each slide should have:
+{SLIDE_FORMAT}
+**SLIDE STRUCTURE:**
+{outlines}
+
+{DATA_FORMATTING}
+**SPECIFIC CONTENT EXAMPLES FOR KEY SLIDES:**
+
+{examples}
 
 Make the presentation executive-ready with clear business impact focus and specific Blueshift value propositions. Ensure the entire output is a single, valid JSON object.
 """
-    return prompt
\ No newline at end of file
+
+
+def create_slide_prompts(client_name: str, client_website: str, industry: str, data_analysis: str) -> dict:
+    """
+    Creates one prompt per slide, for generating the slides concurrently.
+
+    Every prompt starts with the same shared context and differs only in
+    the slide-specific instructions that follow it.
+
+    Args:
+        client_name: The name of the client.
+        client_website: The website of the client.
+        industry: The client's industry.
+        data_analysis: A summary of the client's campaign performance data.
+
+    Returns:
+        A dict of slide key ("slide1" to "slide6") to its prompt.
+    """
+    shared_context = create_shared_context(client_name, client_website, industry, data_analysis)
+    deck = "\n".join(f"{number}. {SLIDE_TITLES[key]}" for number, key in enumerate(SLIDE_KEYS, 1))
+    prompts = {}
+    for number, key in enumerate(SLIDE_KEYS, 1):
+        example = SLIDE_EXAMPLES.get(key)
+        example_section = f"\n**SPECIFIC CONTENT EXAMPLES:**\n\n{example}\n" if example else ""
+        prompts[key] = shared_context + f"""
+**PRESENTATION REQUIREMENTS:**
+The QBR deck has 6 slides, each generated separately:
+{deck}
+Generate only slide {number}, "{SLIDE_TITLES[key]}", and leave the topics of the other slides to them.
+Return a JSON object with the single key "{key}", whose value has:
+{SLIDE_FORMAT}
+**SLIDE STRUCTURE:**
+{_slide_outline(key)}
+
+{DATA_FORMATTING}{example_section}
+Make the slide executive-ready with clear business impact focus and specific Blueshift value propositions. Ensure the entire output is a single, valid JSON object.
+"""
+    return prompts
@@ -0,0 +1,241 @@
+"""
+Result Cache Module
+
+This module provides a two-tier cache for expensive intermediate results:
+an in-memory LRU in front of a size-bounded on-disk store. Entries are
+addressed by string keys (typically content hashes) and evicted least
+recently used first in both tiers.
+
+Disk entries are unpickled, so cache directories must be private to the
+user running the service; anything another user could write there would be
+executed on load.
+"""
+
+import getpass
+import logging
+import os
+import pickle
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _default_cache_dir():
+    # Per user, so the name is not one another local user can claim first
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return os.path.join(tempfile.gettempdir(), f"qbr-cache-{user}")
+
+
+# Root directory for on-disk caches
+CACHE_DIR = os.getenv("QBR_CACHE_DIR") or _default_cache_dir()
+
+_MISSING = object()
+
+
+def ensure_private_directory(path):
+    """
+    Creates a directory only the current user can access, or checks an existing one.
+
+    Group and other permissions on a directory the user owns are removed.
+
+    Raises:
+        PermissionError: If the path is a symlink or not a directory, or is
+            owned by another user.
+
+    Returns:
+        The path.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    status = os.lstat(path)
+    if not stat.S_ISDIR(status.st_mode):
+        raise PermissionError(f"Cache directory {path} is not a directory")
+    if hasattr(os, "getuid"):
+        if status.st_uid != os.getuid():
+            raise PermissionError(f"Cache directory {path} is owned by another user; set QBR_CACHE_DIR")
+        if stat.S_IMODE(status.st_mode) & 0o077:
+            os.chmod(path, 0o700)
+    return path
+
+
+def cache_directory(name):
+    """Returns the private subdirectory ``name`` of CACHE_DIR, creating both."""
+    ensure_private_directory(CACHE_DIR)
+    return ensure_private_directory(os.path.join(CACHE_DIR, name))
+
+
+class LRUCache:
+    """
+    A thread-safe in-memory LRU cache bounded by entry count.
+
+    With ``ttl_seconds``, entries also expire that long after being stored.
+    With ``max_bytes``, the summed ``sizeof(value)`` of the entries is bounded
+    too, and a value larger than the whole bound is not kept at all.
+    """
+
+    def __init__(self, max_entries=128, ttl_seconds=None, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._stored_at = {}
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _discard(self, key):
+        self._entries.pop(key, None)
+        self._stored_at.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+            if self.ttl_seconds is not None and time.monotonic() - self._stored_at[key] > self.ttl_seconds:
+                self._discard(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None and self.sizeof is not None else 0
+        with self._lock:
+            self._discard(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            if self.ttl_seconds is not None:
+                self._stored_at[key] = time.monotonic()
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._discard(next(iter(self._entries)))
+
+    @property
+    def nbytes(self):
+        """The summed size of the cached values, as measured by ``sizeof``."""
+        return self._bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stored_at.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    A pickle-per-entry cache directory bounded by total size in bytes.
+
+    The directory is created private to the current user, and one owned by
+    another user is refused.
+
+    Reads touch the entry's atime, so eviction removes the least recently
+    used files first once the directory grows past ``max_bytes``. The mtime
+    records when an entry was written; with ``ttl_seconds``, entries older
+    than that are treated as missing and removed.
+    """
+
+    def __init__(self, directory, max_bytes=1024 ** 3, suffix=".pickle", ttl_seconds=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.ttl_seconds = ttl_seconds
+        ensure_private_directory(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            written_at = os.stat(path).st_mtime
+            if self.ttl_seconds is not None and time.time() - written_at > self.ttl_seconds:
+                self._remove(path)
+                return default
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path, (time.time(), written_at))
+            return value
+        except FileNotFoundError:
+            return default
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return default
+
+    def put(self, key, value):
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(key))
+        except Exception:
+            self._remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Removes expired entries, then least recently used ones until the size bound holds."""
+        entries = []
+        total_bytes = 0
+        expired_before = time.time() - self.ttl_seconds if self.ttl_seconds is not None else None
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.is_file() and entry.name.endswith(self.suffix):
+                    stat = entry.stat()
+                    if expired_before is not None and stat.st_mtime < expired_before:
+                        self._remove(entry.path)
+                        continue
+                    entries.append((stat.st_atime, stat.st_size, entry.path))
+                    total_bytes += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            total_bytes -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class TieredCache:
+    """An in-memory LRU in front of a DiskCache; disk hits are promoted."""
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key, default=None):
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key, _MISSING)
+            if value is not _MISSING:
+                self.memory.put(key, value)
+                return value
+        return default
+
+    def put(self, key, value):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, value)
+            except Exception as e:
+                logger.warning(f"Could not write cache entry {key} to disk: {e}")
@@ -0,0 +1,298 @@
+"""
+Sketches Module
+
+This module provides mergeable streaming sketches for distribution
+statistics of per-campaign metrics: a KLL quantile sketch for medians and
+tail percentiles and a HyperLogLog for distinct counts. Both are updated
+during ingestion in bounded memory and merge across uploaded files, so the
+statistics never need a second pass over the data.
+"""
+
+import hashlib
+import math
+import os
+import random
+from array import array
+from bisect import bisect_left
+
+from export_schema import REGISTRY
+
+# Per-campaign metrics whose distribution is sketched
+SKETCH_QUANTILE_COLUMNS = ['Unique Open Rate', 'CTOR', 'Revenue per Delivered', 'Orders per Unique Click']
+# Text columns whose distinct values are counted
+SKETCH_DISTINCT_COLUMNS = ['Campaign Segment', 'Campaign Segment UUID']
+# Rows with nothing delivered carry meaningless rates and are left out of the quantiles
+SKETCH_ACTIVE_COLUMN = 'Delivered'
+# Percentiles reported in summaries
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# KLL accuracy parameter; rank error is roughly 1.7 / k
+SKETCH_K = int(os.getenv("QBR_SKETCH_K", "200"))
+# HyperLogLog register count is 2 ** precision; standard error is 1.04 / sqrt(2 ** precision)
+HLL_PRECISION = 12
+
+# Rows buffered as raw strings before being converted in bulk
+DEFAULT_CHUNK_ROWS = 65536
+
+
+class KLLSketch:
+    """
+    A KLL quantile sketch over floats.
+
+    Level ``h`` holds items of weight ``2 ** h``; full levels are sorted and
+    every other item is promoted to the next level. The exact minimum and
+    maximum are kept alongside.
+    """
+
+    def __init__(self, k=SKETCH_K, seed=0):
+        self.k = k
+        self.count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.compactors = [[]]
+        self._random = random.Random(seed)
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def update(self, value):
+        self.compactors[0].append(value)
+        self.count += 1
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, values):
+        """Adds a batch of values."""
+        values = list(values)
+        if not values:
+            return
+        self.compactors[0].extend(values)
+        self.count += len(values)
+        self.minimum = min(self.minimum, min(values))
+        self.maximum = max(self.maximum, max(values))
+        self._size += len(values)
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        while self._size >= self._max_size:
+            for level, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self._grow()
+                    items.sort()
+                    # An odd item out stays behind so the promoted weight is exact
+                    leftover = items.pop() if len(items) % 2 else None
+                    self.compactors[level + 1].extend(items[self._random.randrange(2)::2])
+                    items.clear()
+                    if leftover is not None:
+                        items.append(leftover)
+                    break
+            self._size = sum(len(items) for items in self.compactors)
+
+    def merge(self, other):
+        """Returns a new sketch summarizing both inputs."""
+        merged = KLLSketch(self.k)
+        merged.compactors = [list(items) for items in self.compactors]
+        while len(merged.compactors) < len(other.compactors):
+            merged._grow()
+        merged._max_size = sum(merged._capacity(level) for level in range(len(merged.compactors)))
+        for level, items in enumerate(other.compactors):
+            merged.compactors[level].extend(items)
+        merged.count = self.count + other.count
+        merged.minimum = min(self.minimum, other.minimum)
+        merged.maximum = max(self.maximum, other.maximum)
+        merged._size = sum(len(items) for items in merged.compactors)
+        if merged._size >= merged._max_size:
+            merged._compress()
+        return merged
+
+    __add__ = merge
+
+    def quantiles(self, fractions):
+        """
+        Estimates several quantiles at once.
+
+        Args:
+            fractions: Quantile fractions in [0, 1], e.g. (0.5, 0.9).
+
+        Returns:
+            A list of estimates in the same order; NaN when the sketch is empty.
+        """
+        if not self.count:
+            return [math.nan for _ in fractions]
+        weighted = sorted(
+            (value, 1 << level) for level, items in enumerate(self.compactors) for value in items
+        )
+        total = sum(weight for _, weight in weighted)
+        cumulative = array('d')
+        running = 0
+        for _, weight in weighted:
+            running += weight
+            cumulative.append(running)
+        estimates = []
+        for fraction in fractions:
+            if fraction <= 0:
+                estimates.append(self.minimum)
+            elif fraction >= 1:
+                estimates.append(self.maximum)
+            else:
+                position = min(bisect_left(cumulative, fraction * total), len(weighted) - 1)
+                estimates.append(weighted[position][0])
+        return estimates
+
+    def quantile(self, fraction):
+        return self.quantiles([fraction])[0]
+
+
+class HyperLogLog:
+    """A HyperLogLog distinct-value counter over strings."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        hashed = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        remaining_bits = 64 - self.precision
+        index = hashed >> remaining_bits
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Returns a new counter over the union of both inputs."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        merged = HyperLogLog(self.precision)
+        merged.registers = bytearray(map(max, self.registers, other.registers))
+        return merged
+
+    __add__ = merge
+
+    def estimate(self):
+        """Returns the estimated number of distinct values added."""
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / math.fsum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * size and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return round(size * math.log(size / zeros))
+        return round(raw)
+
+
+class MetricSketches:
+    """
+    Quantile and distinct-count sketches for one or more exports.
+
+    Like MetricAggregate, sketches merge associatively so per-file results
+    can be folded together.
+    """
+
+    def __init__(self, quantiles=None, distinct=None):
+        self.quantiles = quantiles or {}
+        self.distinct = distinct or {}
+
+    def merge(self, other):
+        """Returns new sketches combining these with ``other``."""
+        quantiles = dict(self.quantiles)
+        for name, sketch in other.quantiles.items():
+            quantiles[name] = quantiles[name] + sketch if name in quantiles else sketch
+        distinct = dict(self.distinct)
+        for name, counter in other.distinct.items():
+            distinct[name] = distinct[name] + counter if name in distinct else counter
+        return MetricSketches(quantiles, distinct)
+
+    __add__ = merge
+
+    def summary(self, percentiles=PERCENTILES):
+        """
+        Returns {"distributions": {column: {"count", "p50", ...}}, "distinct": {column: estimate}}.
+        """
+        distributions = {}
+        for name, sketch in self.quantiles.items():
+            estimates = sketch.quantiles(percentiles)
+            distribution = {"count": sketch.count}
+            for fraction, estimate in zip(percentiles, estimates):
+                distribution[f"p{fraction * 100:g}"] = estimate
+            distributions[name] = distribution
+        return {
+            "distributions": distributions,
+            "distinct": {name: counter.estimate() for name, counter in self.distinct.items()},
+        }
+
+
+class SketchAggregator:
+    """
+    Feeds ingested rows into quantile and distinct-count sketches.
+
+    Metric cells are buffered and converted in bulk with the schema
+    registry's converters; unparseable cells and rows without deliveries are
+    left out of the quantile sketches.
+    """
+
+    def __init__(self, quantile_columns=None, distinct_columns=None, active_column=SKETCH_ACTIVE_COLUMN,
+                 k=SKETCH_K, chunk_rows=DEFAULT_CHUNK_ROWS, registry=REGISTRY):
+        self.quantile_columns = list(SKETCH_QUANTILE_COLUMNS if quantile_columns is None else quantile_columns)
+        self.distinct_columns = list(SKETCH_DISTINCT_COLUMNS if distinct_columns is None else distinct_columns)
+        self.active_column = active_column
+        self.columns = self.quantile_columns + self.distinct_columns + ([active_column] if active_column else [])
+        self.chunk_rows = chunk_rows
+        self.registry = registry
+        self.sketches = {name: KLLSketch(k) for name in self.quantile_columns}
+        self.counters = {name: HyperLogLog() for name in self.distinct_columns}
+        self._buffered_columns = self.quantile_columns + ([active_column] if active_column else [])
+        self._buffers = {name: [] for name in self._buffered_columns}
+        self._buffered = 0
+        self._present = None
+
+    def update(self, row):
+        if self._present is None:
+            self._present = {name for name in self.columns if name in row}
+        for name in self._buffered_columns:
+            self._buffers[name].append(row.get(name))
+        for name, counter in self.counters.items():
+            value = row.get(name)
+            if value:
+                counter.add(value)
+        self._buffered += 1
+        if self._buffered >= self.chunk_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        active = None
+        if self.active_column and (self._present is None or self.active_column in self._present):
+            active, _ = self.registry.convert(self.active_column, self._buffers[self.active_column])
+        for name in self.quantile_columns:
+            values, mask = self.registry.convert(name, self._buffers[name])
+            if active is None:
+                selected = [value for value, bad in zip(values, mask) if not bad]
+            else:
+                selected = [value for value, bad, delivered in zip(values, mask, active) if not bad and delivered > 0]
+            self.sketches[name].extend(selected)
+        for values in self._buffers.values():
+            values.clear()
+        self._buffered = 0
+
+    def result(self):
+        self._flush()
+        # Columns the export lacks would only sketch zero-filled cells
+        present = self.columns if self._present is None else self._present
+        return MetricSketches(
+            {name: sketch for name, sketch in self.sketches.items() if name in present},
+            {name: counter for name, counter in self.counters.items() if name in present},
+        )
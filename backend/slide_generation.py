@@ -0,0 +1,103 @@
+"""
+Slide Generation Module
+
+This module generates a QBR one slide at a time. Each slide's sub-prompt,
+the shared context followed by that slide's instructions, is sent
+concurrently up to a limit, and the returned slide objects are merged back
+into the usual slide1..slide6 shape. Wall-clock time approaches that of the
+slowest single slide, and a slide whose response is unusable is retried on
+its own.
+"""
+
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Slide requests in flight at once per QBR, within the LLM client's own cap
+SLIDE_CONCURRENCY = int(os.getenv("QBR_SLIDE_CONCURRENCY", "6"))
+# Extra attempts for a slide whose response cannot be parsed
+SLIDE_RETRIES = int(os.getenv("QBR_SLIDE_RETRIES", "1"))
+
+
+def slide_from_response(key, content):
+    """
+    Picks the slide object out of a parsed sub-prompt response.
+
+    Accepts {"slideN": {...}} as asked for, or a bare slide object with a
+    "title"; returns None for anything else.
+    """
+    if not isinstance(content, dict):
+        return None
+    slide = content.get(key)
+    if isinstance(slide, dict):
+        return slide
+    if "title" in content:
+        return content
+    return None
+
+
+async def generate_slide(client, key, prompt, parse, semaphore, retries=SLIDE_RETRIES, use_cache=True, generation_config=None):
+    """
+    Generates one slide, retrying it alone when its response is unusable.
+
+    Args:
+        client: An LLMClient.
+        key: The slide key, e.g. "slide3".
+        prompt: The slide's sub-prompt.
+        parse: Callable turning the response text into a JSON object.
+        semaphore: Limits the slides of one QBR in flight.
+        retries: Extra attempts after the first.
+        use_cache: False to bypass the response cache. Retries always
+            bypass it; an unusable response is never cached.
+        generation_config: Optional generation config for the calls.
+
+    Returns:
+        The slide dict, or None when every attempt failed.
+    """
+    def parse_slide(text):
+        slide = slide_from_response(key, parse(text))
+        if slide is None:
+            raise ValueError(f"Response for {key} holds no slide object")
+        return slide
+
+    async with semaphore:
+        for attempt in range(retries + 1):
+            try:
+                # Only responses holding the slide are cached
+                return await client.generate_text(
+                    prompt, generation_config=generation_config, use_cache=use_cache and attempt == 0,
+                    parse=parse_slide,
+                )
+            except Exception as e:
+                logger.warning(f"Generating {key} failed (attempt {attempt + 1}): {e}")
+    return None
+
+
+async def generate_slides(client, prompts, parse, concurrency=SLIDE_CONCURRENCY, retries=SLIDE_RETRIES, use_cache=True, generation_config=None):
+    """
+    Generates every slide concurrently and merges them in deck order.
+
+    Args:
+        client: An LLMClient.
+        prompts: Dict of slide key to sub-prompt, in deck order.
+        parse: Callable turning a response text into a JSON object.
+        concurrency: Maximum slides in flight at once.
+        retries: Extra attempts per slide.
+        use_cache: False to bypass the response cache.
+        generation_config: Optional generation config for the calls.
+
+    Returns:
+        A dict of slide key to slide object; slides that failed every
+        attempt are left out.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    slides = await asyncio.gather(*(
+        generate_slide(client, key, prompt, parse, semaphore, retries, use_cache, generation_config)
+        for key, prompt in prompts.items()
+    ))
+    failed = [key for key, slide in zip(prompts, slides) if slide is None]
+    if failed:
+        logger.error(f"Slides left out after {retries + 1} attempts: {failed}")
+    return {key: slide for key, slide in zip(prompts, slides) if slide is not None}
@@ -0,0 +1,80 @@
+"""
+Upload Spool Module
+
+This module copies uploaded files to disk in a single streaming pass while
+computing their size and a BLAKE2 content hash on the fly. Parsers then get
+a seekable handle (or the path, for pool workers) without a second read of
+the upload, and the hash serves as a cache key for later stages.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from mapped_csv import MappedCSV
+
+# Bytes read from the upload per chunk while spooling
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+class SpooledUpload:
+    """An upload spooled to disk, with its size and content hash."""
+
+    def __init__(self, filename, content_type, path, size, digest, file):
+        self.filename = filename
+        self.content_type = content_type
+        self.path = path
+        self.size = size
+        self.digest = digest
+        self.file = file
+
+    def open_mapped(self):
+        """Opens the spooled CSV for lazy, random-access reads."""
+        return MappedCSV(self.path)
+
+    def close(self):
+        self.file.close()
+
+
+def _write_chunk(spooled, hasher, chunk):
+    hasher.update(chunk)
+    spooled.write(chunk)
+
+
+def _rewind(spooled):
+    spooled.flush()
+    spooled.seek(0)
+
+
+async def spool_upload(upload, spool_dir):
+    """
+    Streams an UploadFile to disk, hashing it as it goes.
+
+    Hashing and disk writes run in a worker thread, so a large upload does
+    not block the event loop between reads.
+
+    Args:
+        upload: A FastAPI UploadFile.
+        spool_dir: Directory to write the spooled copy to.
+
+    Returns:
+        A SpooledUpload whose file handle is rewound to the start.
+    """
+    hasher = hashlib.blake2b(digest_size=32)
+    size = 0
+    handle, path = tempfile.mkstemp(dir=spool_dir)
+    spooled = os.fdopen(handle, 'w+b')
+    try:
+        while True:
+            chunk = await upload.read(SPOOL_CHUNK_SIZE)
+            if not chunk:
+                break
+            await asyncio.to_thread(_write_chunk, spooled, hasher, chunk)
+            size += len(chunk)
+        await asyncio.to_thread(_rewind, spooled)
+    except Exception:
+        spooled.close()
+        raise
+    return SpooledUpload(upload.filename, upload.content_type, path, size, hasher.hexdigest(), spooled)
+
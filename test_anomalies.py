@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the campaign anomaly detection
+"""
+import os
+import sys
+from array import array
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from anomalies import detect_anomalies, format_findings, robust_z_scores
+from campaign_table import CampaignTable
+from csv_ingest import iter_csv_rows
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def load_table():
+    with open(SAMPLE_CSV, 'rb') as f:
+        return CampaignTable.from_rows(iter_csv_rows(f))
+
+
+def make_table(rows):
+    names = [row.pop('Campaign') for row in rows]
+    numeric = {name: array('d', [row[name] for row in rows]) for name in rows[0]}
+    text = {
+        'Campaign': (array('I', range(len(names))), names),
+        'Campaign Type': (array('I', [0] * len(names)), ['One Time Send']),
+    }
+    return CampaignTable(numeric, text)
+
+
+def test_robust_z_scores():
+    """A single extreme value should stand out without inflating the spread"""
+    scores = robust_z_scores([1.0, 1.1, 0.9, 1.0, 1.05, 0.95, 10.0])
+    assert scores[-1] > 20
+    assert all(abs(score) < 1.5 for score in scores[:-1])
+    assert robust_z_scores([2.0, 2.0, 2.0]) == [0.0, 0.0, 0.0]
+    assert robust_z_scores([0.0, 0.0, 0.0, 0.0, 1.0])[-1] > 0
+    assert robust_z_scores([]) == []
+
+
+def test_sample_export_findings():
+    """The [Tagger] rows and the sample's outliers should be flagged"""
+    findings = detect_anomalies([load_table()])
+    undelivered = [finding["campaign"] for finding in findings if finding["kind"] == "zero_delivered"]
+    assert undelivered == ['[Tagger] T1 Members', '[Tagger] T1 Downgraded']
+    spikes = [finding for finding in findings if finding["kind"] == "bounce_spike"]
+    assert spikes and spikes[0]["campaign"] == 'Welcome Series V2'
+    assert all(finding["score"] >= 3.5 for finding in spikes)
+    concentration = [finding for finding in findings if finding["kind"] == "revenue_concentration"]
+    assert concentration[0]["campaign"] == 'Abandoned Cart'
+
+
+def test_synthetic_outliers_and_limits():
+    """Unsubscribe outliers are scored only above the volume floor"""
+    rows = [{'Campaign': f"Send {n}", 'Sends': 10000.0, 'Delivered': 9900.0, 'Bounces': 10.0 + n % 3,
+             'Unsubscribes': 5.0 + n % 2, 'Revenue': 100.0} for n in range(20)]
+    rows.append({'Campaign': 'Noisy', 'Sends': 10000.0, 'Delivered': 9900.0, 'Bounces': 10.0,
+                 'Unsubscribes': 300.0, 'Revenue': 100.0})
+    rows.append({'Campaign': 'Tiny', 'Sends': 50.0, 'Delivered': 40.0, 'Bounces': 10.0,
+                 'Unsubscribes': 30.0, 'Revenue': 100.0})
+    findings = detect_anomalies([make_table(rows)])
+    flagged = {(finding["kind"], finding["campaign"]) for finding in findings}
+    assert ('unsubscribe_outlier', 'Noisy') in flagged
+    assert not any(campaign == 'Tiny' for _, campaign in flagged)
+    assert not any(kind == 'revenue_concentration' for kind, _ in flagged)
+
+    lines = format_findings(findings * 3, limit=2)
+    assert sum(1 for line in lines if 'Noisy' in line) == 2
+    assert lines[-1].startswith("- (1 more")
+
+
+if __name__ == "__main__":
+    test_robust_z_scores()
+    test_sample_export_findings()
+    test_synthetic_outliers_and_limits()
+    print("✅ All anomaly detection tests passed!")
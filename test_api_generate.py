@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Test script for the /api/generate endpoints with a scripted model
+"""
+import asyncio
+import json
+import os
+import signal
+import sys
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+# main needs a key at import time; parsing stays in-process and caches in a scratch directory
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+os.environ.setdefault("QBR_PARSE_WORKERS", "0")
+os.environ.setdefault("QBR_CACHE_DIR", tempfile.mkdtemp(prefix="qbr-test-cache-"))
+
+from fastapi.testclient import TestClient
+
+import main
+from csv_ingest import iter_csv_rows
+from llm_client import LLMClient
+from result_cache import LRUCache
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+QBR = {
+    "slide1": {"title": "Executive Summary", "content": ["Revenue {grew} strongly"]},
+    "slide2": {"title": "Financial Performance", "content": ["Revenue: 1234567.5"]},
+    "slide3": {"title": "Customer Engagement & Growth", "content": []},
+    "slide4": {"title": "Campaign Performance Analysis", "content": [],
+               "tables": [{"title": "Model table", "headers": ["a"], "data": [["1"]]}]},
+    "slide5": {"title": "Challenges & Opportunities", "content": []},
+    "slide6": {"title": "Strategic Recommendations", "content": []},
+}
+
+
+class Response:
+    """Mimics the SDK response object"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class ScriptedModel:
+    """Returns the same QBR JSON for every prompt, streamed in small chunks"""
+
+    model_name = "models/scripted"
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        if stream:
+            return iter([Response(self.text[start:start + 40]) for start in range(0, len(self.text), 40)])
+        return Response(self.text)
+
+
+def post(client, path, model, cache=None, **form):
+    main.llm = LLMClient(model, cache=cache)
+    with open(SAMPLE_CSV, 'rb') as f:
+        files = [("customer_data_files", ("sample.csv", f, "text/csv"))]
+        data = {"client_name": "Acme", "client_website": "acme.com", "industry": "E-Commerce", **form}
+        return client.post(path, data=data, files=files)
+
+
+def read_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_adds_breakdown_tables_once():
+    """The slide event and the complete event should carry the same slide4 tables"""
+    with TestClient(main.app) as client:
+        response = post(client, "/api/generate/stream", ScriptedModel("```json\n" + json.dumps(QBR) + "\n```"))
+    assert response.status_code == 200
+    events = read_events(response.text)
+    assert [event for event, _ in events] == ["metrics"] + ["slide"] * 6 + ["complete"]
+    streamed = {data["slide"]: data["content"] for event, data in events if event == "slide"}
+    complete = json.loads(events[-1][1]["qbr_content"])
+    titles = [table["title"] for table in complete["slide4"]["tables"]]
+    assert len(titles) == len(set(titles)) > 1
+    assert titles[-1] == "Model table"
+    assert streamed["slide4"] == complete["slide4"]
+    assert streamed["slide2"] == complete["slide2"]
+    assert complete["slide1"]["content"] == ["Revenue {grew} strongly"]
+
+
+def test_generate_returns_parsed_slides():
+    """/api/generate should parse the model JSON once and add the breakdowns"""
+    with TestClient(main.app) as client:
+        response = post(client, "/api/generate", ScriptedModel("Here you go: " + json.dumps(QBR)), use_cache="false")
+    body = response.json()
+    content = json.loads(body["qbr_content"])
+    assert list(content) == list(QBR)
+    assert body["total_revenue"] > 0
+    assert len(content["slide4"]["tables"]) > 1
+
+
+def test_malformed_response_is_not_served_from_cache():
+    """A truncated response should fail once and be regenerated on the next request"""
+    class TruncatedOnceModel(ScriptedModel):
+        def generate_content(self, prompt, stream=False, **kwargs):
+            response = super().generate_content(prompt, stream, **kwargs)
+            return Response(self.text[:-10]) if self.calls == 1 else response
+
+    model = TruncatedOnceModel(json.dumps(QBR))
+    cache = LRUCache()
+    with TestClient(main.app) as client:
+        assert post(client, "/api/generate", model, cache).json()["error"] == "JSONDecodeError"
+        assert list(json.loads(post(client, "/api/generate", model, cache).json()["qbr_content"])) == list(QBR)
+        assert list(json.loads(post(client, "/api/generate", model, cache).json()["qbr_content"])) == list(QBR)
+    assert model.calls == 2
+
+
+def test_parse_cache_stays_off_the_event_loop():
+    """Parse cache lookups and stores should run in worker threads, not on the event loop"""
+    class RecordingCache(LRUCache):
+        def __init__(self):
+            super().__init__()
+            self.calls = []
+
+        def _record(self, name):
+            try:
+                asyncio.get_running_loop()
+                self.calls.append((name, "loop"))
+            except RuntimeError:
+                self.calls.append((name, "thread"))
+
+        def get(self, key, default=None):
+            self._record("get")
+            return super().get(key, default)
+
+        def put(self, key, value):
+            self._record("put")
+            super().put(key, value)
+
+    cache, main.parse_pool.PARSE_CACHE = main.parse_pool.PARSE_CACHE, RecordingCache()
+    try:
+        with TestClient(main.app) as client:
+            assert post(client, "/api/generate", ScriptedModel(json.dumps(QBR)), use_cache="false").status_code == 200
+        calls = main.parse_pool.PARSE_CACHE.calls
+    finally:
+        main.parse_pool.PARSE_CACHE = cache
+    assert calls == [("get", "thread"), ("put", "thread")]
+
+
+def test_generate_recovers_from_a_killed_parse_worker():
+    """A worker killed mid-life (e.g. by the OOM killer) should not fail later requests"""
+    pool = main.parse_pool
+    workers, pool.PARSE_WORKERS = pool.PARSE_WORKERS, 1
+    # A cached parse would never reach the pool
+    cache, pool.PARSE_CACHE = pool.PARSE_CACHE, LRUCache()
+    try:
+        with TestClient(main.app) as client:
+            worker = pool.get_executor().submit(os.getpid).result()
+            os.kill(worker, signal.SIGKILL)
+            body = post(client, "/api/generate", ScriptedModel(json.dumps(QBR)), use_cache="false").json()
+        assert "error" not in body
+        assert body["total_revenue"] > 0
+        assert pool.get_executor().submit(os.getpid).result() != worker
+    finally:
+        pool.shutdown()
+        pool.PARSE_CACHE = cache
+        pool.PARSE_WORKERS = workers
+
+
+def test_failed_preview_schedules_no_exact_pass():
+    """A preview that fails should not start the background exact pass or its LLM call"""
+    def failing(error, raises):
+        async def preview_uploads(uploads, sample_rows=None):
+            if raises:
+                raise error
+            return [error for _ in uploads]
+        return preview_uploads
+
+    preview_uploads = main.parse_pool.preview_uploads
+    try:
+        for raises in (True, False):
+            main.parse_pool.preview_uploads = failing(ValueError("bad sample"), raises)
+            model = ScriptedModel(json.dumps(QBR))
+            jobs = len(main.PREVIEW_JOBS)
+            with TestClient(main.app) as client:
+                body = post(client, "/api/generate", model, preview="true", use_cache="false").json()
+            assert "job_id" not in body
+            assert len(main.PREVIEW_JOBS) == jobs
+            # Only the preview's own generation, when it got that far
+            assert model.calls == (0 if raises else 1)
+    finally:
+        main.parse_pool.preview_uploads = preview_uploads
+
+    with TestClient(main.app) as client:
+        body = post(client, "/api/generate", ScriptedModel(json.dumps(QBR)), preview="true", use_cache="false").json()
+    assert "job_id" in body
+
+
+def lookup(client, campaign_uuid):
+    with open(SAMPLE_CSV, 'rb') as f:
+        files = [("customer_data_files", ("sample.csv", f, "text/csv"))]
+        return client.post("/api/campaigns/lookup", data={"campaign_uuid": campaign_uuid}, files=files)
+
+
+def test_campaign_lookup_reads_the_spooled_export():
+    """/api/campaigns/lookup should return a campaign's row by UUID, and 404 for unknown ones"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        rows = list(iter_csv_rows(f))
+    with TestClient(main.app) as client:
+        found = lookup(client, rows[10]['Campaign UUID'])
+        missing = lookup(client, "no-such-campaign")
+    assert found.status_code == 200
+    assert found.json()["rows"] == [{"file": "sample.csv", "row": 10, "fields": rows[10]}]
+    assert missing.status_code == 404
+
+
+if __name__ == "__main__":
+    test_stream_adds_breakdown_tables_once()
+    test_generate_returns_parsed_slides()
+    test_malformed_response_is_not_served_from_cache()
+    test_parse_cache_stays_off_the_event_loop()
+    test_generate_recovers_from_a_killed_parse_worker()
+    test_failed_preview_schedules_no_exact_pass()
+    test_campaign_lookup_reads_the_spooled_export()
+    print("✅ All API generate tests passed!")
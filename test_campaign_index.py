@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test script for the campaign index and ranking queries
+"""
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_index import CampaignIndex
+from campaign_table import CampaignTable
+from csv_ingest import iter_csv_rows
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def load_table():
+    with open(SAMPLE_CSV, 'rb') as f:
+        return CampaignTable.from_rows(iter_csv_rows(f))
+
+
+def test_top_and_bottom_match_full_sort():
+    """Heap selection should agree with sorting every campaign"""
+    table = load_table()
+    index = CampaignIndex([table])
+    by_revenue = sorted(table, key=lambda row: row['Revenue'], reverse=True)
+    assert [row['Campaign UUID'] for row in index.top('Revenue', 10)] == \
+        [row['Campaign UUID'] for row in by_revenue[:10]]
+
+    event_triggered = [row for row in table if row['Campaign Type'] == 'Event Triggered' and row['Delivered'] > 0]
+    expected = sorted(event_triggered, key=lambda row: row['Unique Click %'])[:5]
+    bottom = index.bottom('Unique Click %', 5, where={'Campaign Type': 'Event Triggered'},
+                          predicate=lambda row: row['Delivered'] > 0)
+    assert [row['Unique Click %'] for row in bottom] == [row['Unique Click %'] for row in expected]
+
+
+def test_index_spans_multiple_tables():
+    """Lookups and rankings should cover every indexed export"""
+    first, second = load_table(), load_table()
+    index = CampaignIndex([first, second])
+    assert len(index) == 2 * len(first)
+    uuid = first[7]['Campaign UUID']
+    assert index.get(uuid)['Campaign'] == first[7]['Campaign']
+    assert index.get('no-such-campaign') is None
+    top = index.top('Revenue', 2)
+    assert top[0]['Revenue'] == top[1]['Revenue'] == max(first.numeric['Revenue'])
+    assert sorted(index.values('Campaign Type')) == sorted({row['Campaign Type'] for row in first})
+
+
+if __name__ == "__main__":
+    test_top_and_bottom_match_full_sort()
+    test_index_spans_multiple_tables()
+    print("✅ All campaign index tests passed!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar campaign metrics engine
+"""
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_metrics import ColumnarAggregator, MetricAggregate, summarize_columns
+from csv_ingest import ingest_csv
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def test_summarize_sample_export():
+    """Totals and KPIs should be derived from summed counts"""
+    columnar = ColumnarAggregator(chunk_rows=10)
+    with open(SAMPLE_CSV, 'rb') as f:
+        row_count = ingest_csv(f, [columnar])
+    summary = summarize_columns(columnar.result())
+
+    assert summary["row_count"] == row_count
+    totals = summary["totals"]
+    assert totals['Sends'] > totals['Delivered'] > 0
+    assert summary["kpis"]["delivery_rate"] == totals['Delivered'] / totals['Sends']
+    assert summary["kpis"]["average_order_value"] == totals['Revenue'] / totals['Purchases']
+
+
+def test_bad_cells_are_zero_filled():
+    """Non-numeric cells should be masked without dropping the rest of the column"""
+    columnar = ColumnarAggregator(columns=['Sends'])
+    for value in ['10', 'none', 'bad', '5']:
+        columnar.update({'Sends': value})
+    columnar.update({})
+    arrays = columnar.result()
+    assert list(arrays['Sends']) == [10.0, 0.0, 0.0, 5.0, 0.0]
+    assert list(columnar.masks['Sends']) == [0, 0, 1, 0, 0]
+    assert columnar.invalid_cells == 1
+
+
+def test_merged_aggregates_match_single_pass():
+    """Folding per-file partials should equal aggregating everything at once"""
+    rows = [{'Revenue': str(r), 'Purchases': str(p)} for r, p in [(100, 2), (50, 1), (0, 0), (30, 3)]]
+    columns = ['Revenue', 'Purchases']
+
+    def aggregate(chunk):
+        columnar = ColumnarAggregator(columns=columns)
+        for row in chunk:
+            columnar.update(row)
+        return MetricAggregate.from_aggregator(columnar)
+
+    whole = aggregate(rows)
+    merged = sum([aggregate(rows[:1]), aggregate(rows[1:3]), aggregate(rows[3:])], MetricAggregate())
+
+    assert merged.summary() == whole.summary()
+    assert merged.revenue_and_aov() == (180.0, 6, 30.0)
+    assert merged.minimums['Revenue'] == 0.0
+    assert merged.maximums['Purchases'] == 3.0
+
+
+if __name__ == "__main__":
+    test_summarize_sample_export()
+    test_bad_cells_are_zero_filled()
+    test_merged_aggregates_match_single_pass()
+    print("✅ All campaign metrics tests passed!")
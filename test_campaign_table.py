@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for the compact campaign table
+"""
+import os
+import pickle
+import sys
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_table import CampaignTable
+from columnar_store import ColumnarStore, write_store
+from csv_ingest import iter_csv_rows
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def load_rows():
+    with open(SAMPLE_CSV, 'rb') as f:
+        return list(iter_csv_rows(f))
+
+
+def test_rows_behave_like_csv_dicts():
+    """Callers iterating rows with .get() should see the same values"""
+    rows = load_rows()
+    table = CampaignTable.from_rows(rows)
+    assert len(table) == len(rows)
+    for row, original in zip(table, rows):
+        assert row['Campaign'] == original['Campaign']
+        assert row.get('Revenue', 0) == float(original['Revenue'])
+        assert row.get('missing column', 'default') == 'default'
+    assert table[-1]['Campaign UUID'] == rows[-1]['Campaign UUID']
+
+
+def test_repeated_strings_are_stored_once():
+    """Text columns keep one copy of each distinct value"""
+    rows = load_rows()
+    table = CampaignTable.from_rows(rows)
+    codes, values = table.text['Campaign Segment']
+    assert len(codes) == len(rows)
+    assert len(values) == len({row['Campaign Segment'] for row in rows})
+
+
+def test_store_backed_table_pickles():
+    """A table over an mmap store can still be pickled for the parse cache"""
+    table = CampaignTable.from_rows(load_rows())
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sample.qbrc")
+        write_store(path, table.numeric, table.text)
+        store = ColumnarStore(path)
+        mapped = CampaignTable.from_store(store)
+        restored = pickle.loads(pickle.dumps(mapped))
+        # Compared via repr since missing dates are NaN
+        assert repr(list(restored)) == repr(list(table))
+        del mapped
+        store.close()
+
+
+if __name__ == "__main__":
+    test_rows_behave_like_csv_dicts()
+    test_repeated_strings_are_stored_once()
+    test_store_backed_table_pickles()
+    print("✅ All campaign table tests passed!")
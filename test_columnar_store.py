@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for the memory-mapped columnar store
+"""
+import os
+import sys
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_metrics import ColumnarAggregator
+from columnar_store import ColumnarStore, DictionaryColumnAggregator, write_store
+from csv_ingest import iter_csv_rows
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def test_store_round_trip():
+    """Columns read back through mmap should match the parsed export"""
+    numeric = ColumnarAggregator()
+    dictionaries = DictionaryColumnAggregator()
+    with open(SAMPLE_CSV, 'rb') as f:
+        rows = list(iter_csv_rows(f))
+    for row in rows:
+        numeric.update(row)
+        dictionaries.update(row)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sample.qbrc")
+        write_store(path, numeric.result(), dictionaries.result())
+
+        store = ColumnarStore(path)
+        assert store.row_count == len(rows)
+        revenue = store.numeric('Revenue')
+        assert revenue.tolist() == [float(row['Revenue']) for row in rows]
+        assert list(store.strings('Campaign Type')) == [row['Campaign Type'] for row in rows]
+        assert len(store.dictionary('Campaign Type')) == len({row['Campaign Type'] for row in rows})
+        revenue.release()
+        store.close()
+
+
+def test_store_rejects_foreign_files():
+    """Opening a file that is not a store should fail loudly"""
+    with tempfile.NamedTemporaryFile(suffix=".qbrc") as f:
+        f.write(b"not a columnar store at all")
+        f.flush()
+        try:
+            ColumnarStore(f.name)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
+
+
+if __name__ == "__main__":
+    test_store_round_trip()
+    test_store_rejects_foreign_files()
+    print("✅ All columnar store tests passed!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming CSV ingestion of Blueshift campaign exports
+"""
+import io
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_metrics import ColumnarAggregator, MetricAggregate
+from csv_ingest import PresentColumns, ingest_csv, iter_csv_rows, iter_projected_rows
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def test_iter_csv_rows_strips_bom():
+    """The first header should come through without the UTF-8 BOM"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        first_row = next(iter_csv_rows(f))
+    assert 'Date' in first_row
+    assert first_row['Campaign'] == '[Tagger] T1 Members'
+
+
+class CountingAggregator:
+    """Counts the rows it is fed"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def update(self, row):
+        self.rows += 1
+
+
+def test_ingest_csv_feeds_every_aggregator():
+    """Every aggregator should see every row in one pass"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        rows = list(iter_csv_rows(f))
+
+    counter = CountingAggregator()
+    present = PresentColumns(['Campaign', 'Revenue', 'not in export'])
+    with open(SAMPLE_CSV, 'rb') as f:
+        row_count = ingest_csv(f, [counter, present])
+
+    assert row_count == counter.rows == len(rows)
+    assert present.result() == ['Campaign', 'Revenue']
+
+
+def test_ingest_csv_matches_full_read():
+    """Streamed, chunked columns and totals should equal those of a fully materialized read"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        rows = list(iter_csv_rows(f))
+    expected = ColumnarAggregator(chunk_rows=len(rows) + 1)
+    for row in rows:
+        expected.update(row)
+
+    # Small chunks so the streamed read converts across several flushes
+    streamed = ColumnarAggregator(chunk_rows=7)
+    with open(SAMPLE_CSV, 'rb') as f:
+        row_count = ingest_csv(f, [streamed])
+
+    assert row_count == len(rows)
+    assert sum(expected.result()['Revenue']) > 0
+    assert streamed.result() == expected.result()
+    assert streamed.masks == expected.masks
+    assert MetricAggregate.from_columns(streamed.result(), streamed.invalid_by_column).revenue_and_aov() == \
+        MetricAggregate.from_columns(expected.result(), expected.invalid_by_column).revenue_and_aov()
+
+
+def test_projected_rows_match_full_rows():
+    """Projection should return exactly the requested columns of each row"""
+    columns = ['Campaign', 'Revenue', 'Unique Soft Bounce %', 'not in export']
+    with open(SAMPLE_CSV, 'rb') as f:
+        full_rows = list(iter_csv_rows(f))
+    with open(SAMPLE_CSV, 'rb') as f:
+        projected = list(iter_projected_rows(f, columns))
+    assert projected == [{name: row[name] for name in columns[:3]} for row in full_rows]
+
+
+def test_projected_rows_handle_quoted_fields():
+    """Quoted commas and newlines should fall back to full CSV parsing"""
+    upload = io.BytesIO(b'Campaign,Sends,Notes\r\n"Spring, Sale",10,x\r\n"Multi\r\nline",5,y\r\nPlain,3\r\n')
+    rows = list(iter_projected_rows(upload, ['Campaign', 'Sends']))
+    assert rows == [
+        {'Campaign': 'Spring, Sale', 'Sends': '10'},
+        {'Campaign': 'Multi\r\nline', 'Sends': '5'},
+        {'Campaign': 'Plain', 'Sends': '3'},
+    ]
+
+
+def test_ingest_csv_leaves_upload_open():
+    """Ingestion must not close the caller's file handle"""
+    upload = io.BytesIO(b"Revenue,Purchases\n10.5,1\n4.5,1\n")
+    counter = CountingAggregator()
+    ingest_csv(upload, [counter])
+    assert not upload.closed
+    assert counter.rows == 2
+
+
+if __name__ == "__main__":
+    test_iter_csv_rows_strips_bom()
+    test_ingest_csv_feeds_every_aggregator()
+    test_ingest_csv_matches_full_read()
+    test_ingest_csv_leaves_upload_open()
+    test_projected_rows_match_full_rows()
+    test_projected_rows_handle_quoted_fields()
+    print("✅ All CSV ingestion tests passed!")
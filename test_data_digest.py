@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for the prompt data digest
+"""
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_index import CampaignIndex
+from campaign_metrics import MetricAggregate
+from campaign_table import CampaignTable
+from csv_ingest import iter_csv_rows
+from data_digest import build_data_digest
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def load_inputs():
+    with open(SAMPLE_CSV, 'rb') as f:
+        table = CampaignTable.from_rows(iter_csv_rows(f))
+    summary = MetricAggregate.from_columns(table.numeric).summary()
+    return summary, CampaignIndex([table])
+
+
+def test_digest_sections():
+    """The digest should carry totals, rates, type breakdown and rankings"""
+    summary, index = load_inputs()
+    digest = build_data_digest(1234.5, 10, 123.45, summary=summary, campaign_index=index,
+                               document_text="Quarterly   notes\nfrom the client")
+    for heading in ["HEADLINE", "TOTALS", "WEIGHTED RATES", "BY CAMPAIGN TYPE", "TOP 5 BY REVENUE",
+                    "BOTTOM 5 BY UNIQUE CLICK RATE", "DOCUMENT EXCERPT"]:
+        assert heading in digest
+    assert "Quarterly notes from the client" in digest
+    assert f"Campaigns {summary['row_count']:,}" in digest
+    for campaign_type in index.values('Campaign Type'):
+        assert f"{campaign_type}: {index.count({'Campaign Type': campaign_type}):,} |" in digest
+    assert abs(sum(index.total('Revenue', {'Campaign Type': campaign_type})
+                   for campaign_type in index.values('Campaign Type')) - index.total('Revenue')) < 1e-6
+
+
+def test_digest_respects_budget():
+    """Sections are dropped in priority order once the budget is spent"""
+    summary, index = load_inputs()
+    document = "word " * 10000
+    for max_chars in (200, 1000, 4000):
+        digest = build_data_digest(1.0, 1, 1.0, summary=summary, campaign_index=index,
+                                   document_text=document, max_chars=max_chars)
+        assert len(digest) <= max_chars
+        assert digest.startswith("HEADLINE")
+    assert "TOTALS" not in build_data_digest(1.0, 1, 1.0, summary=summary, max_chars=60)
+
+
+if __name__ == "__main__":
+    test_digest_sections()
+    test_digest_respects_budget()
+    print("✅ All data digest tests passed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the derived-metric engine
+"""
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_table import CampaignTable
+from csv_ingest import iter_csv_rows
+from derived_metrics import ENGINE, KPI_DEFINITIONS, METRICS_CACHE, DerivedMetric, DerivedMetricEngine, dataset_key
+from export_schema import RATE, REGISTRY
+from group_by import group_by
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def load_table():
+    with open(SAMPLE_CSV, 'rb') as f:
+        return CampaignTable.from_rows(iter_csv_rows(f))
+
+
+def test_definitions_reproduce_export_columns():
+    """Evaluated per campaign, each KPI should match the export's own rate column"""
+    table = load_table()
+    kpis = ENGINE.evaluate({name: list(table.numeric[name]) for name in ENGINE.base_columns})
+    for metric in KPI_DEFINITIONS:
+        if metric.export_column is None or metric.export_column not in table.numeric:
+            continue
+        # The export rounds percentage points to two decimals
+        tolerance = 0.0001 if REGISTRY.column_type(metric.export_column) == RATE else 0.01
+        for row, value in zip(table, kpis[metric.name]):
+            if row['Delivered'] > 0 and row[metric.export_column]:
+                expected = row[metric.export_column]
+                if metric.name == 'orders_per_unique_click':
+                    expected /= 100
+                assert abs(value - expected) <= tolerance + 1e-6 * abs(expected), (metric.name, row['Campaign'])
+
+
+def test_grouped_rates_are_weighted():
+    """Group KPIs come from summed counts, not averaged campaign rates"""
+    table = load_table()
+    grouped = group_by([table], 'Campaign Type')
+    for row in grouped.rows():
+        assert row['click_to_open_rate'] == row['Unique Clicks'] / row['Unique Impressions']
+    totals = ENGINE.evaluate({name: sum(table.numeric[name]) for name in ENGINE.base_columns})
+    assert totals['click_to_open_rate'] == sum(table.numeric['Unique Clicks']) / sum(table.numeric['Unique Impressions'])
+    ranked = grouped.sorted_by('click_to_open_rate')
+    assert ranked.kpis['click_to_open_rate'] == sorted(grouped.kpis['click_to_open_rate'], reverse=True)
+
+
+def test_expressions_and_missing_columns():
+    """Sums in expressions are supported and metrics with missing inputs skipped"""
+    engine = DerivedMetricEngine([
+        DerivedMetric('any_bounce_rate', '(Bounces + Soft Bounces) / Sends'),
+        DerivedMetric('click_rate', 'Clicks / Delivered'),
+    ])
+    assert engine.evaluate({'Bounces': 2.0, 'Soft Bounces': 3.0, 'Sends': 10.0}) == {'any_bounce_rate': 0.5}
+    assert engine.evaluate({'Bounces': [1.0, 0.0], 'Soft Bounces': [1.0, 0.0], 'Sends': [4.0, 0.0]}) == \
+        {'any_bounce_rate': [0.5, 0]}
+    try:
+        DerivedMetric('broken', 'Clicks')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected a ValueError for a non-ratio expression")
+
+
+def test_groupings_cached_per_dataset():
+    """The same dataset and grouping should be computed once"""
+    METRICS_CACHE.clear()
+    table = load_table()
+    dataset = dataset_key(['abc', 'def'])
+    assert dataset == dataset_key(['def', 'abc'])
+    assert dataset_key(['abc', None]) is None
+    first = group_by([table], 'Campaign Type', dataset=dataset)
+    assert group_by([table], 'Campaign Type', dataset=dataset) is first
+    assert group_by([table], 'Campaign Type') is not first
+    assert len(METRICS_CACHE) == 1
+
+
+if __name__ == "__main__":
+    test_definitions_reproduce_export_columns()
+    test_grouped_rates_are_weighted()
+    test_expressions_and_missing_columns()
+    test_groupings_cached_per_dataset()
+    print("✅ All derived metric tests passed!")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for the Blueshift export schema registry
+"""
+import math
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from export_schema import COUNT, DATE, RATE, REGISTRY, TEXT
+
+
+def test_headers_resolve_to_types():
+    """Known headers map to their type, custom event counters default to counts"""
+    assert REGISTRY.column_type('\ufeffDate') == TEXT
+    assert REGISTRY.column_type('Unique Open Rate') == RATE
+    assert REGISTRY.column_type('Campaign Start Date') == DATE
+    assert REGISTRY.column_type('april2025_15off_email') == COUNT
+
+
+def test_bulk_conversion_masks_bad_cells():
+    """Bad cells are flagged in the mask; null tokens are not"""
+    values, mask = REGISTRY.convert('Sends', ['1,200', 'none', 'oops', '7'])
+    assert list(values) == [1200.0, 0.0, 0.0, 7.0]
+    assert list(mask) == [0, 0, 1, 0]
+
+    values, mask = REGISTRY.convert('Click %', ['4.11', '0'])
+    assert [round(value, 6) for value in values] == [0.0411, 0.0]
+
+
+def test_non_finite_cells_are_not_passed_through():
+    """'nan' is a null token and 'inf' a bad cell, on the fast path as well as the slow one"""
+    values, mask = REGISTRY.convert('Revenue', ['12.5', 'nan', '3'])
+    assert list(values) == [12.5, 0.0, 3.0]
+    assert list(mask) == [0, 0, 0]
+
+    values, mask = REGISTRY.convert('Revenue', ['inf', '-Infinity', '1,000'])
+    assert list(values) == [0.0, 0.0, 1000.0]
+    assert list(mask) == [1, 1, 0]
+
+    values, mask = REGISTRY.convert('Click %', ['inf%', '5'])
+    assert list(values) == [0.0, 0.05]
+    assert list(mask) == [1, 0]
+
+
+def test_dates_parse_to_epoch_seconds():
+    """Export dates like '6/10/24 4:00' become UTC epoch seconds"""
+    values, mask = REGISTRY.convert('Campaign End Date', ['6/10/24 4:00', 'none', '13/45/24'])
+    assert values[0] == 1717992000.0
+    assert math.isnan(values[1])
+    assert list(mask) == [0, 0, 1]
+
+
+if __name__ == "__main__":
+    test_headers_resolve_to_types()
+    test_bulk_conversion_masks_bad_cells()
+    test_non_finite_cells_are_not_passed_through()
+    test_dates_parse_to_epoch_seconds()
+    print("✅ All export schema tests passed!")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the campaign group-by engine
+"""
+import math
+import os
+import sys
+from collections import defaultdict
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_table import CampaignTable
+from csv_ingest import iter_csv_rows
+from group_by import UNKNOWN_PERIOD, breakdown_tables, group_by
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def load_table():
+    with open(SAMPLE_CSV, 'rb') as f:
+        return CampaignTable.from_rows(iter_csv_rows(f))
+
+
+def test_group_by_type_matches_row_loop():
+    """Grouped sums should equal a plain per-row accumulation"""
+    table = load_table()
+    grouped = group_by([table], 'Campaign Type', columns=['Sends', 'Revenue'])
+    expected = defaultdict(lambda: [0, 0.0, 0.0])
+    for row in table:
+        totals = expected[row['Campaign Type']]
+        totals[0] += 1
+        totals[1] += row['Sends']
+        totals[2] += row['Revenue']
+    assert sorted(grouped.labels) == sorted(expected)
+    for row in grouped.rows():
+        assert [row['row_count'], row['Sends'], row['Revenue']] == expected[row['label']]
+
+
+def test_groups_merge_across_tables():
+    """Grouping two exports should add up groups with the same label"""
+    table = load_table()
+    single = group_by([table], 'Campaign Segment')
+    double = group_by([table, table], 'Campaign Segment')
+    assert double.labels == single.labels
+    assert double.row_counts == [2 * count for count in single.row_counts]
+    assert double.sums['Revenue'] == [2 * value for value in single.sums['Revenue']]
+
+
+def test_group_by_start_date_periods():
+    """Start dates should bucket into calendar-ordered months and quarters"""
+    table = load_table()
+    months = group_by([table], 'Campaign Start Date', period='month')
+    quarters = group_by([table], 'Campaign Start Date', period='quarter')
+    assert sum(months.row_counts) == sum(quarters.row_counts) == len(table)
+    known = [label for label in quarters.labels if label != UNKNOWN_PERIOD]
+    assert known == sorted(known)
+    assert all('-Q' in label for label in known)
+    assert len(months) >= len(quarters)
+    assert abs(sum(months.sums['Revenue']) - sum(quarters.sums['Revenue'])) < 1e-6
+
+
+def test_breakdown_tables_shape():
+    """Breakdowns should use the slide table shape the exporters render"""
+    tables = breakdown_tables([load_table()], limit=3)
+    assert [table['title'] for table in tables] == \
+        ["Performance by Campaign Type", "Performance by Quarter", "Top 3 Segments by Revenue"]
+    for table in tables:
+        assert all(len(row) == len(table['headers']) for row in table['data'])
+    assert len(tables[2]['data']) == 3
+    assert breakdown_tables([]) == []
+
+
+def test_large_breakdown_scales_with_copies():
+    """A type breakdown over 200k campaigns should count every row once and scale the sums"""
+    table = load_table()
+    copies = 200000 // len(table)
+    numeric = {name: values * copies for name, values in table.numeric.items()}
+    text = {name: (codes * copies, values) for name, (codes, values) in table.text.items()}
+    large = CampaignTable(numeric, text)
+    grouped = group_by([large], 'Campaign Type')
+    single = group_by([table], 'Campaign Type')
+    assert sum(grouped.row_counts) == len(large) == len(table) * copies
+    assert grouped.labels == single.labels
+    assert grouped.row_counts == [count * copies for count in single.row_counts]
+    for total, expected in zip(grouped.sums['Revenue'], single.sums['Revenue']):
+        assert math.isclose(total, expected * copies)
+
+
+if __name__ == "__main__":
+    test_group_by_type_matches_row_loop()
+    test_groups_merge_across_tables()
+    test_group_by_start_date_periods()
+    test_breakdown_tables_shape()
+    test_large_breakdown_scales_with_copies()
+    print("✅ All group-by tests passed!")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test script for joining complementary exports on Campaign UUID
+"""
+import io
+import math
+import os
+import random
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_metrics import MetricAggregate
+from campaign_table import CampaignTable
+from csv_ingest import PresentColumns, ingest_csv, iter_csv_rows
+from group_by import group_by
+from hash_join import collapse_by_key, hash_join, join_tables, joined_aggregate, match_rows
+from sketches import SketchAggregator
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+DELIVERY_COLUMNS = ['Campaign', 'Campaign UUID', 'Campaign Type', 'Sends', 'Delivered', 'Unique Clicks']
+REVENUE_COLUMNS = ['Campaign UUID', 'Revenue', 'Purchases']
+
+
+def load_rows():
+    with open(SAMPLE_CSV, 'rb') as f:
+        return [row for row in iter_csv_rows(f)]
+
+
+def split_exports(rows, revenue_share=1.0, seed=0):
+    delivery = [{name: row[name] for name in DELIVERY_COLUMNS} for row in rows]
+    revenue = [{name: row[name] for name in REVENUE_COLUMNS} for row in rows]
+    generator = random.Random(seed)
+    generator.shuffle(revenue)
+    revenue = revenue[:int(len(revenue) * revenue_share)]
+    return CampaignTable.from_rows(delivery), CampaignTable.from_rows(revenue)
+
+
+def test_match_rows_full_outer():
+    """Every probe row and every unmatched build row should appear once"""
+    build_rows, probe_rows = match_rows([0, 1, 2], ['a', 'b', ''], [1, 0, 2, 2], ['a', 'x', ''])
+    pairs = sorted(zip(build_rows, probe_rows))
+    # probe 0 ('x') and the empty keys match nothing; build 1 ('b') and 2 ('') go unmatched
+    assert pairs == [(0, 1), (1, 4), (2, 4), (3, 0), (3, 2), (3, 3)]
+
+
+def test_join_reproduces_single_export():
+    """Joining a split export back together should restore its totals and groups"""
+    rows = load_rows()
+    full = CampaignTable.from_rows(rows)
+    delivery, revenue = split_exports(rows)
+    joined = hash_join(delivery, revenue)
+    assert len(joined) == len(full)
+    for name in ('Sends', 'Delivered', 'Revenue', 'Purchases'):
+        assert math.isclose(math.fsum(joined.numeric[name]), math.fsum(full.numeric[name]))
+    expected = group_by([full], 'Campaign Type')
+    grouped = group_by([joined], 'Campaign Type')
+    assert sorted(grouped.labels) == sorted(expected.labels)
+    by_label = dict(zip(grouped.labels, grouped.sums['Revenue']))
+    for label, value in zip(expected.labels, expected.sums['Revenue']):
+        assert math.isclose(by_label[label], value)
+
+
+def test_join_is_independent_of_build_side():
+    """The smaller table is hashed either way; the joined rows should not change"""
+    delivery, revenue = split_exports(load_rows(), revenue_share=0.5, seed=2)
+    forward = hash_join(delivery, revenue)
+    backward = hash_join(revenue, delivery)
+    assert len(forward) == len(backward) == len(delivery)
+
+    def keyed(table):
+        return sorted(zip(table.column('Campaign UUID'), table.column('Campaign'), table.numeric['Revenue']))
+
+    assert keyed(forward) == keyed(backward)
+    # Campaigns missing from the revenue export keep their delivery data and zero revenue
+    assert sum(1 for value in forward.numeric['Revenue'] if value == 0) >= len(delivery) // 2
+
+
+def test_unmatched_rows_are_kept():
+    """Rows of either side without a match should survive with empty cells"""
+    delivery = CampaignTable.from_rows([
+        {'Campaign UUID': 'a', 'Campaign': 'A', 'Sends': '10', 'Campaign Start Date': '1/1/24 0:00'},
+        {'Campaign UUID': 'b', 'Campaign': 'B', 'Sends': '20', 'Campaign Start Date': '1/1/24 0:00'},
+    ])
+    revenue = CampaignTable.from_rows([
+        {'Campaign UUID': 'b', 'Campaign': 'B2', 'Revenue': '5'},
+        {'Campaign UUID': 'c', 'Campaign': 'C', 'Revenue': '7'},
+    ])
+    joined = {row['Campaign UUID']: row.to_dict() for row in hash_join(delivery, revenue)}
+    assert set(joined) == {'a', 'b', 'c'}
+    assert joined['a']['Revenue'] == 0.0
+    # The left table's values win on shared columns
+    assert joined['b']['Campaign'] == 'B' and joined['b']['Revenue'] == 5.0
+    assert joined['c']['Campaign'] == 'C' and joined['c']['Sends'] == 0.0
+    assert math.isnan(joined['c']['Campaign Start Date'])
+
+
+def test_join_tables_keeps_same_shape_exports_apart():
+    """Exports with the same columns are summed; complementary ones are joined"""
+    rows = load_rows()
+    delivery, revenue = split_exports(rows)
+    first_half, second_half = CampaignTable.from_rows(rows[:50]), CampaignTable.from_rows(rows[50:])
+    assert [members for _, members in join_tables([first_half, second_half])] == [[0], [1]]
+    assert [members for _, members in join_tables([delivery, revenue])] == [[0, 1]]
+
+
+def test_joined_aggregate_and_present_columns():
+    """Columns an export lacks should not be zero-filled, sketched or counted twice"""
+    rows = load_rows()
+    text = io.StringIO()
+    text.write(",".join(REVENUE_COLUMNS) + "\n")
+    for row in rows:
+        text.write(",".join(row[name] for name in REVENUE_COLUMNS) + "\n")
+    present = PresentColumns(['Campaign UUID', 'Revenue', 'Sends'])
+    sketches = SketchAggregator(quantile_columns=['Revenue', 'CTOR'], distinct_columns=['Campaign UUID'])
+    ingest_csv(io.BytesIO(text.getvalue().encode()), [present, sketches])
+    assert present.result() == ['Campaign UUID', 'Revenue']
+    result = sketches.result()
+    assert list(result.quantiles) == ['Revenue'] and result.quantiles['Revenue'].count == len(rows)
+
+    delivery, revenue = split_exports(rows)
+    joined = hash_join(delivery, revenue)
+    aggregate = joined_aggregate(joined, [MetricAggregate.from_columns(delivery.numeric),
+                                          MetricAggregate.from_columns(revenue.numeric)])
+    full = MetricAggregate.from_columns(CampaignTable.from_rows(rows).numeric)
+    assert aggregate.row_count == len(rows)
+    assert math.isclose(aggregate.sums['Revenue'], full.sums['Revenue'])
+    assert math.isclose(aggregate.sums['Sends'], full.sums['Sends'])
+
+
+def test_join_on_repeated_segment_key():
+    """A key shared by many campaigns should be summed per key, not multiplied"""
+    rows = load_rows()
+    segment = 'Campaign Segment UUID'
+    delivery = CampaignTable.from_rows(
+        [{name: row[name] for name in DELIVERY_COLUMNS + [segment, 'Campaign Segment', 'CTOR']} for row in rows]
+    )
+    revenue = CampaignTable.from_rows([{name: row[name] for name in [segment, 'Revenue', 'Purchases']} for row in rows])
+    full = CampaignTable.from_rows(rows)
+    segments = {value for value in full.column(segment) if value}
+    assert len(segments) < len(rows)
+
+    [(joined, members)] = join_tables([delivery, revenue], key=segment)
+    assert members == [0, 1]
+    assert len(joined) == len(segments) + full.column(segment).count('')
+    for name in ('Sends', 'Delivered', 'Revenue', 'Purchases'):
+        assert math.isclose(math.fsum(joined.numeric[name]), math.fsum(full.numeric[name]))
+    # Per-campaign rates cannot be summed; segment names agree within a key and survive
+    assert 'CTOR' not in joined.numeric
+    by_segment = {row[segment]: row for row in joined}
+    for row in rows:
+        if row[segment]:
+            assert by_segment[row[segment]]['Campaign Segment'] == row['Campaign Segment']
+
+
+def test_collapse_by_key():
+    """Counts are summed, dates take the earliest, disagreeing text is emptied"""
+    table = CampaignTable.from_rows([
+        {'Campaign Segment UUID': 'a', 'Campaign': 'A1', 'Campaign Type': 'One Time Send', 'Sends': '10', 'CTOR': '5',
+         'Campaign Start Date': '2/1/24 0:00'},
+        {'Campaign Segment UUID': '', 'Campaign': 'B', 'Campaign Type': 'One Time Send', 'Sends': '7', 'CTOR': '1',
+         'Campaign Start Date': '1/1/24 0:00'},
+        {'Campaign Segment UUID': 'a', 'Campaign': 'A2', 'Campaign Type': 'One Time Send', 'Sends': '5', 'CTOR': '9',
+         'Campaign Start Date': '1/1/24 0:00'},
+    ])
+    collapsed = collapse_by_key(table, 'Campaign Segment UUID')
+    assert collapsed.column('Campaign Segment UUID') == ['a', '']
+    first = collapsed[0]
+    assert first['Sends'] == 15.0 and first['Campaign'] == '' and first['Campaign Type'] == 'One Time Send'
+    assert first['Campaign Start Date'] == collapsed[1]['Campaign Start Date']
+    assert collapsed[1]['Campaign'] == 'B' and collapsed[1]['Sends'] == 7.0
+    assert 'CTOR' not in collapsed.numeric
+
+
+if __name__ == "__main__":
+    test_match_rows_full_outer()
+    test_join_reproduces_single_export()
+    test_join_is_independent_of_build_side()
+    test_unmatched_rows_are_kept()
+    test_join_tables_keeps_same_shape_exports_apart()
+    test_joined_aggregate_and_present_columns()
+    test_join_on_repeated_segment_key()
+    test_collapse_by_key()
+    print("✅ All hash join tests passed!")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental JSON object parser behind the SSE endpoint
+"""
+import json
+import os
+import random
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from json_stream import ObjectStreamParser, extract_json_object
+
+QBR = {
+    "slide1": {"title": "Executive Summary", "content": ["Revenue {up} 12%", "Quote: \"best {quarter}\""]},
+    "slide2": {"title": "Key Metrics", "content": ["Revenue: $1,234", "Path C:\\\\exports\\\\q3"],
+               "tables": [{"headers": ["a", "b"], "data": [[1, 2]]}]},
+    "slide3": {"title": "Wins", "content": []},
+    "count": 3,
+    "note": "closing } brace",
+}
+
+
+def chunked(text, sizes):
+    position = 0
+    for size in sizes:
+        if position >= len(text):
+            return
+        yield text[position:position + size]
+        position += size
+    if position < len(text):
+        yield text[position:]
+
+
+def test_members_complete_in_order():
+    """Each member should be emitted once, as soon as its value closes"""
+    text = json.dumps(QBR)
+    parser = ObjectStreamParser()
+    slide2_start = text.index('"slide2"')
+    emitted = parser.feed(text[:slide2_start])
+    # slide1 is out before any of slide2 has arrived
+    assert emitted == [("slide1", QBR["slide1"])]
+    for chunk in chunked(text[slide2_start:], [7] * len(text)):
+        emitted.extend(parser.feed(chunk))
+    assert [key for key, _ in emitted] == list(QBR)
+    assert parser.members == QBR
+    assert parser.done
+
+
+def test_any_chunking_gives_the_same_result():
+    """Splits inside strings, escapes and keys should not matter"""
+    text = "Here is the QBR:\n```json\n" + json.dumps(QBR, indent=2) + "\n```\nLet me know!"
+    generator = random.Random(4)
+    for _ in range(50):
+        parser = ObjectStreamParser()
+        emitted = []
+        for chunk in chunked(text, [generator.randint(1, 9) for _ in range(len(text))]):
+            emitted.extend(parser.feed(chunk))
+        assert dict(emitted) == QBR
+        assert len(emitted) == len(QBR)
+
+
+def test_single_character_chunks_and_trailing_text():
+    """Text after the closing brace should be ignored"""
+    text = json.dumps({"slide1": {"t": "{[,:]}"}}) + ' {"slide9": {}}'
+    parser = ObjectStreamParser()
+    emitted = []
+    for character in text:
+        emitted.extend(parser.feed(character))
+    assert emitted == [("slide1", {"t": "{[,:]}"})]
+
+
+def test_undecodable_member_is_skipped():
+    """A malformed member should not stop later members"""
+    parser = ObjectStreamParser()
+    emitted = parser.feed('{"slide1": {"a": tru}, "slide2": {"b": 1}}')
+    assert emitted == [("slide2", {"b": 1})]
+
+
+def test_extract_json_object_from_fenced_response():
+    """Fences, prose and braces inside strings should not cut the payload"""
+    text = "Sure {name}, here is the QBR:\n```json\n" + json.dumps(QBR, indent=2) + "\n```\nAny {questions}?"
+    assert extract_json_object(text) == QBR
+    assert extract_json_object(json.dumps(QBR)) == QBR
+
+
+def test_brace_in_leading_prose_is_skipped_like_extract():
+    """The stream parser should find the same object as extract_json_object()"""
+    generator = random.Random(7)
+    for prefix in ["Note {see below}: ", "Sure {name}, here it is: ", "A set {1, 2} and {\n"]:
+        text = prefix + json.dumps(QBR) + " Any {questions}?"
+        assert extract_json_object(text) == QBR
+        for sizes in ([len(text)], [1] * len(text), [generator.randint(1, 9) for _ in range(len(text))]):
+            parser = ObjectStreamParser()
+            for chunk in chunked(text, sizes):
+                parser.feed(chunk)
+            assert parser.done and parser.members == QBR, (prefix, sizes[:3])
+
+
+def test_extract_json_object_rejects_bad_payloads():
+    """Truncated or missing payloads should raise rather than return a fragment"""
+    for text in [
+        json.dumps(QBR)[:-20],
+        '{"slide1": {"a": tru}, "slide2": {"b": 1}}',
+        "I could not generate the QBR.",
+    ]:
+        try:
+            extract_json_object(text)
+        except json.JSONDecodeError:
+            continue
+        raise AssertionError(f"No error for {text!r}")
+
+
+if __name__ == "__main__":
+    test_members_complete_in_order()
+    test_any_chunking_gives_the_same_result()
+    test_single_character_chunks_and_trailing_text()
+    test_undecodable_member_is_skipped()
+    test_extract_json_object_from_fenced_response()
+    test_brace_in_leading_prose_is_skipped_like_extract()
+    test_extract_json_object_rejects_bad_payloads()
+    print("✅ All JSON stream tests passed!")
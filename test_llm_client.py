@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded, non-blocking LLM client
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from llm_client import LLMClient, normalize_prompt, response_cache_key
+from result_cache import DiskCache, LRUCache, TieredCache
+
+
+class Response:
+    """Mimics the SDK response object"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def __eq__(self, other):
+        return self.text == getattr(other, "text", other)
+
+
+class BlockingModel:
+    """Mimics the SDK's synchronous generate_content with a slow network call"""
+
+    model_name = "models/blocking"
+
+    def __init__(self, delay=0.05, gate=None):
+        self.delay = delay
+        self.gate = gate
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if stream:
+            return iter([Response(part) for part in ("response", " to ", prompt)])
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        if self.gate is not None:
+            # Held until the test releases the gate
+            self.gate.wait(5)
+        else:
+            time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+            self.calls += 1
+        return Response(f"response to {prompt}")
+
+
+class AsyncModel(BlockingModel):
+    """Mimics an SDK with a native async method"""
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        if stream:
+            return self._stream(prompt)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return Response(f"async response to {prompt}")
+
+    async def _stream(self, prompt):
+        for part in ("async", " response to ", prompt):
+            await asyncio.sleep(0)
+            yield Response(part)
+
+
+def test_blocking_model_is_offloaded_and_bounded():
+    """Synchronous calls should run in threads, at most `concurrency` at a time"""
+    release = threading.Event()
+    model = BlockingModel(gate=release)
+    client = LLMClient(model, concurrency=4)
+
+    async def run():
+        calls = asyncio.gather(*(client.generate(f"p{index}") for index in range(16)))
+        # The event loop keeps running while the first calls block their threads
+        for _ in range(5000):
+            if model.active == 4:
+                break
+            await asyncio.sleep(0.001)
+        in_flight = model.active
+        release.set()
+        return await calls, in_flight
+
+    responses, in_flight = asyncio.run(run())
+    assert responses == [f"response to p{index}" for index in range(16)]
+    assert in_flight == 4
+    assert model.peak == 4
+    assert model.calls == 16
+
+
+def test_native_async_method_is_preferred():
+    """Models with generate_content_async should be awaited directly"""
+    model = AsyncModel()
+    client = LLMClient(model, concurrency=2)
+
+    async def run():
+        return await asyncio.gather(*(client.generate(f"p{index}") for index in range(6)))
+
+    assert asyncio.run(run())[0] == "async response to p0"
+    assert model.peak == 2
+
+
+def test_client_works_across_event_loops():
+    """Each event loop should get its own semaphore"""
+    client = LLMClient(BlockingModel(delay=0), concurrency=1)
+    assert asyncio.run(client.generate("a")) == "response to a"
+    assert asyncio.run(client.generate("b")) == "response to b"
+    assert client.model_name == "models/blocking"
+
+
+def test_cache_key_ignores_formatting_only():
+    """Whitespace-only prompt differences share a key; model and config do not"""
+    key = response_cache_key("models/a", "Slide  one\n  data ")
+    assert key == response_cache_key("models/a", "  Slide one\ndata")
+    assert key != response_cache_key("models/b", "Slide one\ndata")
+    assert key != response_cache_key("models/a", "Slide one\ndata", {"temperature": 0.2})
+    assert normalize_prompt(" a\t b \n\n c ") == "a b\n\nc"
+
+
+def test_generate_text_is_cached_with_bypass():
+    """A repeat prompt is served from the cache unless the request bypasses it"""
+    with tempfile.TemporaryDirectory() as directory:
+        model = BlockingModel(delay=0)
+        cache = TieredCache(LRUCache(), DiskCache(directory, ttl_seconds=60))
+        client = LLMClient(model, cache=cache)
+        assert asyncio.run(client.generate_text("prompt")) == "response to prompt"
+        assert asyncio.run(client.generate_text("  prompt ")) == "response to prompt"
+        assert model.calls == 1
+        asyncio.run(client.generate_text("prompt", use_cache=False))
+        assert model.calls == 2
+
+        # A fresh process only has the disk tier
+        restarted = LLMClient(model, cache=TieredCache(LRUCache(), DiskCache(directory, ttl_seconds=60)))
+        assert asyncio.run(restarted.generate_text("prompt")) == "response to prompt"
+        assert model.calls == 2
+
+
+def test_unparseable_response_is_not_cached():
+    """A response the caller cannot parse should be regenerated, not served again"""
+    class TruncatingModel(BlockingModel):
+        def generate_content(self, prompt, stream=False, **kwargs):
+            self.calls += 1
+            text = '{"slide1": {"title": "Summary"}}'
+            return Response(text[:-5] if self.calls == 1 else text)
+
+    with tempfile.TemporaryDirectory() as directory:
+        model = TruncatingModel(delay=0)
+        client = LLMClient(model, cache=TieredCache(LRUCache(), DiskCache(directory)))
+        try:
+            asyncio.run(client.generate_text("prompt", parse=json.loads))
+        except json.JSONDecodeError:
+            pass
+        else:
+            raise AssertionError("The truncated response should not parse")
+        assert asyncio.run(client.generate_text("prompt", parse=json.loads)) == {"slide1": {"title": "Summary"}}
+        assert model.calls == 2
+        # The good response is cached and parsed on the way out
+        assert asyncio.run(client.generate_text("prompt", parse=json.loads)) == {"slide1": {"title": "Summary"}}
+        assert model.calls == 2
+
+        # A bad entry cached without a parser is regenerated once a parser is given
+        model.calls = 0
+        asyncio.run(client.generate_text("other"))
+        assert asyncio.run(client.generate_text("other", parse=json.loads)) == {"slide1": {"title": "Summary"}}
+        assert model.calls == 2
+
+
+def test_unparseable_stream_is_not_cached():
+    """Streams are only cached once their joined text parses"""
+    async def collect(client, prompt):
+        return "".join([text async for text in client.stream_text(prompt, parse=json.loads)])
+
+    model = BlockingModel(delay=0)
+    client = LLMClient(model, cache=LRUCache())
+    assert asyncio.run(collect(client, "p")) == "response to p"
+    assert len(client.cache) == 0
+
+
+def test_stream_text_yields_chunks_and_caches():
+    """Streams should arrive chunk by chunk from sync and async models, then be cached"""
+    async def collect(client, prompt, **kwargs):
+        return [text async for text in client.stream_text(prompt, **kwargs)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TieredCache(LRUCache(), DiskCache(directory))
+        client = LLMClient(BlockingModel(delay=0), cache=cache)
+        assert asyncio.run(collect(client, "p")) == ["response", " to ", "p"]
+        # The completed stream is served whole from the cache next time
+        assert asyncio.run(collect(client, "p")) == ["response to p"]
+        assert asyncio.run(collect(client, "p", use_cache=False)) == ["response", " to ", "p"]
+
+    client = LLMClient(AsyncModel(delay=0), cache=None)
+    assert asyncio.run(collect(client, "q")) == ["async", " response to ", "q"]
+
+
+def test_stream_errors_propagate():
+    """An error in the model's stream should reach the consumer"""
+    class FailingModel(BlockingModel):
+        def generate_content(self, prompt, stream=False, **kwargs):
+            def chunks():
+                yield Response("partial")
+                raise RuntimeError("quota exceeded")
+            return chunks()
+
+    async def collect():
+        received = []
+        try:
+            async for text in LLMClient(FailingModel(), cache=None).stream_text("p"):
+                received.append(text)
+        except RuntimeError as e:
+            return received, str(e)
+        return received, None
+
+    assert asyncio.run(collect()) == (["partial"], "quota exceeded")
+
+
+if __name__ == "__main__":
+    test_blocking_model_is_offloaded_and_bounded()
+    test_native_async_method_is_preferred()
+    test_client_works_across_event_loops()
+    test_cache_key_ignores_formatting_only()
+    test_generate_text_is_cached_with_bypass()
+    test_unparseable_response_is_not_cached()
+    test_unparseable_stream_is_not_cached()
+    test_stream_text_yields_chunks_and_caches()
+    test_stream_errors_propagate()
+    print("✅ All LLM client tests passed!")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for the memory-mapped, lazily decoded CSV reader
+"""
+import os
+import sys
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from csv_ingest import iter_csv_rows
+from mapped_csv import MappedCSV
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def test_random_access_matches_dict_reader():
+    """Any row and column should decode to what csv.DictReader returns"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        rows = list(iter_csv_rows(f))
+    with MappedCSV(SAMPLE_CSV) as mapped:
+        assert len(mapped) == len(rows)
+        assert mapped.header[0] == 'Date'
+        assert mapped[42]['Campaign UUID'] == rows[42]['Campaign UUID']
+        assert mapped[-1]['Unique Soft Bounce %'] == rows[-1]['Unique Soft Bounce %']
+        assert list(mapped.column('Revenue')) == [row['Revenue'] for row in rows]
+        assert mapped[3].to_dict() == rows[3]
+
+
+def test_find_matches_rows_by_field():
+    """find() should return the indexes of rows with the given field value"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        rows = list(iter_csv_rows(f))
+    with MappedCSV(SAMPLE_CSV) as mapped:
+        assert mapped.find('Campaign UUID', rows[57]['Campaign UUID']) == [57]
+        assert mapped.find('Campaign UUID', 'no such campaign') == []
+        assert mapped.find('not in export', '') == []
+
+
+def test_quoted_and_short_rows():
+    """Quoted commas, quoted newlines, CRLF and short rows should all parse"""
+    content = b'Campaign,Sends,Notes\r\n"Spring, Sale",10,x\r\n"Multi\r\nline",5,y\r\n\r\nPlain,3\r\n'
+    with tempfile.NamedTemporaryFile(suffix=".csv") as f:
+        f.write(content)
+        f.flush()
+        with MappedCSV(f.name) as mapped:
+            assert len(mapped) == 3
+            assert mapped[0]['Campaign'] == 'Spring, Sale'
+            assert mapped[1]['Campaign'] == 'Multi\r\nline'
+            assert mapped[1]['Notes'] == 'y'
+            assert mapped[2]['Sends'] == '3'
+            assert mapped[2].get('Notes', 'n/a') == 'n/a'
+
+
+if __name__ == "__main__":
+    test_random_access_matches_dict_reader()
+    test_find_matches_rows_by_field()
+    test_quoted_and_short_rows()
+    print("✅ All mapped CSV tests passed!")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the parse pool and its result cache
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import columnar_store
+import parse_pool
+from group_by import group_by
+from upload_spool import SpooledUpload
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def test_shutdown_resets_executor_only():
+    """shutdown() should drop the pool so the next request starts a new one, and touch nothing else"""
+    cache = parse_pool.PARSE_CACHE
+    version = parse_pool.PARSE_CACHE_VERSION
+    # Other test modules may have disabled the pool through QBR_PARSE_WORKERS
+    workers, parse_pool.PARSE_WORKERS = parse_pool.PARSE_WORKERS, 1
+    executor = parse_pool.get_executor()
+    assert parse_pool.get_executor() is executor
+    parse_pool.shutdown()
+    assert parse_pool._executor is None
+    assert parse_pool.PARSE_CACHE is cache and parse_pool.PARSE_CACHE_VERSION == version
+    restarted = parse_pool.get_executor()
+    assert restarted is not executor
+    parse_pool.shutdown()
+    parse_pool.PARSE_WORKERS = workers
+
+
+def test_disk_tier_reads_tables_from_the_columnar_store():
+    """Disk entries should leave the table to the columnar store and map it back on a read"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        digest = hashlib.sha256(b"parse pool test" + f.read()).hexdigest()
+    result = parse_pool.parse_file(SAMPLE_CSV, "sample.csv", digest)
+    # CSVs reach the prompt through the digest, so no text is kept or cached for them
+    assert result["text"] == ""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = parse_pool.ParseResultDiskCache(directory)
+        key = f"v{parse_pool.PARSE_CACHE_VERSION}-csv-{digest}"
+        cache.put(key, result)
+        assert result["table"] is not None
+
+        # The pickle holds no copy of the table
+        stored = parse_pool.DiskCache.get(cache, key)
+        assert stored["table"] is None and stored["table_store"] == digest
+
+        cached = cache.get(key)
+        assert isinstance(cached["table"].numeric['Revenue'], memoryview)
+        # Mapped tables cost the memory tier next to nothing; freshly parsed ones are counted
+        assert parse_pool.parse_result_nbytes(cached) < 1024
+        assert parse_pool.parse_result_nbytes(result) >= len(result["table"]) * 8 * len(result["table"].numeric)
+        assert len(cached["table"]) == len(result["table"])
+        expected = group_by([result["table"]], 'Campaign Type')
+        actual = group_by([cached["table"]], 'Campaign Type')
+        assert actual.labels == expected.labels and actual.sums == expected.sums
+
+        # Once the store is evicted the entry is a miss and is dropped
+        os.remove(columnar_store.store_path(digest))
+        assert cache.get(key) is None
+        assert parse_pool.DiskCache.get(cache, key) is None
+
+
+def test_pool_respects_csv_streaming_flag():
+    """With streaming off the pool should materialize every column and keep the table out of the store"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        digest = hashlib.sha256(b"parse pool full test" + f.read()).hexdigest()
+    upload = SpooledUpload("sample.csv", "text/csv", SAMPLE_CSV, os.path.getsize(SAMPLE_CSV), digest, None)
+    workers, parse_pool.PARSE_WORKERS = parse_pool.PARSE_WORKERS, 1
+    try:
+        streamed, = asyncio.run(parse_pool.parse_uploads([upload]))
+        full, = asyncio.run(parse_pool.parse_uploads([upload], streaming=False))
+    finally:
+        parse_pool.shutdown()
+        parse_pool.PARSE_WORKERS = workers
+    assert 'Campaign Link' in full["table"].text and 'Campaign Link' not in streamed["table"].text
+    assert len(full["table"]) == len(streamed["table"])
+    assert full["aggregate"].revenue_and_aov() == streamed["aggregate"].revenue_and_aov()
+    assert streamed["table_store"] == digest and full.get("table_store") is None
+
+    # The store holds the streamed table, so the full result is pickled with its own
+    with tempfile.TemporaryDirectory() as directory:
+        cache = parse_pool.ParseResultDiskCache(directory)
+        cache.put("full", full)
+        assert 'Campaign Link' in cache.get("full")["table"].text
+    os.remove(columnar_store.store_path(digest))
+
+
+if __name__ == "__main__":
+    test_shutdown_resets_executor_only()
+    test_disk_tier_reads_tables_from_the_columnar_store()
+    test_pool_respects_csv_streaming_flag()
+    print("✅ All parse pool tests passed!")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for budgeted, page-parallel PDF text extraction
+"""
+import asyncio
+import gc
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import pdf_extract
+from pdf_extract import assemble_pages, extract_pdf_text, extract_pdf_text_parallel, page_ranges
+
+
+class FakePage:
+    """A page of fixed-size text; pages past the first range can be held on a gate"""
+
+    def __init__(self, reader, number):
+        self.reader = reader
+        self.number = number
+
+    def extract_text(self):
+        self.reader.extracted.append(self.number)
+        if self.reader.gate is not None and self.number >= 16:
+            self.reader.gate.wait(5)
+        if self.number >= self.reader.fail_from:
+            raise RuntimeError(f"page {self.number} is corrupt")
+        return "x" * self.reader.chars_per_page
+
+
+class FakeReader:
+    """Stands in for PyPDF2.PdfReader and records which pages were extracted"""
+
+    def __init__(self, page_count, chars_per_page, gate=None, fail_from=None):
+        self.pages = [FakePage(self, number) for number in range(page_count)]
+        self.chars_per_page = chars_per_page
+        self.gate = gate
+        self.fail_from = page_count if fail_from is None else fail_from
+        self.extracted = []
+
+
+def with_reader(reader, extract):
+    original = pdf_extract.PyPDF2.PdfReader
+    pdf_extract.PyPDF2.PdfReader = lambda source: reader
+    try:
+        return extract()
+    finally:
+        pdf_extract.PyPDF2.PdfReader = original
+
+
+def test_page_ranges_respect_page_budget():
+    """Ranges should cover the budgeted pages in fixed-size tasks"""
+    assert page_ranges(40, max_pages=200, pages_per_task=16) == [(0, 16), (16, 32), (32, 40)]
+    assert page_ranges(500, max_pages=20, pages_per_task=16) == [(0, 16), (16, 20)]
+    assert page_ranges(0) == []
+
+
+def test_assemble_pages_joins_in_order_within_char_budget():
+    """Page texts should be joined once, in order, and cut at the character budget"""
+    chunks = [
+        [(0, "alpha ", 0.1), (1, "beta ", 0.2)],
+        [(2, "gamma", 0.3)],
+    ]
+    extraction = assemble_pages(3, chunks, max_chars=100)
+    assert extraction["text"] == "alpha beta gamma"
+    assert extraction["page_timings"] == [(0, 0.1), (1, 0.2), (2, 0.3)]
+    assert not extraction["truncated"]
+
+    extraction = assemble_pages(4, chunks, max_chars=8)
+    assert extraction["text"] == "alpha be"
+    assert extraction["truncated"]
+
+
+def test_extraction_stops_once_the_char_budget_is_spent():
+    """Later page ranges get only what is left of the budget, and none once it is spent"""
+    reader = FakeReader(page_count=64, chars_per_page=10)
+    extraction = with_reader(reader, lambda: extract_pdf_text("report.pdf", max_chars=165))
+    # 16 pages fill the first range's 160 chars; the second range stops after one page
+    assert reader.extracted == list(range(17))
+    assert len(extraction["text"]) == 165
+    assert extraction["truncated"]
+
+
+def test_parallel_extraction_skips_ranges_after_the_budget():
+    """Ranges still queued when the budget is spent should never be extracted"""
+    # Pages past the first range block until the extraction has returned
+    gate = threading.Event()
+    reader = FakeReader(page_count=64, chars_per_page=100, gate=gate)
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        extraction = with_reader(reader, lambda: asyncio.run(
+            extract_pdf_text_parallel("report.pdf", executor, max_pages=64, max_chars=50)
+        ))
+    finally:
+        gate.set()
+        executor.shutdown(wait=True)
+    assert extraction["text"] == "x" * 50
+    assert extraction["pages_extracted"] == 1
+    # At most the second range had started; the third and fourth were cancelled
+    assert set(reader.extracted) <= {0, 16}
+
+
+class InlineExecutor(Executor):
+    """Runs each task as it is submitted, so every range has finished before the first is awaited"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_failed_ranges_left_behind_are_retrieved():
+    """Ranges that failed after the budget ran out or another range failed should not log unretrieved errors"""
+    handler = RecordingHandler()
+    logging.getLogger("asyncio").addHandler(handler)
+    try:
+        # The first range spends the budget; the later ones fail
+        reader = FakeReader(page_count=64, chars_per_page=100, fail_from=16)
+        extraction = with_reader(reader, lambda: asyncio.run(
+            extract_pdf_text_parallel("report.pdf", InlineExecutor(), max_pages=64, max_chars=50)
+        ))
+        assert extraction["text"] == "x" * 50
+
+        # The first range fails too, and its error is the one raised
+        reader = FakeReader(page_count=64, chars_per_page=100, fail_from=0)
+        try:
+            with_reader(reader, lambda: asyncio.run(extract_pdf_text_parallel("report.pdf", InlineExecutor())))
+        except RuntimeError as e:
+            assert str(e) == "page 0 is corrupt"
+        else:
+            raise AssertionError("The failed range should raise")
+        gc.collect()
+    finally:
+        logging.getLogger("asyncio").removeHandler(handler)
+    assert not [message for message in handler.messages if "never retrieved" in message]
+
+
+if __name__ == "__main__":
+    test_page_ranges_respect_page_budget()
+    test_assemble_pages_joins_in_order_within_char_budget()
+    test_extraction_stops_once_the_char_budget_is_spent()
+    test_parallel_extraction_skips_ranges_after_the_budget()
+    test_failed_ranges_left_behind_are_retrieved()
+    print("✅ All PDF extraction tests passed!")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test script for the sampling-based preview mode
+"""
+import io
+import math
+import os
+import pickle
+import random
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_metrics import MetricAggregate
+from campaign_table import CampaignTable
+from csv_ingest import iter_csv_rows
+from data_digest import build_data_digest, headline_section
+from campaign_index import CampaignIndex
+from group_by import group_by
+from parse_pool import preview_csv
+from preview import Estimate, PreviewEstimator, reservoir_sample_csv, reservoir_sample_lines
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def test_reservoir_sample_is_uniform():
+    """Every line should be kept about equally often"""
+    generator = random.Random(3)
+    hits = [0] * 100
+    for _ in range(4000):
+        sampled, seen = reservoir_sample_lines(iter(range(100)), 10, generator)
+        assert seen == 100
+        assert len(set(sampled)) == 10
+        for line in sampled:
+            hits[line] += 1
+    # Expected 400 hits per line
+    assert min(hits) > 300 and max(hits) < 500
+
+
+def test_reservoir_sample_of_short_input_keeps_everything():
+    """Inputs shorter than the reservoir should be kept whole"""
+    sampled, seen = reservoir_sample_lines(iter(['a', 'b']), 10, random.Random(0))
+    assert sampled == ['a', 'b'] and seen == 2
+
+
+def test_sample_csv_population_and_exact_estimate():
+    """Sampling the whole export should count every row and estimate it exactly"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        rows, population = reservoir_sample_csv(f, size=1000, seed=1)
+    with open(SAMPLE_CSV, 'rb') as f:
+        table = CampaignTable.from_rows(iter_csv_rows(f))
+    assert population == len(table) == len(rows)
+
+    sample = CampaignTable.from_rows(rows)
+    estimator = PreviewEstimator.from_columns(sample.numeric, population)
+    revenue, purchases, aov = estimator.revenue_and_aov()
+    exact = MetricAggregate.from_columns(table.numeric).revenue_and_aov()
+    assert math.isclose(revenue, exact[0]) and revenue.standard_error == 0
+    assert math.isclose(purchases, exact[1])
+    assert math.isclose(aov, exact[2])
+
+
+def test_sample_csv_partial_sample():
+    """A partial sample should keep the requested size and report the full population"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        rows, population = reservoir_sample_csv(f, size=20, seed=5)
+    assert len(rows) == 20
+    assert population > 20
+    assert 'Campaign' in rows[0]
+
+
+def test_confidence_interval_covers_true_total():
+    """About 95% of the intervals from repeated samples should cover the true total"""
+    generator = random.Random(11)
+    revenue = [generator.expovariate(1 / 500) for _ in range(5000)]
+    purchases = [max(1.0, round(value / 50)) for value in revenue]
+    lines = [f"{value},{count}" for value, count in zip(revenue, purchases)]
+    true_revenue = math.fsum(revenue)
+    true_aov = true_revenue / math.fsum(purchases)
+    covered = 0
+    covered_aov = 0
+    trials = 200
+    for trial in range(trials):
+        text = "Revenue,Purchases\n" + "\n".join(lines) + "\n"
+        rows, population = reservoir_sample_csv(io.BytesIO(text.encode()), size=400, seed=trial)
+        columns = {name: [float(row[name]) for row in rows] for name in ('Revenue', 'Purchases')}
+        # Two strata: the estimator must combine them the same way
+        half = len(rows) // 2
+        first = PreviewEstimator.from_columns({name: values[:half] for name, values in columns.items()}, population // 2)
+        second = PreviewEstimator.from_columns({name: values[half:] for name, values in columns.items()},
+                                               population - population // 2)
+        estimated_revenue, _, estimated_aov = (first + second).revenue_and_aov()
+        covered += estimated_revenue.low <= true_revenue <= estimated_revenue.high
+        covered_aov += estimated_aov.low <= true_aov <= estimated_aov.high
+    assert covered / trials > 0.88
+    assert covered_aov / trials > 0.88
+
+
+def test_estimate_behaves_like_a_float():
+    """Estimates should format, compare and pickle like the number they stand for"""
+    estimate = Estimate(1234.5, 10.0)
+    assert f"{estimate:,.2f}" == "1,234.50"
+    assert estimate + 1 == 1235.5
+    assert math.isclose(estimate.high - estimate.low, 2 * 1.96 * 10.0)
+    restored = pickle.loads(pickle.dumps(estimate))
+    assert restored == estimate and restored.standard_error == 10.0
+    assert estimate.to_dict()["value"] == 1234.5
+
+
+def test_scaled_aggregate():
+    """A sample's aggregate should scale its sums to the population"""
+    aggregate = MetricAggregate.from_columns({'Revenue': [10.0, 30.0]})
+    scaled = aggregate.scaled(20)
+    assert scaled.row_count == 20
+    assert scaled.sums['Revenue'] == 400.0
+
+
+def test_digest_headline_reports_interval():
+    """The digest headline should state preview estimates with their intervals"""
+    headline = headline_section(Estimate(1000.0, 50.0), Estimate(20.0, 2.0), Estimate(50.0, 1.0))
+    assert "Purchases 20 " in headline[1]
+    assert "95% CI" in headline[2]
+    assert len(headline_section(1000.0, 20, 50.0)) == 2
+
+
+def test_stratum_without_a_column_is_skipped():
+    """A sampled file lacking Revenue should add nothing to its total, not fail"""
+    with_revenue = PreviewEstimator.from_columns({'Revenue': [10.0, 20.0, 30.0], 'Purchases': [1.0, 2.0, 2.0]}, 30)
+    purchases_only = PreviewEstimator.from_columns({'Purchases': [1.0, 3.0, 2.0]}, 60)
+    revenue, purchases, aov = (with_revenue + purchases_only).revenue_and_aov()
+    assert math.isclose(revenue, 600.0) and revenue.standard_error > 0
+    assert math.isclose(purchases, 170.0)
+    assert aov.standard_error > 0
+
+
+def test_preview_breakdowns_estimate_the_full_export():
+    """Group sums of a sample should be scaled to the export, like the headline estimate"""
+    with open(SAMPLE_CSV, 'rb') as f:
+        header, *lines = f.read().splitlines()
+    export = b"\n".join([header] + lines * 100) + b"\n"
+    aggregate, table, estimator = preview_csv(io.BytesIO(export), sample_rows=500)
+    assert len(table) == 500 and table.weight == len(lines) * 100 / 500
+    revenue = estimator.total('Revenue')
+    by_type = group_by([table], 'Campaign Type')
+    assert math.isclose(math.fsum(by_type.sums['Revenue']), revenue)
+    # Each group's scaled count is rounded on its own
+    assert abs(sum(by_type.row_counts) - len(lines) * 100) <= len(by_type.row_counts)
+    # The weight survives the trip back from a pool worker
+    assert pickle.loads(pickle.dumps(table)).weight == table.weight
+
+    digest = build_data_digest(revenue, estimator.total('Purchases'), 0.0, campaign_index=CampaignIndex([table]),
+                               max_chars=100000)
+    assert "TOP 5 BY REVENUE among sampled campaigns" in digest
+
+
+if __name__ == "__main__":
+    test_reservoir_sample_is_uniform()
+    test_reservoir_sample_of_short_input_keeps_everything()
+    test_sample_csv_population_and_exact_estimate()
+    test_sample_csv_partial_sample()
+    test_confidence_interval_covers_true_total()
+    test_estimate_behaves_like_a_float()
+    test_stratum_without_a_column_is_skipped()
+    test_preview_breakdowns_estimate_the_full_export()
+    test_scaled_aggregate()
+    test_digest_headline_reports_interval()
+    print("✅ All preview tests passed!")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the two-tier (memory LRU + disk) result cache
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from result_cache import DiskCache, LRUCache, TieredCache, ensure_private_directory
+
+
+def test_lru_evicts_least_recently_used():
+    """The entry not touched most recently should be evicted first"""
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_lru_is_bounded_by_bytes():
+    """With max_bytes, entries are evicted by total size and oversized values are not kept"""
+    cache = LRUCache(max_entries=100, max_bytes=10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    assert cache.nbytes == 8
+    cache.put("c", "xxxx")
+    assert cache.get("a") is None and cache.get("b") == "xxxx"
+    assert cache.nbytes == 8
+    cache.put("b", "x")
+    assert cache.nbytes == 5
+    cache.put("huge", "x" * 11)
+    assert cache.get("huge") is None and cache.nbytes == 5
+
+
+def test_disk_cache_is_size_bounded():
+    """Writing past the byte budget should evict the oldest entries"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(directory, max_bytes=2500)
+        for index in range(5):
+            cache.put(f"entry{index}", b"x" * 1000)
+            time.sleep(0.01)
+        assert cache.get("entry0") is None
+        assert cache.get("entry4") == b"x" * 1000
+        total_bytes = sum(entry.stat().st_size for entry in os.scandir(directory))
+        assert total_bytes <= 2500
+
+
+def test_tiered_cache_promotes_disk_hits():
+    """A value only on disk should be served and copied into memory"""
+    with tempfile.TemporaryDirectory() as directory:
+        disk = DiskCache(directory)
+        disk.put("digest", {"text": "rows", "aggregate": None})
+        cache = TieredCache(LRUCache(), disk)
+        assert cache.get("digest") == {"text": "rows", "aggregate": None}
+        assert cache.memory.get("digest") == {"text": "rows", "aggregate": None}
+        assert cache.get("missing", "default") == "default"
+
+
+def test_ttl_expires_entries():
+    """Entries older than the TTL should be missing in both tiers"""
+    memory = LRUCache(ttl_seconds=0.05)
+    memory.put("key", "value")
+    assert memory.get("key") == "value"
+    time.sleep(0.06)
+    assert memory.get("key") is None
+    with tempfile.TemporaryDirectory() as directory:
+        disk = DiskCache(directory, ttl_seconds=60)
+        disk.put("fresh", 1)
+        disk.put("stale", 2)
+        stale_path = os.path.join(directory, "stale.pickle")
+        old = time.time() - 120
+        os.utime(stale_path, (old, old))
+        assert disk.get("fresh") == 1
+        assert disk.get("stale") is None
+        assert not os.path.exists(stale_path)
+
+
+def test_disk_reads_keep_write_time():
+    """Reads should refresh recency for eviction without extending the TTL"""
+    with tempfile.TemporaryDirectory() as directory:
+        disk = DiskCache(directory, ttl_seconds=60)
+        disk.put("entry", 1)
+        path = os.path.join(directory, "entry.pickle")
+        os.utime(path, (time.time() - 30, time.time() - 30))
+        assert disk.get("entry") == 1
+        stat = os.stat(path)
+        assert stat.st_atime > stat.st_mtime + 20
+
+
+def test_cache_directories_are_private():
+    """Cache directories should be created 0700 and foreign or linked ones refused"""
+    with tempfile.TemporaryDirectory() as directory:
+        created = os.path.join(directory, "new", "cache")
+        DiskCache(created)
+        assert os.stat(created).st_mode & 0o777 == 0o700
+
+        loose = os.path.join(directory, "loose")
+        os.mkdir(loose, 0o777)
+        os.chmod(loose, 0o777)
+        ensure_private_directory(loose)
+        assert os.stat(loose).st_mode & 0o777 == 0o700
+
+        link = os.path.join(directory, "link")
+        os.symlink(loose, link)
+        refused = [link]
+        if os.geteuid() == 0:
+            # Only root can hand a directory to another user
+            foreign = os.path.join(directory, "foreign")
+            os.mkdir(foreign, 0o700)
+            os.chown(foreign, 12345, -1)
+            refused.append(foreign)
+        for path in refused:
+            try:
+                ensure_private_directory(path)
+            except PermissionError:
+                continue
+            raise AssertionError(f"{path} should have been refused")
+
+
+if __name__ == "__main__":
+    test_lru_evicts_least_recently_used()
+    test_lru_is_bounded_by_bytes()
+    test_disk_cache_is_size_bounded()
+    test_tiered_cache_promotes_disk_hits()
+    test_ttl_expires_entries()
+    test_disk_reads_keep_write_time()
+    test_cache_directories_are_private()
+    print("✅ All result cache tests passed!")
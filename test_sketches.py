@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming quantile and distinct-count sketches
+"""
+import os
+import random
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from campaign_metrics import MetricAggregate
+from campaign_table import CampaignTable
+from csv_ingest import ingest_csv, iter_csv_rows
+from sketches import HyperLogLog, KLLSketch, SketchAggregator
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), 'sample.csv')
+
+
+def rank_of(sorted_values, value):
+    return sum(1 for item in sorted_values if item <= value) / len(sorted_values)
+
+
+def test_kll_quantiles_within_rank_error():
+    """Quantile estimates should land within a few percent of the true rank"""
+    generator = random.Random(7)
+    values = [generator.lognormvariate(0, 1) for _ in range(50000)]
+    halves = KLLSketch(), KLLSketch()
+    for position, value in enumerate(values):
+        halves[position % 2].update(value)
+    sketch = halves[0] + halves[1]
+    batched = KLLSketch()
+    batched.extend(values)
+    ordered = sorted(values)
+    for candidate in (sketch, batched):
+        assert candidate.count == len(values)
+        assert sum(len(items) for items in candidate.compactors) < 2000
+        for fraction, estimate in zip((0.5, 0.9, 0.99), candidate.quantiles((0.5, 0.9, 0.99))):
+            assert abs(rank_of(ordered, estimate) - fraction) < 0.03
+        assert candidate.quantile(0) == ordered[0]
+        assert candidate.quantile(1) == ordered[-1]
+
+
+def test_hyperloglog_merges_across_files():
+    """Distinct counts should be close and unions should not double count"""
+    first, second = HyperLogLog(), HyperLogLog()
+    for number in range(30000):
+        first.add(f"segment-{number}")
+    for number in range(20000, 50000):
+        second.add(f"segment-{number}")
+    assert abs(first.estimate() - 30000) / 30000 < 0.05
+    assert abs((first + second).estimate() - 50000) / 50000 < 0.05
+    small = HyperLogLog()
+    for name in ["a", "b", "c", "a"]:
+        small.add(name)
+    assert small.estimate() == 3
+
+
+def test_sample_export_distributions():
+    """Sketched percentiles of the sample should match the exact values"""
+    aggregator = SketchAggregator(chunk_rows=16)
+    with open(SAMPLE_CSV, 'rb') as f:
+        ingest_csv(f, [aggregator])
+    summary = aggregator.result().summary()
+
+    with open(SAMPLE_CSV, 'rb') as f:
+        table = CampaignTable.from_rows(iter_csv_rows(f))
+    delivered = [row for row in table if row['Delivered'] > 0]
+    ctor = sorted(row['CTOR'] for row in delivered)
+    distribution = summary["distributions"]['CTOR']
+    # Below k values the sketch is exact
+    assert distribution["count"] == len(ctor)
+    assert distribution["p50"] == ctor[(len(ctor) + 1) // 2 - 1]
+    assert distribution["p99"] <= ctor[-1]
+    assert summary["distinct"]['Campaign Segment'] == len({row['Campaign Segment'] for row in table})
+
+
+def test_aggregate_sketches_merge():
+    """Aggregates should carry sketches that merge like the sums"""
+    aggregator = SketchAggregator()
+    with open(SAMPLE_CSV, 'rb') as f:
+        row_count = ingest_csv(f, [aggregator])
+    aggregate = MetricAggregate(row_count=row_count, sketches=aggregator.result())
+    merged = (aggregate + aggregate).summary()
+    single = aggregate.summary()
+    assert merged["distributions"]['Unique Open Rate']["count"] == 2 * single["distributions"]['Unique Open Rate']["count"]
+    assert merged["distributions"]['Unique Open Rate']["p50"] == single["distributions"]['Unique Open Rate']["p50"]
+    assert merged["distinct"] == single["distinct"]
+
+
+if __name__ == "__main__":
+    test_kll_quantiles_within_rank_error()
+    test_hyperloglog_merges_across_files()
+    test_sample_export_distributions()
+    test_aggregate_sketches_merge()
+    print("✅ All sketch tests passed!")
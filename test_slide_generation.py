@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for generating QBR slides concurrently from per-slide sub-prompts
+"""
+import asyncio
+import json
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from prompt_generator import SLIDE_KEYS, create_qbr_prompt, create_shared_context, create_slide_prompts
+from slide_generation import generate_slides, slide_from_response
+
+
+class FakeClient:
+    """Mimics LLMClient.generate_text with scripted responses per slide"""
+
+    def __init__(self, responses=None, delay=0.01):
+        self.responses = responses or {}
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+
+    async def generate_text(self, prompt, generation_config=None, use_cache=True, parse=None):
+        key = prompt.rsplit('single key "', 1)[-1].split('"', 1)[0]
+        self.calls.append((key, use_cache))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        # Later slides finish first, so merging must not follow completion order
+        await asyncio.sleep(self.delay * (10 - int(key[-1])))
+        self.active -= 1
+        scripted = self.responses.get(key)
+        text = scripted.pop(0) if scripted else json.dumps({key: {"title": key.upper(), "content": []}})
+        return text if parse is None else parse(text)
+
+
+def make_prompts():
+    return create_slide_prompts("Acme", "acme.com", "E-Commerce", "Revenue: $1,000")
+
+
+def test_slide_from_response():
+    """Both the keyed and the bare slide shapes should be accepted"""
+    slide = {"title": "Wins", "content": []}
+    assert slide_from_response("slide3", {"slide3": slide}) == slide
+    assert slide_from_response("slide3", slide) == slide
+    assert slide_from_response("slide3", {"slide4": slide}) is None
+    assert slide_from_response("slide3", ["not", "a", "slide"]) is None
+
+
+def test_slides_merge_in_deck_order_within_limit():
+    """Slides run concurrently up to the limit and merge in deck order"""
+    client = FakeClient()
+    slides = asyncio.run(generate_slides(client, make_prompts(), json.loads, concurrency=3))
+    assert list(slides) == SLIDE_KEYS
+    assert slides["slide2"]["title"] == "SLIDE2"
+    assert client.peak == 3
+
+
+def test_failing_slide_is_retried_alone_without_cache():
+    """Only the unusable slide is regenerated, bypassing the cached response"""
+    client = FakeClient({"slide4": ["not json", json.dumps({"title": "Campaigns"})]})
+    slides = asyncio.run(generate_slides(client, make_prompts(), json.loads, retries=1))
+    assert slides["slide4"] == {"title": "Campaigns"}
+    assert len(client.calls) == 7
+    assert client.calls.count(("slide4", False)) == 1
+    assert all(use_cache for key, use_cache in client.calls if key != "slide4")
+
+
+def test_slide_failing_every_attempt_is_left_out():
+    """A slide that never parses should not sink the rest of the deck"""
+    client = FakeClient({"slide5": ["oops", json.dumps({"other": 1})]})
+    slides = asyncio.run(generate_slides(client, make_prompts(), json.loads, retries=1))
+    assert list(slides) == ["slide1", "slide2", "slide3", "slide4", "slide6"]
+
+
+def test_slide_prompts_share_context():
+    """Every sub-prompt starts with the shared context and asks for its own key"""
+    shared = create_shared_context("Acme", "acme.com", "E-Commerce", "Revenue: $1,000")
+    prompts = make_prompts()
+    assert list(prompts) == SLIDE_KEYS
+    for key, prompt in prompts.items():
+        assert prompt.startswith(shared)
+        assert f'single key "{key}"' in prompt
+    # The monolithic prompt still covers the whole deck
+    full = create_qbr_prompt("Acme", "acme.com", "E-Commerce", "Revenue: $1,000")
+    assert full.startswith(shared)
+    assert all(f"{number}.  **" in full for number in range(1, 7))
+
+
+if __name__ == "__main__":
+    test_slide_from_response()
+    test_slides_merge_in_deck_order_within_limit()
+    test_failing_slide_is_retried_alone_without_cache()
+    test_slide_failing_every_attempt_is_left_out()
+    test_slide_prompts_share_context()
+    print("✅ All slide generation tests passed!")
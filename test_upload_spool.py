@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for single-pass upload spooling and hashing
+"""
+import asyncio
+import hashlib
+import io
+import os
+import sys
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import upload_spool
+from upload_spool import spool_upload
+
+
+class FakeUpload:
+    """Minimal stand-in for FastAPI's UploadFile"""
+
+    def __init__(self, filename, content):
+        self.filename = filename
+        self.content_type = "text/csv"
+        self._file = io.BytesIO(content)
+        self.reads = 0
+
+    async def read(self, size=-1):
+        self.reads += 1
+        return self._file.read(size)
+
+
+def test_spool_upload_hashes_and_rewinds():
+    """Size and hash should be computed while spooling, in one pass"""
+    content = b"Revenue,Purchases\n" + b"10.5,1\n" * 1000
+    upload = FakeUpload("export.csv", content)
+    chunk_size = upload_spool.SPOOL_CHUNK_SIZE
+    upload_spool.SPOOL_CHUNK_SIZE = 1024
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        try:
+            spooled = asyncio.run(spool_upload(upload, spool_dir))
+            assert spooled.size == len(content)
+            assert spooled.digest == hashlib.blake2b(content, digest_size=32).hexdigest()
+            assert spooled.file.read() == content
+            assert upload.reads == len(content) // 1024 + 2
+            with open(spooled.path, 'rb') as f:
+                assert f.read() == content
+        finally:
+            upload_spool.SPOOL_CHUNK_SIZE = chunk_size
+            spooled.close()
+
+
+def test_spool_writes_run_off_the_event_loop():
+    """Chunk writes should happen in worker threads, not on the event loop"""
+    class RecordingFile(io.BytesIO):
+        def __init__(self):
+            super().__init__()
+            self.on_loop = []
+
+        def write(self, data):
+            try:
+                asyncio.get_running_loop()
+                self.on_loop.append(True)
+            except RuntimeError:
+                self.on_loop.append(False)
+            return super().write(data)
+
+    content = b"Revenue,Purchases\n" + b"10.5,1\n" * 1000
+    spooled_file = RecordingFile()
+    fdopen, chunk_size = upload_spool.os.fdopen, upload_spool.SPOOL_CHUNK_SIZE
+    upload_spool.SPOOL_CHUNK_SIZE = 1024
+    with tempfile.TemporaryDirectory() as spool_dir:
+        try:
+            upload_spool.os.fdopen = lambda handle, mode: (os.close(handle), spooled_file)[1]
+            spooled = asyncio.run(spool_upload(FakeUpload("export.csv", content), spool_dir))
+        finally:
+            upload_spool.os.fdopen = fdopen
+            upload_spool.SPOOL_CHUNK_SIZE = chunk_size
+    assert spooled.file.read() == content
+    assert len(spooled_file.on_loop) == len(content) // 1024 + 1
+    assert not any(spooled_file.on_loop)
+
+
+if __name__ == "__main__":
+    test_spool_upload_hashes_and_rewinds()
+    test_spool_writes_run_off_the_event_loop()
+    print("✅ All upload spool tests passed!")